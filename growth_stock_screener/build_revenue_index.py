@@ -0,0 +1,25 @@
+from screen.iterations.utils import *
+import argparse
+import time
+from termcolor import cprint
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Build the local revenue index used by the revenue growth screen from the SEC's bulk companyfacts archive."
+    )
+    parser.add_argument('archive', type=str,
+                        help='Path to a downloaded companyfacts.zip (https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip)')
+    parser.add_argument('--output', type=str, default=REVENUE_INDEX_PATH,
+                        help=f'Path of the revenue index to write (default: {REVENUE_INDEX_PATH})')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_arguments()
+
+    start = time.perf_counter()
+    count = build_revenue_index(args.archive, args.output)
+    end = time.perf_counter()
+
+    cprint(f"Indexed revenue data of {count} companies in {end - start:.1f} seconds: {args.output}", "green")
@@ -13,13 +13,14 @@ import math # For ceiling function
 # For simplicity, assume direct import works for now.
 # If ModuleNotFoundError occurs, we might need to adjust imports/structure.
 try:
-    from screen.iterations.short_term_momentum import fetch_ticker_info, fetch_stock_data, SCORING_WEIGHTS
+    from screen.iterations.short_term_momentum import fetch_ticker_info, fetch_stock_data, flush_price_stores, SCORING_WEIGHTS
     import screen.settings as settings
 except ImportError:
     print("Warning: Could not import from screen.iterations.short_term_momentum. Ensure structure is correct.")
     # Define dummy functions if import fails to allow basic structure creation
     def fetch_ticker_info(ticker): return {}
     def fetch_stock_data(ticker, period, interval): return pd.DataFrame()
+    def flush_price_stores(): pass
     SCORING_WEIGHTS = {}
     class settings:
         min_price_short_term = 0
@@ -172,6 +173,9 @@ def generate_html_report(csv_filepath, output_filename="stock_report.html"):
         stocks_data.append(stock_report_data)
         time.sleep(0.05) # Small delay
 
+    # Persist any 1y histories fetched for the report
+    flush_price_stores()
+
     # Ensure data is sorted by original score descending (important for top picks)
     # Note: screen_stocks already sorts, but we ensure it here before slicing
     stocks_data.sort(key=lambda x: float(x.get('score', 0)), reverse=True)
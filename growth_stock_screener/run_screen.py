@@ -16,16 +16,31 @@ import backtest # Corrected: Import directly as it's in the root
 import report_generator # Corrected: Import directly as it's in the root
 
 # --- Argument Parsing ---
+def parse_timeframes(value):
+    """Parses the --timeframe argument: a timeframe, a comma-separated list of timeframes, or 'all'."""
+    available = list(screen.iterations.short_term_momentum.SCORING_WEIGHTS.keys())
+    if value == "all":
+        return available
+    timeframes = [timeframe.strip() for timeframe in value.split(',') if timeframe.strip()]
+    invalid = [timeframe for timeframe in timeframes if timeframe not in available]
+    if not timeframes or invalid:
+        raise argparse.ArgumentTypeError(f"invalid timeframe(s) {', '.join(invalid) or repr(value)} (choose from {', '.join(available)} or 'all')")
+    return list(dict.fromkeys(timeframes)) # Drop duplicates, keep order
+
 def parse_arguments():
     parser = argparse.ArgumentParser(description='Run Short-Term Stock Screener with custom settings.')
     # Timeframe argument
-    parser.add_argument('-t', '--timeframe', type=str, default=settings.TIMEFRAME,
-                        choices=["24_hours", "3_days", "7_days", "2_weeks", "1_month"],
-                        help=f'Select the target timeframe (default: {settings.TIMEFRAME})')
+    parser.add_argument('-t', '--timeframe', type=parse_timeframes, default=[settings.TIMEFRAME],
+                        help=f'Select the target timeframe, a comma-separated list of timeframes, or "all" to score every timeframe from a single data load '
+                             f'({", ".join(screen.iterations.short_term_momentum.SCORING_WEIGHTS.keys())}; default: {settings.TIMEFRAME})')
     # Price range preset argument
     parser.add_argument('-p', '--price-preset', type=str, default=settings.active_price_preset,
                         choices=list(settings.price_range_presets.keys()),
                         help=f'Select a price range preset (default: {settings.active_price_preset})')
+    # Preset sweep argument
+    parser.add_argument('--sweep-presets', nargs='*', default=None, metavar='PRESET',
+                        choices=list(settings.price_range_presets.keys()),
+                        help='Screen several price presets in one pass (all presets if none are listed): histories and indicators are loaded once over the widest price range and results are saved per preset and timeframe.')
     # Custom price range arguments
     parser.add_argument('--min-price', type=float, default=None,
                         help='Override minimum price (use with --price-preset custom or instead of preset)')
@@ -43,6 +58,9 @@ def parse_arguments():
     # Tickers argument
     parser.add_argument('--tickers', type=str, default=None,
                         help='Run screener on a specific list of tickers (semicolon-separated, e.g., "AAPL;MSFT;GOOGL") instead of all NASDAQ listings.')
+    # Pre-filter argument
+    parser.add_argument('--no-prefilter', action='store_true',
+                        help='Disable the NASDAQ listing price/volume pre-filter and fetch history for every listed symbol.')
     # HTML report argument
     parser.add_argument('--html', action='store_true',
                         help='Generate an HTML report from the results.')
@@ -53,7 +71,8 @@ def parse_arguments():
 args = parse_arguments()
 
 # --- Apply Argument Overrides to Settings ---
-settings.TIMEFRAME = args.timeframe
+timeframes = args.timeframe
+settings.TIMEFRAME = timeframes[0]
 settings.MAX_CACHE_AGE_DAYS = args.cache_age
 quick_mode_enabled = args.quick
 quick_mode_fraction = settings.QUICK_MODE_FRACTION
@@ -96,6 +115,17 @@ if settings.min_price_short_term >= settings.max_price_short_term:
      print(f"Warning: Min price (${settings.min_price_short_term}) >= Max price (${settings.max_price_short_term}). Adjusting min price to 0.")
      settings.min_price_short_term = 0
 
+# Sweep mode screens the union price band of the selected presets
+sweep_presets = None
+if args.sweep_presets is not None:
+    preset_names = args.sweep_presets or list(settings.price_range_presets.keys())
+    sweep_presets = {name: settings.price_range_presets[name] for name in dict.fromkeys(preset_names)}
+    if args.min_price is not None or args.max_price is not None:
+        print("Warning: --min-price/--max-price are ignored in preset sweep mode.")
+    settings.min_price_short_term = min(preset["min"] for preset in sweep_presets.values())
+    settings.max_price_short_term = max(preset["max"] for preset in sweep_presets.values())
+    print(f"INFO: Sweeping price presets {', '.join(sweep_presets)} (union price range ${settings.min_price_short_term:.2f}-${settings.max_price_short_term:.2f}).")
+
 # --- End Apply Argument Overrides ---
 
 # Define cache file path for quick mode sample
@@ -120,7 +150,10 @@ else:
     print("\nINFO: Caching is DISABLED.")
 
 # wait for user to press enter
-input_msg = f"\nPress Enter to run short-term skyrocket screen (Timeframe: {settings.TIMEFRAME}, Price: ${settings.min_price_short_term:.2f}-${settings.max_price_short_term:.2f})"
+input_msg = f"\nPress Enter to run short-term skyrocket screen (Timeframe: {', '.join(timeframes)}, Price: ${settings.min_price_short_term:.2f}-${settings.max_price_short_term:.2f}"
+if sweep_presets:
+    input_msg += f", Presets: {', '.join(sweep_presets)}"
+input_msg += ")"
 if args.tickers:
     input_msg += f" for specific tickers: {args.tickers[:50]}{'...' if len(args.tickers) > 50 else ''}"
 input(input_msg + " . . .")
@@ -148,6 +181,10 @@ else:
         if not nasdaq_df.empty and 'Symbol' in nasdaq_df.columns:
              ticker_list = nasdaq_df['Symbol'].tolist()
              print(f"Obtained {len(ticker_list)} tickers from nasdaq_listings.json.")
+             # Drop symbols far outside the price range before fetching any history
+             if settings.prefilter_enabled and not args.no_prefilter:
+                 ticker_list = screen.iterations.short_term_momentum.prefilter_universe(
+                     nasdaq_df, settings.min_price_short_term, settings.max_price_short_term)
         else:
              cprint("Error: Could not load valid tickers from nasdaq_listings.json.", "red")
              ticker_list = []
@@ -203,68 +240,84 @@ if not args.tickers and quick_mode_enabled and ticker_list:
         except Exception as e:
             print(f"Warning: Could not save new quick mode sample: {e}")
 
-# Run the short-term momentum screen (only if tickers exist)
-if ticker_list:
-    screen_results_df = screen.iterations.short_term_momentum.screen_stocks(ticker_list, settings.TIMEFRAME)
+# Run the short-term momentum screen for every selected timeframe (and preset, in sweep mode)
+# Each run: (timeframe, (min price, max price), results CSV filename, results DataFrame)
+runs = []
+if sweep_presets:
+    if ticker_list:
+        sweep_results = screen.iterations.short_term_momentum.screen_presets(ticker_list, sweep_presets, timeframes)
+    else:
+        sweep_results = {(name, timeframe): pd.DataFrame() for name in sweep_presets for timeframe in timeframes}
+    for (name, timeframe), results_df in sweep_results.items():
+        price_range = (sweep_presets[name]["min"], sweep_presets[name]["max"])
+        runs.append((timeframe, price_range, screen.iterations.short_term_momentum.candidates_filename(timeframe, name), results_df))
 else:
-    # If original list was empty, or after sampling if it becomes empty (unlikely with sample_size >= 1)
-    screen_results_df = pd.DataFrame() 
+    if ticker_list:
+        screen_results = screen.iterations.short_term_momentum.screen_timeframes(ticker_list, timeframes)
+    else:
+        # If original list was empty, or after sampling if it becomes empty (unlikely with sample_size >= 1)
+        screen_results = {timeframe: pd.DataFrame() for timeframe in timeframes}
+    price_range = (settings.min_price_short_term, settings.max_price_short_term)
+    for timeframe, results_df in screen_results.items():
+        runs.append((timeframe, price_range, screen.iterations.short_term_momentum.candidates_filename(timeframe), results_df))
 
 # track end time
 end = time.perf_counter()
 
-# Construct the expected output filename based on the logic in short_term_momentum.py
-outfile_name = f"skyrocket_candidates_{settings.TIMEFRAME}.csv"
+for timeframe, price_range, outfile_name, screen_results_df in runs:
+    # Report generation reads the active timeframe and price range from settings
+    settings.TIMEFRAME = timeframe
+    settings.min_price_short_term, settings.max_price_short_term = price_range
 
-# notify user when finished
-# Adjust message based on whether results were found
-if screen_results_df is not None and not screen_results_df.empty:
-    # Results were generated
-    csv_success = True
-    try:
-        # Ensure the file was actually saved (screen_stocks might have errors)
-        if not os.path.exists(outfile_name):
-             print(f"Warning: Results DataFrame was not empty, but CSV file '{outfile_name}' was not found.")
-             csv_success = False
-        else:
-             print_done_message(end - start, outfile_name)
-    except Exception as e:
-        # Handle potential errors in print_done_message if outfile_name is weird
-        print(f"Error finalizing message: {e}")
-        csv_success = False
+    # notify user when finished
+    # Adjust message based on whether results were found
+    if screen_results_df is not None and not screen_results_df.empty:
+        # Results were generated
+        csv_success = True
+        try:
+            # Ensure the file was actually saved (screen_stocks might have errors)
+            if not os.path.exists(outfile_name):
+                 print(f"Warning: Results DataFrame was not empty, but CSV file '{outfile_name}' was not found.")
+                 csv_success = False
+            else:
+                 print_done_message(end - start, outfile_name)
+        except Exception as e:
+            # Handle potential errors in print_done_message if outfile_name is weird
+            print(f"Error finalizing message: {e}")
+            csv_success = False
+
+        # --- Generate HTML Report (if requested and CSV saved) ---
+        if args.html and csv_success:
+            print("\n" + "-" * 80)
+            cprint("GENERATING HTML REPORT", "blue", attrs=["bold"])
+            print("-" * 80)
+            html_report_filename = outfile_name.replace(".csv", ".html")
+            report_generator.generate_html_report(outfile_name, html_report_filename)
+            print("-" * 80)
+        elif args.html and not csv_success:
+             cprint("Skipping HTML report generation because CSV file was not saved successfully.", "yellow")
 
-    # --- Generate HTML Report (if requested and CSV saved) ---
-    if args.html and csv_success:
-        print("\n" + "-" * 80)
-        cprint("GENERATING HTML REPORT", "blue", attrs=["bold"])
+        # --- Run Backtest (if requested) ---
+        if args.backtest and csv_success:
+            print("\n" + "-" * 80)
+            cprint("PERFORMING BACKTEST", "magenta", attrs=["bold"])
+            print("-" * 80)
+            backtest.run_backtest(outfile_name)
+            print("-" * 80)
+        elif args.backtest and not csv_success:
+             cprint("Skipping backtest because CSV file was not saved successfully.", "yellow")
+
+    elif screen_results_df is None:
+        # Handle case where screening function returned None (likely an error)
+        duration = format_time(end - start)
         print("-" * 80)
-        html_report_filename = outfile_name.replace(".csv", ".html")
-        report_generator.generate_html_report(outfile_name, html_report_filename)
+        cprint(f"Scan completed in {duration}, but encountered errors. No results generated for {outfile_name}.", "red")
         print("-" * 80)
-    elif args.html and not csv_success:
-         cprint("Skipping HTML report generation because CSV file was not saved successfully.", "yellow")
-
-    # --- Run Backtest (if requested) ---
-    if args.backtest and csv_success:
-        print("\n" + "-" * 80)
-        cprint("PERFORMING BACKTEST", "magenta", attrs=["bold"])
+    else: # screen_results_df is empty
+        duration = format_time(end - start)
         print("-" * 80)
-        backtest.run_backtest(outfile_name)
+        cprint(f"Scan complete. No stocks met the {timeframe} criteria for {outfile_name} in {duration}.", "yellow")
         print("-" * 80)
-    elif args.backtest and not csv_success:
-         cprint("Skipping backtest because CSV file was not saved successfully.", "yellow")
-
-elif screen_results_df is None:
-    # Handle case where screening function returned None (likely an error)
-    duration = format_time(end - start)
-    print("-" * 80)
-    cprint(f"Scan completed in {duration}, but encountered errors. No results generated.", "red")
-    print("-" * 80)
-else: # screen_results_df is empty
-    duration = format_time(end - start)
-    print("-" * 80)
-    cprint(f"Scan complete. No stocks met the criteria in {duration}.", "yellow")
-    print("-" * 80)
 
 # Keep the terminal open (optional)
 # input("Press Enter to exit . . .")
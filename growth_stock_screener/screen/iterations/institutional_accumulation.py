@@ -47,10 +47,14 @@ def fetch_exchange(symbol: str) -> str:
     for exchange in exchanges:
         url = f"https://www.marketbeat.com/stocks/{exchange}/{symbol}/"
         try:
+            acquire(url)
             response = requests.get(url, allow_redirects=False, timeout=timeout)
         except Exception:
             continue
 
+        if response.status_code in THROTTLE_STATUSES:
+            penalize(url, retry_after_seconds(response.headers))
+
         if response.status_code == 200:
             return exchange
 
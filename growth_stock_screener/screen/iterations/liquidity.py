@@ -5,10 +5,12 @@ from aiohttp.client import ClientSession
 from tqdm.asyncio import tqdm_asyncio
 from termcolor import cprint, colored
 import time
+from typing import Dict, List
 from .utils import *
-from ..settings import min_market_cap, min_price, min_volume
+from ..settings import min_market_cap, min_price, min_volume, volume_fallback
 
 # constants
+volume_days = 50
 volume_xpath = "/html/body/main/div/div[2]/div[2]/div/div[2]/div/div/div/div[2]/div/div[1]/barchart-table-scroll/table/tbody/tr[3]/td[5]"
 
 # print header message to terminal
@@ -32,9 +34,8 @@ logs = []
 # retreive JSON data from previous screen iteration
 df = open_outfile("relative_strengths")
 
-# populate these lists while iterating through symbols
-successful_symbols = []
-failed_symbols = []
+if "Symbol" not in df:
+    df = pd.DataFrame(columns=["Symbol", "Company Name", "Market Cap", "Industry", "Price", "RS"])
 
 
 async def fetch_volume(symbol: str, session: ClientSession) -> int:
@@ -51,65 +52,74 @@ async def fetch_volume(symbol: str, session: ClientSession) -> int:
         return None
 
 
-async def screen_liquidity(df_index: int, session: ClientSession) -> None:
-    """Populate stock data lists based on whether the given row satisfies liquidity criteria."""
-    row = df.iloc[df_index]
-
-    # extract important information from dataframe row
-    symbol = row["Symbol"]
-    price = row["Price"]
-    market_cap = row["Market Cap"]
-    volume = await fetch_volume(symbol, session)
-
-    # check if null values are present in screen criteria
-    if volume is None:
-        failed_symbols.append(symbol)
-        return
-
-    if pd.isna(market_cap) or market_cap == "":
-        logs.append(skip_message(symbol, "couldn't fetch market cap"))
-        failed_symbols.append(symbol)
-        return
-
-    # convert market cap from string literal to float
-    market_cap = float(market_cap)
+async def fetch_volumes(symbols: List[str]) -> Dict[str, int]:
+    """Fetch the 50-day average volumes of the given stock symbols from barchart.com."""
+    async with aiohttp.ClientSession() as session:
+        volumes = await tqdm_asyncio.gather(
+            *[fetch_volume(symbol, session) for symbol in symbols]
+        )
+    return dict(zip(symbols, volumes))
+
+
+# compute 50-day average volumes from the bars stored by the relative strength stage
+print("Computing liquidity data . . .\n")
+symbols = df["Symbol"].tolist()
+price_store = PriceStore(PRICE_PANEL_DIR, PANEL_PARTITION)
+volumes = trailing_average(
+    price_store.panel(symbols, "Volume", PANEL_PERIOD), volume_days
+).round()
+
+# fall back to scraping symbols without a complete stored volume history
+missing_symbols = [symbol for symbol in dict.fromkeys(symbols) if pd.isna(volumes[symbol])]
+if volume_fallback and (len(missing_symbols) > 0):
+    print(f"Fetching liquidity data of {len(missing_symbols)} symbols . . .\n")
+    volumes.update(pd.Series(asyncio.run(fetch_volumes(missing_symbols)), dtype=float))
+else:
+    logs.extend(skip_message(symbol, "incomplete volume history") for symbol in missing_symbols)
+
+# screen every stock at once
+liquidity_df = df.assign(
+    **{
+        "Market Cap": pd.to_numeric(df["Market Cap"], errors="coerce"),
+        "50-day Average Volume": df["Symbol"].map(volumes).astype(float),
+    }
+)
 
-    # print volume info to console
+missing_volume = liquidity_df["50-day Average Volume"].isna()
+missing_market_cap = ~missing_volume & liquidity_df["Market Cap"].isna()
+complete = ~(missing_volume | missing_market_cap)
+liquid = (
+    complete
+    & (liquidity_df["Market Cap"] >= min_market_cap)
+    & (liquidity_df["Price"] >= min_price)
+    & (liquidity_df["50-day Average Volume"] >= min_volume)
+)
+failed_symbols = liquidity_df.loc[~complete, "Symbol"].tolist()
+
+# print liquidity info to console
+for symbol in liquidity_df.loc[missing_market_cap, "Symbol"]:
+    logs.append(skip_message(symbol, "couldn't fetch market cap"))
+
+for symbol, market_cap, price, volume, passed in zip(
+    liquidity_df.loc[complete, "Symbol"],
+    liquidity_df.loc[complete, "Market Cap"],
+    liquidity_df.loc[complete, "Price"],
+    liquidity_df.loc[complete, "50-day Average Volume"],
+    liquid[complete],
+):
     logs.append(
         f"\n{symbol} | Market Cap: ${market_cap / 1000000000:.1f}B | Price: ${price:,.2f} | 50-day Avg. Volume: {volume:,.0f} shares\n"
     )
 
     # filter out illiquid stocks
-    if (market_cap < min_market_cap) or (price < min_price) or (volume < min_volume):
+    if not passed:
         logs.append(filter_message(symbol))
-        return
-
-    successful_symbols.append(
-        {
-            "Symbol": symbol,
-            "Company Name": row["Company Name"],
-            "Price": price,
-            "Market Cap": market_cap,
-            "50-day Average Volume": volume,
-            "Industry": row["Industry"],
-            "RS": row["RS"],
-        }
-    )
-
-
-async def main() -> None:
-    """Screen each stock present in the dataframe based on liquidity criteria."""
-    async with aiohttp.ClientSession() as session:
-        await tqdm_asyncio.gather(
-            *[screen_liquidity(df_index, session) for df_index in range(0, len(df))]
-        )
-
-
-print("Fetching liquidity data . . .\n")
-asyncio.run(main())
 
 # create a new dataframe with symbols which satisfied liquidity criteria
-screened_df = pd.DataFrame(successful_symbols)
+screened_df = liquidity_df.loc[
+    liquid,
+    ["Symbol", "Company Name", "Price", "Market Cap", "50-day Average Volume", "Industry", "RS"],
+].astype({"50-day Average Volume": int})
 
 # serialize data in JSON format and save on machine
 create_outfile(screened_df, "liquidity")
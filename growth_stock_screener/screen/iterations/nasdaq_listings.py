@@ -25,6 +25,7 @@ headers = {
 print("Fetching stock symbols from NASDAQ . . .")
 # extract symbols from response
 try:
+    acquire(url)
     response = requests.get(url, headers=headers, timeout=15)
 except Timeout:
     cprint(
@@ -40,15 +41,28 @@ df = df.drop(
     columns=[
         "sector",
         "url",
-        "lastsale",
         "netchange",
-        "pctchange",
-        "volume",
         "country",
         "ipoyear",
     ]
 )
-df.columns = ["Symbol", "Company Name", "Market Cap", "Industry"]
+df = df.rename(
+    columns={
+        "symbol": "Symbol",
+        "name": "Company Name",
+        "lastsale": "Last Sale",
+        "pctchange": "% Change",
+        "volume": "Volume",
+        "marketCap": "Market Cap",
+        "industry": "Industry",
+    }
+)
+
+# convert quote strings (e.g. "$1.23", "-4.5%") into floats for the momentum screen's pre-filter
+for column in ["Last Sale", "% Change", "Volume"]:
+    df[column] = pd.to_numeric(
+        df[column].astype(str).str.replace(r"[$,%]", "", regex=True), errors="coerce"
+    )
 
 # remove any symbols containing a '/' or '^'
 df = df[~(df["Symbol"].str.contains("/") | df["Symbol"].str.contains(r"\^"))]
@@ -3,8 +3,9 @@ from typing import Dict
 from tqdm import tqdm
 from termcolor import cprint, colored
 import time
+from datetime import datetime
 from .utils import *
-from ..settings import min_growth_percent, protected_rs
+from ..settings import min_growth_percent, protected_rs, revenue_index_max_age_days
 
 # print header message to terminal
 process_name = "Revenue Growth"
@@ -35,29 +36,39 @@ df = open_outfile("trend")
 successful_symbols = []
 failed_symbols = []
 
-# fetch revenue data for all symbols
+# look up revenue data in the local revenue index (if one was built from a recent archive), then fetch the remaining symbols
 symbol_list = [] if ("Symbol" not in df) else list(df["Symbol"])
-revenue_data = fetch_all_revenues(symbol_list)
+revenue_index = load_revenue_index(max_age_days=revenue_index_max_age_days)
+revenue_data = {}
+
+if revenue_index is not None:
+    revenue_data = indexed_revenues(symbol_list, revenue_index)
+    index_date = datetime.fromtimestamp(revenue_index["archive_modified"])
+    print(
+        colored(f"Revenue data of {len(revenue_data)} symbols found in local index", "dark_grey"),
+        colored(f"(archive from {index_date:%Y-%m-%d})", "light_grey"),
+        "\n",
+    )
 
+missing_symbols = [symbol for symbol in symbol_list if symbol not in revenue_data]
+if len(missing_symbols) > 0:
+    revenue_data.update(fetch_all_revenues(missing_symbols))
+
+
+# calculate year-over-year revenue growth of every symbol's two most recent timeframes at once
+growth_table = revenue_growth_table(revenue_data)
+revenue_growths = growth_table[growth_table["Growth"].notna()].to_dict("index")
 
-def revenue_growth(timeframe: str, df: pd.DataFrame) -> Dict[str, float]:
-    """Calculate the revenue growth for the given timeframe compared to the same timeframe one year earlier."""
-    if timeframe is None:
-        return None
 
-    # fetch revenues for the inputted timeframe and the same timeframe 1 year ago
-    prev_timeframe = previous_timeframe(timeframe)
-    revenue = extract_revenue(timeframe, df)
-    prev_revenue = extract_revenue(prev_timeframe, df)
+def revenue_growth(symbol: str, quarter: str) -> Dict[str, float]:
+    """Return the revenue growth of a symbol's quarter ("Q1" or "Q2") compared to the same timeframe one year earlier."""
+    growth = revenue_growths.get((symbol, quarter))
 
     # handle cases where data is unavailable or growth is incalculable
-    if (revenue is None) or (prev_revenue is None) or (prev_revenue <= 0):
+    if growth is None:
         return None
 
-    # return a dictionary containing revenue growth data
-    growth = percent_change(prev_revenue, revenue)
-
-    return {"Current": revenue, "Previous": prev_revenue, "Growth": growth}
+    return {"Current": growth["Current"], "Previous": growth["Previous"], "Growth": growth["Growth"]}
 
 
 def extract_comparison_revenues(symbol: str) -> Dict[str, Dict[str, float]]:
@@ -70,17 +81,8 @@ def extract_comparison_revenues(symbol: str) -> Dict[str, Dict[str, float]]:
     if "Foreign Stock" in revenue_df:
         return {"Foreign Stock": {}}
 
-    # extract the two lowest rows of the revenues DataFrame
-    q1_row = revenue_df.iloc[-2] if (len(revenue_df) >= 2) else None
-    q2_row = revenue_df.iloc[-1] if (len(revenue_df) >= 1) else None
-
-    # determine the timeframe of each row's revenue report
-    q1_timeframe = q1_row["frame"] if (q1_row is not None) else None
-    q2_timeframe = q2_row["frame"] if (q2_row is not None) else None
-
-    # calculate the revenue growth for each timeframe compared to the same timeframe 1 year ago
-    q1_growth = revenue_growth(q1_timeframe, revenue_df)
-    q2_growth = revenue_growth(q2_timeframe, revenue_df)
+    q1_growth = revenue_growth(symbol, "Q1")
+    q2_growth = revenue_growth(symbol, "Q2")
 
     # return revenue details as a dictionary
     if q2_growth is None:
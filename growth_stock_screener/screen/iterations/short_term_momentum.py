@@ -3,12 +3,23 @@ import pandas as pd
 import ta
 import time
 from tqdm import tqdm
+from tqdm.asyncio import tqdm_asyncio
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import os
 import pickle
 from datetime import datetime, timedelta
 import screen.settings as settings # Import settings
 import numpy as np # Add numpy import
 from twelvedata import TDClient # Import Twelve Data client
+from screen.iterations.utils.price_store import PriceStore, merge_delta, period_start, slice_period # Columnar OHLCV cache
+from screen.iterations.utils.indicator_engine import compute_indicator_table # Vectorized indicators
+from screen.iterations.utils.indicator_state import IndicatorStateStore # Streaming indicator state
+from screen.iterations.utils.parallel_indicators import compute_indicator_table_parallel, parallel_compute_available, start_indicator_pool # Multi-core indicators
+from screen.iterations.utils.scoring import criterion_indicators, score_table # Declarative scoring rules
+from screen.iterations.utils.rate_limit import acquire # Per-host request rate limits
+from screen.iterations.utils.scraping import yf_call # Rate-limited yfinance calls with throttle feedback
 
 # Constants
 # PRICE_LIMIT = 4.0 # Replaced by settings
@@ -21,6 +32,8 @@ RSI_WINDOW = 14
 BBANDS_WINDOW = 20
 ATR_WINDOW = 14
 CACHE_DIR = "growth_stock_screener/cache"
+TWELVEDATA_HOST = "api.twelvedata.com"
+CACHE_FETCH_PERIOD = "1y" # Minimum history fetched on a cache miss, so later longer-lookback requests (e.g. the HTML report) are served from cache
 
 # Minimum data length required for indicators
 MIN_INDICATOR_LENGTH = max(RSI_WINDOW, BBANDS_WINDOW, ATR_WINDOW, VOLUME_AVG_DAYS, BREAKOUT_DAYS) + 1
@@ -28,6 +41,12 @@ MIN_INDICATOR_LENGTH = max(RSI_WINDOW, BBANDS_WINDOW, ATR_WINDOW, VOLUME_AVG_DAY
 # Create cache directory if it doesn't exist
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Open price store partitions, keyed by interval
+_price_stores = {}
+_price_stores_lock = threading.Lock()
+# Persisted streaming indicator states (opened on first use)
+_indicator_states = None
+
 # Initialize Twelve Data Client (if key is provided)
 td_client = None
 if settings.TWELVEDATA_API_KEY and settings.TWELVEDATA_API_KEY != "YOUR_TWELVEDATA_API_KEY_PLACEHOLDER":
@@ -39,7 +58,43 @@ if settings.TWELVEDATA_API_KEY and settings.TWELVEDATA_API_KEY != "YOUR_TWELVEDA
 else:
     print("INFO: Twelve Data API key not provided or is placeholder. Twelve Data fallback disabled.")
 
+# --- Scoring Criteria Definition ---
+# Each criterion is a list of alternative conditions on an indicator (comparator and threshold);
+# the first condition a ticker satisfies awards the criterion's weight and adds its formatted label
+# to the 'criteria' column. A timeframe in SCORING_WEIGHTS can use any criterion defined here.
+SCORING_CRITERIA = {
+    "Volume Surge (>2x Avg)": [
+        {"indicator": "volume_surge", "op": "==", "value": True, "label": "VolumeSurge"},
+    ],
+    "RSI Extreme (<30 or >70)": [
+        {"indicator": "rsi", "op": "<", "value": RSI_OVERSOLD, "label": "RSI Oversold ({rsi:.1f})"},
+        {"indicator": "rsi", "op": ">", "value": RSI_OVERBOUGHT, "label": "RSI Overbought ({rsi:.1f})"},
+    ],
+    "RSI Momentum (>70)": [
+        {"indicator": "rsi", "op": ">", "value": RSI_OVERBOUGHT, "label": "RSI Momentum ({rsi:.1f})"},
+    ],
+    "Breakout (New 20d High)": [
+        {"indicator": "breakout", "op": "==", "value": True, "label": "Breakout"},
+    ],
+    "High ATR (>5% of Price)": [
+        {"indicator": "atr_percent", "op": ">", "value": 5, "label": "High ATR ({atr_percent:.1f}%)"},
+    ],
+    "Bollinger Band Squeeze (<5% Width)": [
+        {"indicator": "bb_squeeze", "op": "==", "value": True, "label": "BBSqueeze (W:{bb_width:.3f})"},
+    ],
+    "High Short Interest (>15% Float)": [
+        {"indicator": "short_interest_pct", "op": ">", "value": 15, "label": "HighShortInt ({short_interest_pct:.1f}%)"},
+    ],
+    "Institutional Ownership (>5%)": [
+        {"indicator": "inst_own_pct", "op": ">", "value": 5, "label": "InstOwn ({inst_own_pct:.1f}%)"},
+    ],
+    "Catalyst Proxy (>15% move in 5d)": [
+        {"indicator": "catalyst_proxy_flag", "op": "==", "value": True, "label": "CatalystProxy ({catalyst_proxy_pct_change:.1f}% 5d)"},
+    ],
+}
+
 # --- Scoring Weights Definition ---
+# Adding a strategy only needs a new entry here (criteria are scored in the listed order)
 SCORING_WEIGHTS = {
     "24_hours": {
         "description": "Focuses on immediate reversal/breakout potential.",
@@ -89,6 +144,30 @@ SCORING_WEIGHTS = {
     }
 }
 
+# --- Indicator Data Requirements ---
+# Data source each indicator is derived from: "history" (OHLCV bars) or "info" (Ticker.info request)
+INDICATOR_SOURCES = {
+    'current_price': 'history',
+    'rsi': 'history',
+    'volume_surge': 'history',
+    'breakout': 'history',
+    'bb_squeeze': 'history',
+    'bb_width': 'history',
+    'atr_percent': 'history',
+    'catalyst_proxy_flag': 'history',
+    'catalyst_proxy_pct_change': 'history',
+    'momentum_6m': 'history',
+    'sharpe_ratio': 'history',
+    'short_interest_pct': 'info',
+    'short_ratio': 'info',
+    'inst_own_pct': 'info',
+}
+
+def required_sources(timeframe):
+    """Returns the set of data sources the scoring criteria of a timeframe depend on."""
+    criteria = SCORING_WEIGHTS.get(timeframe, {}).get('weights', {})
+    return {INDICATOR_SOURCES[indicator] for criterion in criteria for indicator in criterion_indicators(SCORING_CRITERIA[criterion])}
+
 # Error handling for yfinance - Removed yf.pdr_override()
 # yf.pdr_override()
 
@@ -96,7 +175,10 @@ def fetch_stock_data(ticker, period="3mo", interval="1d"):
     """Fetches historical stock data using yfinance, with Twelve Data as failover."""
     # --- Try yfinance first (with cache) ---
     yf_data = _fetch_yfinance_data(ticker, period, interval)
+    return _apply_fallback(ticker, yf_data, interval)
 
+def _apply_fallback(ticker, yf_data, interval="1d"):
+    """Returns yfinance data if it is long enough for the indicators, otherwise tries Twelve Data."""
     if yf_data is not None and len(yf_data) >= MIN_INDICATOR_LENGTH:
         # print(f"[Fetcher] Using yfinance data for {ticker} (Length: {len(yf_data)})") # Debug
         return yf_data
@@ -115,37 +197,60 @@ def fetch_stock_data(ticker, period="3mo", interval="1d"):
     # print(f"[Fetcher] Both sources failed/insufficient for {ticker}. Returning yfinance result.") # Debug
     return yf_data
 
-def _fetch_yfinance_data(ticker, period, interval):
-    """Internal function to fetch data from yfinance using cache."""
-    cache_enabled = settings.MAX_CACHE_AGE_DAYS > 0
-    max_age_seconds = settings.MAX_CACHE_AGE_DAYS * 24 * 60 * 60
-    cache_filename = f"{ticker}_{period}_{interval}_yf.pkl" # Suffix for clarity
-    cache_filepath = os.path.join(CACHE_DIR, cache_filename)
+def get_price_store(interval):
+    """Returns the columnar price store partition holding bars for an interval."""
+    with _price_stores_lock:
+        if interval not in _price_stores:
+            _price_stores[interval] = PriceStore(CACHE_DIR, interval)
+        return _price_stores[interval]
 
-    # Check cache first
-    if cache_enabled and os.path.exists(cache_filepath):
+def flush_price_stores():
+    """Writes any staged bars in every open price store partition to disk."""
+    for store in _price_stores.values():
         try:
-            file_mod_time = os.path.getmtime(cache_filepath)
-            if (time.time() - file_mod_time) < max_age_seconds:
-                with open(cache_filepath, 'rb') as f:
-                    data = pickle.load(f)
-                    if isinstance(data, pd.DataFrame): # Check if it's a DataFrame (even empty)
-                        if not data.empty and not all(col in data.columns for col in ['Open', 'High', 'Low', 'Close', 'Volume']):
-                            print(f"Warning: yfinance Cached data for {ticker} missing columns. Refetching.")
-                        else:
-                            # print(f"Cache hit for yfinance {ticker}") # Debug
-                            return data # Return even if empty, fetch_stock_data decides
-                    else:
-                        print(f"Warning: Invalid yfinance cached data for {ticker}. Refetching.")
+            store.flush()
         except Exception as e:
-            print(f"Error reading yfinance cache for {ticker}: {e}. Refetching.")
-            try: os.remove(cache_filepath) 
-            except OSError: pass
+            print(f"Error writing price store {store.path}: {e}")
+
+def get_indicator_state_store():
+    """Returns the persisted streaming indicator state store for daily bars."""
+    global _indicator_states
+    if _indicator_states is None:
+        _indicator_states = IndicatorStateStore(
+            os.path.join(CACHE_DIR, "indicator_state_1d.pkl"), rsi_window=RSI_WINDOW,
+            bbands_window=BBANDS_WINDOW, atr_window=ATR_WINDOW, volume_avg_days=VOLUME_AVG_DAYS,
+            breakout_days=BREAKOUT_DAYS, volume_surge_factor=VOLUME_SURGE_FACTOR, min_length=MIN_INDICATOR_LENGTH)
+    return _indicator_states
+
+def _fetch_yfinance_data(ticker, period, interval):
+    """Internal function to fetch data from yfinance using the columnar price store."""
+    cache_enabled = settings.MAX_CACHE_AGE_DAYS > 0
+    max_age_seconds = settings.MAX_CACHE_AGE_DAYS * 24 * 60 * 60
 
-    # Fetch fresh from yfinance
+    # Check cache first (the whole partition is memory-mapped on first access)
+    # Any cached history spanning at least the requested period is sliced down to it, e.g. 1y serves 3mo
+    if cache_enabled:
+        store = get_price_store(interval)
+        fetched_at = store.fetched_at(ticker)
+        covered = store.covers(ticker, period)
+        if covered and (time.time() - fetched_at) < max_age_seconds:
+            data = store.get(ticker, period)
+            if data is not None:
+                return data # Return even if empty, fetch_stock_data decides
+
+        # Stale cache: only request the bars missing since the last cached session
+        if covered and settings.INCREMENTAL_FETCH:
+            stored_period = store.period_of(ticker)
+            data = _fetch_yfinance_delta(ticker, store.get(ticker), stored_period, interval)
+            if data is not None:
+                store.put(ticker, data, stored_period)
+                return slice_period(data, period)
+
+    # Fetch fresh from yfinance (widened to CACHE_FETCH_PERIOD when caching, then sliced back to the request)
+    fetch_period = _cache_fetch_period(period, interval) if cache_enabled else period
     try:
         stock = yf.Ticker(ticker)
-        data = stock.history(period=period, interval=interval, auto_adjust=True)
+        data = yf_call(stock.history, period=fetch_period, interval=interval, auto_adjust=True)
         # Ensure required columns exist if not empty
         if not data.empty and not all(col in data.columns for col in ['Open', 'High', 'Low', 'Close', 'Volume']):
              print(f"Warning: Missing expected yfinance columns for {ticker}")
@@ -155,24 +260,131 @@ def _fetch_yfinance_data(ticker, period, interval):
         # Cache the result (even if empty, indicates fetch was attempted)
         if cache_enabled:
             try:
-                with open(cache_filepath, 'wb') as f:
-                    pickle.dump(data, f)
+                store.put(ticker, data, fetch_period)
             except Exception as e:
                 print(f"Error writing yfinance cache for {ticker}: {e}")
-        return data
+        return slice_period(data, period) if fetch_period != period else data
     except Exception as e:
         # Mute common yfinance errors for invalid tickers during bulk runs?
         # print(f"Error fetching yfinance data for {ticker}: {e}")
-        # Cache failure? Return None
-        if cache_enabled:
-             try:
-                 # Create an empty DataFrame to cache the failure for a short time?
-                 # For now, just don't cache error.
-                 pass
-             except Exception as ce:
-                 print(f"Error trying to cache yfinance fetch error state for {ticker}: {ce}")
         return None # Indicate failure
 
+def _cache_fetch_period(period, interval):
+    """Returns the period to download on a cache miss: the request widened to CACHE_FETCH_PERIOD for daily bars."""
+    if interval != '1d':
+        return period
+    requested_start = period_start(period)
+    if requested_start is not None and requested_start > period_start(CACHE_FETCH_PERIOD):
+        return CACHE_FETCH_PERIOD
+    return period
+
+def _fetch_yfinance_delta(ticker, cached, period, interval):
+    """Internal function to extend cached yfinance bars with the sessions missing since the last cached bar.
+    Returns None when a full refetch is required (no usable cache, fetch error, or splits/dividends revised history)."""
+    # Need two cached bars: the second-to-last one (a complete session) is used to detect adjustments,
+    # and the last one is always replaced as it may have been a partial intraday bar
+    if cached is None or len(cached) < 2:
+        return None
+    overlap_date = cached.index[-2]
+
+    try:
+        stock = yf.Ticker(ticker)
+        new_data = yf_call(stock.history, start=overlap_date.strftime('%Y-%m-%d'), interval=interval, auto_adjust=True)
+    except Exception:
+        return None
+    return merge_delta(cached, new_data, period)
+
+def _download_batch(tickers, interval, **download_args):
+    """Internal function to download histories for many tickers in one yf.download call.
+    Returns a dict of ticker -> DataFrame (empty if the ticker had no bars), or None if the whole batch failed."""
+    try:
+        data = yf_call(yf.download, tickers, interval=interval, group_by='ticker', auto_adjust=True, actions=True,
+                        threads=True, progress=False, timeout=30, **download_args)
+    except Exception as e:
+        print(f"Error downloading batch of {len(tickers)} tickers: {e}")
+        return None
+    if data is None or data.empty:
+        return None
+
+    frames = {}
+    for ticker in tickers:
+        if isinstance(data.columns, pd.MultiIndex):
+            if ticker not in data.columns.get_level_values(0):
+                frames[ticker] = pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'])
+                continue
+            ticker_data = data[ticker]
+        else:
+            ticker_data = data
+        frames[ticker] = ticker_data.dropna(how='all', subset=['Open', 'High', 'Low', 'Close', 'Volume'])
+    return frames
+
+def prefetch_stock_data(ticker_list, period="3mo", interval="1d"):
+    """Bulk-loads yfinance histories for many tickers.
+    Fresh histories come straight from the price store; stale and missing ones are downloaded
+    with yf.download in batches of settings.HISTORY_BATCH_SIZE. Returns a dict of ticker -> DataFrame
+    (tickers whose batch failed are left out so callers can fall back to fetch_stock_data)."""
+    cache_enabled = settings.MAX_CACHE_AGE_DAYS > 0
+    max_age_seconds = settings.MAX_CACHE_AGE_DAYS * 24 * 60 * 60
+    batch_size = max(1, settings.HISTORY_BATCH_SIZE)
+    histories = {}
+    stale = []
+    missing = []
+
+    # Sort tickers into fresh (served from cache), stale (delta fetch) and missing (full fetch)
+    if cache_enabled:
+        store = get_price_store(interval)
+        fresh = []
+        for ticker in ticker_list:
+            if store.covers(ticker, period):
+                if (time.time() - store.fetched_at(ticker)) < max_age_seconds:
+                    fresh.append(ticker)
+                    continue
+                if settings.INCREMENTAL_FETCH:
+                    stale.append(ticker)
+                    continue
+            missing.append(ticker)
+        # Fresh histories are read from the memory-mapped arrays in one pass per price field
+        histories.update(store.get_many(fresh, period))
+    else:
+        missing = list(ticker_list)
+
+    # Stale histories: download only the bars since the oldest overlap session in each batch
+    for i in range(0, len(stale), batch_size):
+        batch = stale[i:i + batch_size]
+        cached = store.get_many(batch)
+        usable = {ticker: data for ticker, data in cached.items() if len(data) >= 2}
+        missing.extend(ticker for ticker in batch if ticker not in usable)
+        if not usable:
+            continue
+        start = min(data.index[-2] for data in usable.values()).strftime('%Y-%m-%d')
+        frames = _download_batch(list(usable), interval, start=start)
+        for ticker, data in usable.items():
+            stored_period = store.period_of(ticker)
+            merged = merge_delta(data, frames.get(ticker), stored_period) if frames is not None else None
+            if merged is None:
+                missing.append(ticker)
+                continue
+            store.put(ticker, merged, stored_period)
+            histories[ticker] = slice_period(merged, period)
+
+    # Missing histories: full download (widened to CACHE_FETCH_PERIOD when caching)
+    fetch_period = _cache_fetch_period(period, interval) if cache_enabled else period
+    batches = range(0, len(missing), batch_size)
+    for i in tqdm(batches, desc="History Batches", disable=len(batches) < 2):
+        batch = missing[i:i + batch_size]
+        frames = _download_batch(batch, interval, period=fetch_period)
+        if frames is None:
+            continue
+        for ticker in batch:
+            data = frames[ticker]
+            if cache_enabled:
+                store.put(ticker, data, fetch_period)
+            histories[ticker] = slice_period(data, period) if fetch_period != period else data
+
+    if cache_enabled:
+        flush_price_stores()
+    return histories
+
 def _fetch_twelvedata(ticker, interval='1day'):
     """Internal function to fetch data from Twelve Data."""
     # Map interval format if needed (yfinance '1d' vs Twelve Data '1day')
@@ -183,6 +395,7 @@ def _fetch_twelvedata(ticker, interval='1day'):
     
     print(f"Attempting Twelve Data fetch for {ticker} ({output_size} days)...") # Info
     try:
+        acquire(TWELVEDATA_HOST)
         ts = td_client.time_series(
             symbol=ticker,
             interval=td_interval,
@@ -251,7 +464,7 @@ def fetch_ticker_info(ticker):
     # Fetch fresh
     try:
         stock = yf.Ticker(ticker)
-        info = stock.info
+        info = yf_call(lambda: stock.info)
 
         # Save to cache
         if cache_enabled and isinstance(info, dict) and info: # Only cache if valid dict
@@ -266,8 +479,10 @@ def fetch_ticker_info(ticker):
         # print(f"Error fetching .info for {ticker}: {e}")
         return None # Return None, don't cache error
 
-def calculate_indicators(ticker, data):
-    """Calculates technical indicators needed for screening."""
+def calculate_indicators(ticker, data, include_info=True):
+    """Calculates technical indicators needed for screening (per ticker).
+    screen_stocks uses the vectorized compute_indicator_table instead; this function is its reference implementation.
+    Set include_info=False to skip the (slow) Ticker.info fields; add them later with add_info_indicators."""
     # Check data validity *before* calculating indicators
     if data is None or data.empty:
         # print(f"[Indicators] No data provided for {ticker}. Skipping.") # Debug
@@ -309,25 +524,9 @@ def calculate_indicators(ticker, data):
         atr = ta.volatility.AverageTrueRange(data['High'], data['Low'], data['Close'], window=ATR_WINDOW).average_true_range()
         indicators['atr_percent'] = (atr.iloc[-1] / indicators['current_price']) * 100 if indicators['current_price'] > 0 else 0
 
-        # --- Fetch Short Interest Data (from Ticker Info) ---
-        ticker_info = fetch_ticker_info(ticker) # Use cached info fetch
-        indicators['short_interest_pct'] = None
-        indicators['short_ratio'] = None
-        if ticker_info:
-            shares_short = ticker_info.get('sharesShort')
-            float_shares = ticker_info.get('floatShares')
-            short_ratio = ticker_info.get('shortRatio')
-            if shares_short is not None and float_shares is not None and float_shares > 0:
-                indicators['short_interest_pct'] = (shares_short / float_shares) * 100
-            if short_ratio is not None:
-                 indicators['short_ratio'] = short_ratio
-
-            # --- Institutional Ownership ---
-            inst_own_pct = ticker_info.get('heldPercentInstitutions')
-            if inst_own_pct is not None:
-                 indicators['inst_own_pct'] = inst_own_pct * 100 # Store as percentage
-            else:
-                 indicators['inst_own_pct'] = None
+        # --- Short Interest / Institutional Ownership (from Ticker Info) ---
+        if include_info:
+            add_info_indicators(ticker, indicators)
 
         # --- Catalyst Proxy (Recent Price Action) ---
         indicators['catalyst_proxy_flag'] = False
@@ -368,194 +567,298 @@ def calculate_indicators(ticker, data):
         return None
     return indicators
 
-def screen_stocks(ticker_list, timeframe):
-    """Screens a list of tickers for potential short-term price surges based on the selected timeframe."""
-    results = []
-    # Get price limits from settings
-    min_price_limit = settings.min_price_short_term
-    max_price_limit = settings.max_price_short_term
-    print(f"\nScreening {len(ticker_list)} stocks for potential skyrocket candidates...")
-    print(f"  Timeframe: {timeframe}, Price Range: ${min_price_limit:.2f} - ${max_price_limit:.2f}")
-
-    # Use tqdm for progress bar
-    for ticker in tqdm(ticker_list, desc="Screening Progress"):
-        data = fetch_stock_data(ticker, period="3mo")
-        if data is None or data.empty:
-            # Add a small delay even on cache miss/error to prevent hammering API
-            time.sleep(0.05)
-            continue
+def prefilter_universe(listings_df, min_price, max_price):
+    """Drops listed symbols that can't pass the price/volume filters, using the last sale price and
+    volume already present in the NASDAQ listing (no per-ticker requests). Symbols without a quote are kept."""
+    if not all(col in listings_df.columns for col in ['Symbol', 'Last Sale', 'Volume']):
+        print("INFO: NASDAQ listing has no quote columns (re-download it to enable the pre-filter). Skipping pre-filter.")
+        return listings_df['Symbol'].tolist()
+
+    # Widen the price band: the listing's last sale can be a session older than the history we screen
+    tolerance = settings.prefilter_price_tolerance
+    low = min_price * (1 - tolerance)
+    high = max_price * (1 + tolerance)
+    last_sale = listings_df['Last Sale']
+    volume = listings_df['Volume']
+
+    price_ok = last_sale.isna() | last_sale.between(low, high)
+    volume_ok = volume.isna() | (volume >= settings.prefilter_min_volume)
+    kept = listings_df.loc[price_ok & volume_ok, 'Symbol'].tolist()
+    print(f"Pre-filter kept {len(kept)} of {len(listings_df)} listed symbols (last sale ${low:.2f} - ${high:.2f}, volume >= {settings.prefilter_min_volume:,}).")
+    return kept
+
+def add_info_indicators(ticker, indicators):
+    """Adds the Ticker.info based fields (short interest, institutional ownership) to an indicators dict."""
+    # --- Fetch Short Interest Data (from Ticker Info) ---
+    ticker_info = fetch_ticker_info(ticker) # Use cached info fetch
+    indicators['short_interest_pct'] = None
+    indicators['short_ratio'] = None
+    if ticker_info:
+        shares_short = ticker_info.get('sharesShort')
+        float_shares = ticker_info.get('floatShares')
+        short_ratio = ticker_info.get('shortRatio')
+        if shares_short is not None and float_shares is not None and float_shares > 0:
+            indicators['short_interest_pct'] = (shares_short / float_shares) * 100
+        if short_ratio is not None:
+             indicators['short_ratio'] = short_ratio
+
+        # --- Institutional Ownership ---
+        inst_own_pct = ticker_info.get('heldPercentInstitutions')
+        if inst_own_pct is not None:
+             indicators['inst_own_pct'] = inst_own_pct * 100 # Store as percentage
+        else:
+             indicators['inst_own_pct'] = None
+    return indicators
 
-        # Pass ticker to calculate_indicators
-        indicators = calculate_indicators(ticker, data)
-        if indicators is None or pd.isna(indicators.get('current_price')):
-             continue
-
-        # Apply Price Filter using settings
-        current_price = indicators.get('current_price')
-        # Explicitly check for None *before* numerical comparison
-        if current_price is None or pd.isna(current_price):
-            continue # Skip if no price
-        # Now safe to compare
-        if not (min_price_limit <= current_price < max_price_limit):
-            continue
+def _format_column(table, column, fmt):
+    """Formats a numeric indicator column for the results file ('N/A' where missing)."""
+    if column not in table:
+        return pd.Series('N/A', index=table.index)
+    return table[column].map(lambda value: format(value, fmt) if pd.notna(value) else 'N/A')
+
+async def _load_history_async(ticker, prefetched, limits):
+    """Returns a ticker's history, fetching it (and any Twelve Data fallback) in a worker thread
+    while holding the provider's in-flight request slot."""
+    yf_data = prefetched
+    if yf_data is None:
+        async with limits['yfinance']:
+            yf_data = await asyncio.to_thread(_fetch_yfinance_data, ticker, "3mo", "1d")
+    if td_client and (yf_data is None or len(yf_data) < MIN_INDICATOR_LENGTH):
+        async with limits['twelvedata']:
+            return await asyncio.to_thread(_apply_fallback, ticker, yf_data)
+    return yf_data
+
+async def _screen_ticker_async(ticker, prefetched, min_price_limit, max_price_limit, load_info, limits):
+    """Loads one ticker's history and, as soon as it passes the price filter, its ticker info.
+    Returns (history, info) or None if the ticker is filtered out."""
+    data = await _load_history_async(ticker, prefetched, limits)
+    if data is None or data.empty:
+        return None
 
-        # Calculate Score based on timeframe
-        score = 0
-        passing_criteria = [] # Keep track of which criteria passed
-
-        # --- Timeframe-Specific Scoring Logic ---
-        if timeframe == "24_hours":
-            # Weights: Volume Surge (40%), RSI (30%), Breakout (30%)
-            if indicators.get('volume_surge'):
-                score += 40
-                passing_criteria.append("VolumeSurge")
-            # Use RSI extremes (oversold or overbought)
-            rsi_val = indicators.get('rsi')
-            # Add explicit None check
-            if rsi_val is not None and not pd.isna(rsi_val):
-                if rsi_val < RSI_OVERSOLD:
-                    score += 30
-                    passing_criteria.append(f"RSI Oversold ({rsi_val:.1f})")
-                elif rsi_val > RSI_OVERBOUGHT:
-                    score += 30
-                    passing_criteria.append(f"RSI Overbought ({rsi_val:.1f})")
-            if indicators.get('breakout'):
-                score += 30
-                passing_criteria.append("Breakout")
-
-        elif timeframe == "3_days":
-            # Weights: Volume Surge (30%), Breakout (20%), ATR > 5% (25%), RSI > 70 (25%)
-            if indicators.get('volume_surge'):
-                score += 30
-                passing_criteria.append("VolumeSurge")
-            if indicators.get('breakout'):
-                 score += 20
-                 passing_criteria.append("Breakout")
-            atr_pct = indicators.get('atr_percent')
-            # Add explicit None check
-            if atr_pct is not None and not pd.isna(atr_pct) and atr_pct > 5:
-                 score += 25
-                 passing_criteria.append(f"High ATR ({atr_pct:.1f}%)")
-            rsi_val = indicators.get('rsi')
-            # Add explicit None check
-            if rsi_val is not None and not pd.isna(rsi_val) and rsi_val > RSI_OVERBOUGHT:
-                score += 25
-                passing_criteria.append(f"RSI Momentum ({rsi_val:.1f})")
-
-        elif timeframe == "7_days":
-            # Weights: BB Squeeze (35%), Vol Surge (25%), RSI Extremes (25%), Inst Own >5% (15%)
-            if indicators.get('bb_squeeze'):
-                score += 35 # Adjusted weight
-                passing_criteria.append(f"BBSqueeze (W:{indicators.get('bb_width', -1):.3f})")
-            if indicators.get('volume_surge'):
-                score += 25 # Adjusted weight
-                passing_criteria.append("VolumeSurge")
-            rsi_val = indicators.get('rsi')
-            if rsi_val is not None and not pd.isna(rsi_val):
-                if rsi_val < RSI_OVERSOLD:
-                    score += 25 # Adjusted weight
-                    passing_criteria.append(f"RSI Oversold ({rsi_val:.1f})")
-                elif rsi_val > RSI_OVERBOUGHT:
-                    score += 25 # Adjusted weight
-                    passing_criteria.append(f"RSI Overbought ({rsi_val:.1f})")
-            # Institutional Ownership Bonus
-            inst_pct = indicators.get('inst_own_pct')
-            if inst_pct is not None and not pd.isna(inst_pct) and inst_pct > 5:
-                 score += 15
-                 passing_criteria.append(f"InstOwn ({inst_pct:.1f}%)")
-
-        elif timeframe == "2_weeks":
-            # Weights: BB Squeeze (25%), High Short Int (>15%) (25%), Inst Own >5% (15%), Vol Surge (20%), RSI Momentum (15%)
-            if indicators.get('bb_squeeze'):
-                score += 25 # Adjusted weight
-                passing_criteria.append(f"BBSqueeze (W:{indicators.get('bb_width', -1):.3f})")
-            si_pct = indicators.get('short_interest_pct')
-            # Add explicit None check
-            if si_pct is not None and not pd.isna(si_pct) and si_pct > 15:
-                 score += 25 # Adjusted weight
-                 passing_criteria.append(f"HighShortInt ({si_pct:.1f}%)")
-            # Institutional Ownership Bonus
-            inst_pct = indicators.get('inst_own_pct')
-            # Add explicit None check
-            if inst_pct is not None and not pd.isna(inst_pct) and inst_pct > 5:
-                 score += 15
-                 passing_criteria.append(f"InstOwn ({inst_pct:.1f}%)")
-            if indicators.get('volume_surge'):
-                 score += 20
-                 passing_criteria.append("VolumeSurge")
-            rsi_val = indicators.get('rsi')
-            if rsi_val is not None and not pd.isna(rsi_val) and rsi_val > RSI_OVERBOUGHT:
-                score += 15 # Adjusted weight
-                passing_criteria.append(f"RSI Momentum ({rsi_val:.1f})")
-
-        elif timeframe == "1_month":
-            # Weights: Catalyst Proxy (25%), High Short Int (>15%) (25%), Inst Own >5% (15%), Vol Surge (20%), RSI Momentum (15%)
-            if indicators.get('catalyst_proxy_flag'):
-                 score += 25 # Adjusted weight
-                 change_pct = indicators.get('catalyst_proxy_pct_change', 0)
-                 passing_criteria.append(f"CatalystProxy ({change_pct:.1f}% 5d)")
-            si_pct = indicators.get('short_interest_pct')
-            # Add explicit None check
-            if si_pct is not None and not pd.isna(si_pct) and si_pct > 15:
-                 score += 25 # Adjusted weight
-                 passing_criteria.append(f"HighShortInt ({si_pct:.1f}%)")
-             # Institutional Ownership Bonus
-            inst_pct = indicators.get('inst_own_pct')
-            # Add explicit None check
-            if inst_pct is not None and not pd.isna(inst_pct) and inst_pct > 5:
-                 score += 15
-                 passing_criteria.append(f"InstOwn ({inst_pct:.1f}%)")
-            if indicators.get('volume_surge'):
-                 score += 20
-                 passing_criteria.append("VolumeSurge")
-            rsi_val = indicators.get('rsi')
-            if rsi_val is not None and not pd.isna(rsi_val) and rsi_val > RSI_OVERBOUGHT:
-                score += 15 # Adjusted weight
-                passing_criteria.append(f"RSI Momentum ({rsi_val:.1f})")
-
-        # --- End Timeframe-Specific Scoring Logic ---
-
-        if score > 0:
-            # Add new indicators to results
-            results.append({
-                'ticker': ticker,
-                'price': f"{indicators['current_price']:.2f}",
-                'rsi': f"{indicators.get('rsi', 'N/A'):.1f}" if pd.notna(indicators.get('rsi')) else 'N/A',
-                'volume_surge': indicators.get('volume_surge', False),
-                'breakout': indicators.get('breakout', False),
-                'bb_squeeze': indicators.get('bb_squeeze', False),
-                'atr_percent': f"{indicators.get('atr_percent', 'N/A'):.1f}" if pd.notna(indicators.get('atr_percent')) else 'N/A',
-                'short_int_pct': f"{indicators.get('short_interest_pct', 'N/A'):.1f}" if pd.notna(indicators.get('short_interest_pct')) else 'N/A',
-                'short_ratio': f"{indicators.get('short_ratio', 'N/A'):.1f}" if pd.notna(indicators.get('short_ratio')) else 'N/A',
-                'catalyst_proxy': indicators.get('catalyst_proxy_flag', False),
-                'momentum_6m': f"{indicators.get('momentum_6m', 'N/A'):.1f}" if pd.notna(indicators.get('momentum_6m')) else 'N/A',
-                'sharpe_ratio': f"{indicators.get('sharpe_ratio', 'N/A'):.2f}" if pd.notna(indicators.get('sharpe_ratio')) else 'N/A',
-                'inst_own_pct': f"{indicators.get('inst_own_pct', 'N/A'):.1f}" if pd.notna(indicators.get('inst_own_pct')) else 'N/A',
-                'score': score,
-                'criteria': ", ".join(passing_criteria),
+    # Apply Price Filter using settings (on the last close, before any indicator or .info work)
+    current_price = data['Close'].iloc[-1]
+    if current_price is None or pd.isna(current_price):
+        return None # Skip if no price
+    # Now safe to compare
+    if not (min_price_limit <= current_price < max_price_limit):
+        return None
+    if len(data) < MIN_INDICATOR_LENGTH:
+        print(f"Warning [Ticker: {ticker}]: Insufficient data length ({len(data)} found, {MIN_INDICATOR_LENGTH} required) for indicator calculation. Skipping.")
+        return None
+
+    # .info fields only for tickers that passed the price filter
+    info = None
+    if load_info:
+        async with limits['yfinance']:
+            info = await asyncio.to_thread(add_info_indicators, ticker, {})
+    return data, info
+
+async def _screen_tickers_async(ticker_list, histories, min_price_limit, max_price_limit, load_info):
+    """Runs the per-ticker fetch pipeline for every ticker with a bounded number of in-flight requests
+    per provider. Returns the price-passing histories and their ticker info, in ticker_list order."""
+    limits = {
+        'yfinance': asyncio.Semaphore(settings.YFINANCE_MAX_INFLIGHT),
+        'twelvedata': asyncio.Semaphore(settings.TWELVEDATA_MAX_INFLIGHT),
+    }
+    # One pool of worker threads shared by every request (its size matches the in-flight limits)
+    executor = ThreadPoolExecutor(max_workers=settings.YFINANCE_MAX_INFLIGHT + settings.TWELVEDATA_MAX_INFLIGHT)
+    asyncio.get_running_loop().set_default_executor(executor)
+
+    results = await tqdm_asyncio.gather(
+        *[_screen_ticker_async(ticker, histories.get(ticker), min_price_limit, max_price_limit, load_info, limits)
+          for ticker in ticker_list],
+        desc="Loading Histories")
+
+    price_passing = {}
+    info_rows = {}
+    for ticker, result in zip(ticker_list, results):
+        if result is not None:
+            price_passing[ticker], info_rows[ticker] = result
+    return price_passing, info_rows
+
+def _streaming_indicators():
+    """Returns whether indicators are advanced from the persisted streaming state."""
+    return settings.STREAMING_INDICATORS and settings.MAX_CACHE_AGE_DAYS > 0
+
+def _use_indicator_pool(recompute_count):
+    """Returns whether a full indicator recompute of this many tickers is worth spreading across worker processes."""
+    return (settings.INDICATOR_PROCESSES > 1 and recompute_count >= settings.PARALLEL_INDICATOR_MIN_TICKERS
+            and parallel_compute_available())
+
+def compute_indicators(histories, pool=None):
+    """Returns the price-only indicators of a dict of ticker -> history as a DataFrame indexed by ticker.
+    Tickers with a current streaming state are advanced by their new bars only; the rest (all of them
+    without streaming) are recomputed in full, across the worker pool if one was started and they are many."""
+    indicator_args = dict(
+        rsi_window=RSI_WINDOW, bbands_window=BBANDS_WINDOW, atr_window=ATR_WINDOW,
+        volume_avg_days=VOLUME_AVG_DAYS, breakout_days=BREAKOUT_DAYS,
+        volume_surge_factor=VOLUME_SURGE_FACTOR, min_length=MIN_INDICATOR_LENGTH)
+
+    state_store = get_indicator_state_store() if _streaming_indicators() else None
+    recompute = state_store.stale_histories(histories) if state_store is not None else histories
+
+    tables = []
+    remaining = histories
+    if pool is not None and _use_indicator_pool(len(recompute)):
+        # Full recompute split across worker processes (price arrays shared, not copied)
+        print(f"Computing indicators for {len(recompute)} tickers with {settings.INDICATOR_PROCESSES} processes...")
+        tables.append(compute_indicator_table_parallel(recompute, settings.INDICATOR_PROCESSES, executor=pool, **indicator_args))
+        remaining = {ticker: data for ticker, data in histories.items() if ticker not in recompute}
+        if state_store is not None:
+            state_store.seed(recompute)
+
+    if state_store is not None:
+        # Advance each ticker's persisted state by the new bars only (rebuilding any state left stale)
+        tables.append(state_store.indicator_table(remaining))
+        try:
+            state_store.save()
+        except Exception as e:
+            print(f"Error writing indicator state {state_store.path}: {e}")
+    elif len(remaining) > 0:
+        # Full recompute in a few array passes
+        tables.append(compute_indicator_table(remaining, **indicator_args))
+
+    tables = [table for table in tables if not table.empty]
+    if len(tables) == 0:
+        return pd.DataFrame()
+    indicator_table = pd.concat(tables)
+    return indicator_table.loc[[ticker for ticker in histories if ticker in indicator_table.index]]
+
+def load_indicator_table(ticker_list, min_price_limit, max_price_limit, load_info=True):
+    """Loads the histories of a list of tickers and returns the indicators of those priced within
+    [min_price_limit, max_price_limit) as a DataFrame indexed by ticker (one row per ticker)."""
+    # Fork the indicator workers before any download thread starts: a fork copies only the calling thread,
+    # so a lock held by another thread at that moment would never be released in the workers
+    expected_recomputes = len(ticker_list)
+    if _streaming_indicators():
+        known = set(get_indicator_state_store().tickers())
+        expected_recomputes = sum(1 for ticker in ticker_list if ticker not in known)
+    pool = start_indicator_pool(settings.INDICATOR_PROCESSES) if _use_indicator_pool(expected_recomputes) else None
+
+    try:
+        # Load every history up front in batched downloads
+        histories = prefetch_stock_data(ticker_list, period="3mo")
+
+        # Fetch remaining histories and ticker info concurrently
+        price_passing, info_rows = asyncio.run(
+            _screen_tickers_async(ticker_list, histories, min_price_limit, max_price_limit, load_info))
+
+        # Persist bars fetched during this run in one write per partition
+        flush_price_stores()
+
+        # Price-only indicators for every remaining ticker
+        indicator_table = compute_indicators(price_passing, pool)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    if indicator_table.empty:
+        return indicator_table
+    indicator_table = indicator_table[indicator_table['current_price'].notna()]
+
+    # .info fields (loaded alongside the histories)
+    if load_info and not indicator_table.empty:
+        info_table = pd.DataFrame.from_dict(info_rows, orient='index')
+        indicator_table = indicator_table.join(info_table.apply(pd.to_numeric, errors='coerce'))
+
+    return indicator_table
+
+def candidates_filename(timeframe, preset=None):
+    """Returns the results CSV filename of a timeframe (and of a price preset, in sweep mode)."""
+    if preset is None:
+        return f"skyrocket_candidates_{timeframe}.csv"
+    return f"skyrocket_candidates_{preset}_{timeframe}.csv"
+
+def score_candidates(indicator_table, timeframe, output_filename=None):
+    """Scores an indicator table against a timeframe's weighted criteria and saves the tickers with a
+    positive score (sorted by score) to a CSV file. Returns the results DataFrame."""
+    results = pd.DataFrame()
+
+    # Score every ticker at once against the timeframe's weighted criteria
+    if not indicator_table.empty:
+        scores = score_table(indicator_table, SCORING_CRITERIA, SCORING_WEIGHTS[timeframe]['weights'])
+        candidates = indicator_table.join(scores)
+        candidates = candidates[candidates['score'] > 0]
+        if not candidates.empty:
+            results = pd.DataFrame({
+                'ticker': candidates.index,
+                'price': _format_column(candidates, 'current_price', '.2f').values,
+                'rsi': _format_column(candidates, 'rsi', '.1f').values,
+                'volume_surge': candidates['volume_surge'].astype(bool).values,
+                'breakout': candidates['breakout'].astype(bool).values,
+                'bb_squeeze': candidates['bb_squeeze'].astype(bool).values,
+                'atr_percent': _format_column(candidates, 'atr_percent', '.1f').values,
+                'short_int_pct': _format_column(candidates, 'short_interest_pct', '.1f').values,
+                'short_ratio': _format_column(candidates, 'short_ratio', '.1f').values,
+                'catalyst_proxy': candidates['catalyst_proxy_flag'].astype(bool).values,
+                'momentum_6m': _format_column(candidates, 'momentum_6m', '.1f').values,
+                'sharpe_ratio': _format_column(candidates, 'sharpe_ratio', '.2f').values,
+                'inst_own_pct': _format_column(candidates, 'inst_own_pct', '.1f').values,
+                'score': candidates['score'].values,
+                'criteria': candidates['criteria'].values,
                 'timeframe': timeframe
             })
-        # Reduced sleep delay as cache should help
-        time.sleep(0.05)
 
-    # Convert to DataFrame and sort
-    results_df = pd.DataFrame(results)
-    if not results_df.empty:
-        # Define columns order if desired
+    if not results.empty:
+        # Define columns order
         cols = ['ticker', 'price', 'score', 'timeframe', 'criteria', 'rsi', 'volume_surge', 'breakout', 'bb_squeeze', 'atr_percent', 'short_int_pct', 'short_ratio', 'catalyst_proxy', 'momentum_6m', 'sharpe_ratio', 'inst_own_pct']
-        # Ensure all columns exist in the dataframe before selection, adding missing ones as NA
-        for col in cols:
-            if col not in results_df.columns:
-                results_df[col] = pd.NA
-        results_df = results_df.sort_values(by='score', ascending=False)
-        results_df = results_df[cols] # Reorder columns
-        output_filename = f"skyrocket_candidates_{timeframe}.csv"
-        print(f"\nSaving {len(results_df)} potential candidates to {output_filename}")
-        results_df.to_csv(output_filename, index=False)
+        results = results.sort_values(by='score', ascending=False)
+        results = results[cols] # Reorder columns
+        output_filename = output_filename or candidates_filename(timeframe)
+        print(f"\nSaving {len(results)} potential candidates to {output_filename}")
+        results.to_csv(output_filename, index=False)
     else:
-        print("\nNo stocks passed the screening criteria.")
+        print(f"\nNo stocks passed the screening criteria for timeframe {timeframe}.")
+
+    return results
 
-    return results_df
+def screen_timeframes(ticker_list, timeframes):
+    """Screens a list of tickers for several timeframes at once: histories, indicators and ticker info are
+    loaded a single time and every timeframe is scored from the same indicator table.
+    Returns a dict of results DataFrames keyed by timeframe."""
+    # Get price limits from settings
+    min_price_limit = settings.min_price_short_term
+    max_price_limit = settings.max_price_short_term
+    print(f"\nScreening {len(ticker_list)} stocks for potential skyrocket candidates...")
+    print(f"  Timeframe(s): {', '.join(timeframes)}, Price Range: ${min_price_limit:.2f} - ${max_price_limit:.2f}")
+
+    # Only request Ticker.info when some timeframe's criteria use info-based indicators
+    load_info = any('info' in required_sources(timeframe) for timeframe in timeframes)
+    if not load_info:
+        print("  Ticker info not needed for the selected timeframe(s) (short interest / institutional ownership columns will be N/A).")
+
+    indicator_table = load_indicator_table(ticker_list, min_price_limit, max_price_limit, load_info)
+    return {timeframe: score_candidates(indicator_table, timeframe) for timeframe in timeframes}
+
+def screen_presets(ticker_list, presets, timeframes):
+    """Screens a list of tickers for several price presets and timeframes at once. Histories and indicators
+    are loaded a single time over the union of the presets' price ranges; each preset's results are then
+    scored from its slice of the indicator table and saved to its own file per timeframe.
+    Returns a dict of results DataFrames keyed by (preset, timeframe)."""
+    min_price_limit = min(preset['min'] for preset in presets.values())
+    max_price_limit = max(preset['max'] for preset in presets.values())
+    print(f"\nScreening {len(ticker_list)} stocks for potential skyrocket candidates...")
+    print(f"  Presets: {', '.join(presets)}, Timeframe(s): {', '.join(timeframes)}, Union Price Range: ${min_price_limit:.2f} - ${max_price_limit:.2f}")
+
+    # Only request Ticker.info when some timeframe's criteria use info-based indicators
+    load_info = any('info' in required_sources(timeframe) for timeframe in timeframes)
+    indicator_table = load_indicator_table(ticker_list, min_price_limit, max_price_limit, load_info)
+
+    results = {}
+    for name, preset in presets.items():
+        if indicator_table.empty:
+            preset_table = indicator_table
+        else:
+            price = indicator_table['current_price']
+            preset_table = indicator_table[(price >= preset['min']) & (price < preset['max'])]
+        print(f"\nPreset '{name}' (${preset['min']:.2f} - ${preset['max']:.2f}): {len(preset_table)} tickers in range.")
+        for timeframe in timeframes:
+            results[(name, timeframe)] = score_candidates(preset_table, timeframe, candidates_filename(timeframe, name))
+    return results
+
+def screen_stocks(ticker_list, timeframe):
+    """Screens a list of tickers for potential short-term price surges based on the selected timeframe."""
+    return screen_timeframes(ticker_list, [timeframe])[timeframe]
 
 # Example usage (for testing purposes)
 if __name__ == "__main__":
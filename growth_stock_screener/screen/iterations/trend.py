@@ -130,6 +130,7 @@ def fetch_52_week_high(symbol: str) -> float:
     url = f"https://www.cnbc.com/quotes/{symbol}"
 
     try:
+        acquire(url)
         response = requests.get(url)
         high_52_week = extract_float(
             extract_element(high_52_week_xpath, response.content)
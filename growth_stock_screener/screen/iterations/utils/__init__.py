@@ -1,8 +1,15 @@
 from .calculations import *
 from .concurrency import *
+from .indicator_engine import *
+from .indicator_state import *
 from .logs import *
 from .outfiles import *
+from .parallel_indicators import *
+from .price_panel import *
+from .price_store import *
+from .rate_limit import *
 from .scraping import *
+from .scoring import *
 from .sec_requests import *
 from .startup import *
 from .version_checking import *
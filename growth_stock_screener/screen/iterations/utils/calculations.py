@@ -1,5 +1,12 @@
+import numpy as np
 import pandas as pd
 
+# constants
+RS_MIN_DAYS = 252  # trading days a stock must have traded for its relative strength to be calculated
+# trading days before the most recent close of each quarter's start and end price (Q1 start, Q1 end, ..., Q4 end)
+RS_QUARTER_OFFSETS = [251, 189, 188, 126, 125, 63, 62, 0]
+RS_QUARTER_COLUMNS = [f"Q{q} {point}" for q in range(1, 5) for point in ["Start", "End"]]
+
 
 def percent_change(initial: float, final: float) -> float:
     """Calculate the percent change between two positive numbers."""
@@ -29,3 +36,49 @@ def relative_strength(
     q4_change = percent_change(q4_start, q4_end)
 
     return 0.2 * (q1_change) + 0.2 * (q2_change) + 0.2 * (q3_change) + 0.4 * (q4_change)
+
+
+def relative_strength_table(close: pd.DataFrame) -> pd.DataFrame:
+    """Calculate the raw relative strength of every symbol (column) in a panel of daily closes at once.
+
+    Returns a table indexed by symbol with each quarter's start and end prices, "RS (raw)" and a
+    "Status" of "ok", "too young" (traded for less than a year) or "insufficient data"."""
+    values = close.to_numpy(dtype=np.float64)
+    n_days = len(values)
+
+    # a symbol's listing age is measured from its first valid close (the first row if it has none)
+    first_valid = np.argmax(~np.isnan(values), axis=0)
+    too_young = (n_days < RS_MIN_DAYS) | (n_days - first_valid < RS_MIN_DAYS)
+
+    # gather the eight quarter-boundary rows for all symbols (quarter points x symbols)
+    if n_days >= RS_MIN_DAYS:
+        prices = values[n_days - 1 - np.array(RS_QUARTER_OFFSETS)]
+    else:
+        prices = np.full((len(RS_QUARTER_OFFSETS), values.shape[1]), np.nan)
+
+    starts, ends = prices[0::2], prices[1::2]
+    insufficient = ~too_young & (np.isnan(prices).any(axis=0) | (starts == 0).any(axis=0))
+
+    # RS = 0.2(Q1 %Δ) + 0.2(Q2 %Δ) + 0.2(Q3 %Δ) + 0.4(Q4 %Δ)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        changes = 100 * (ends - starts) / starts
+    rs = 0.2 * (changes[0]) + 0.2 * (changes[1]) + 0.2 * (changes[2]) + 0.4 * (changes[3])
+
+    table = pd.DataFrame(prices.T, index=close.columns, columns=RS_QUARTER_COLUMNS)
+    table["RS (raw)"] = np.where(too_young | insufficient, np.nan, rs)
+    table["Status"] = np.select(
+        [too_young, insufficient], ["too young", "insufficient data"], default="ok"
+    )
+
+    return table
+
+
+def trailing_average(panel: pd.DataFrame, days: int) -> pd.Series:
+    """Return the average of every column (symbol) of a (dates x symbols) panel over its last 'days' rows.
+    Columns missing any value in that window get NaN."""
+    window = panel.tail(days)
+
+    if len(window) < days:
+        return pd.Series(np.nan, index=panel.columns)
+
+    return window.mean(skipna=False)
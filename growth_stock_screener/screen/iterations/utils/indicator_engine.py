@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple
+
+# constants
+PANEL_FIELDS = ["Close", "High", "Low", "Volume"]
+TRADING_DAYS = 252
+MOMENTUM_DAYS = 126
+CATALYST_DAYS = 5
+CATALYST_MOVE_PERCENT = 15
+BB_SQUEEZE_WIDTH = 0.05
+
+
+def build_price_panel(
+    histories: Dict[str, pd.DataFrame], fields: List[str] = PANEL_FIELDS
+) -> Tuple[List[str], np.ndarray, Dict[str, np.ndarray]]:
+    """Stack per-ticker OHLCV DataFrames into (tickers x bars) arrays.
+
+    Rows are right-aligned so that the last column holds each ticker's latest bar;
+    shorter histories are padded with NaN on the left. Returns the tickers, the number
+    of bars of each ticker, and one array per field."""
+    tickers = list(histories)
+    lengths = np.array([len(histories[ticker]) for ticker in tickers], dtype=np.int64)
+    width = int(lengths.max()) if len(tickers) > 0 else 0
+
+    panel = {}
+    for field in fields:
+        array = np.full((len(tickers), width), np.nan)
+        for row, ticker in enumerate(tickers):
+            if lengths[row] > 0:
+                array[row, width - lengths[row] :] = histories[ticker][field].to_numpy(
+                    dtype=float
+                )
+        panel[field] = array
+
+    return tickers, lengths, panel
+
+
+def wilder_average(values: np.ndarray, window: int) -> np.ndarray:
+    """Return the last value of an exponential average with alpha = 1 / window for each row,
+    seeded with each row's first non-NaN value (matches pandas' ewm(adjust=False))."""
+    alpha = 1 / window
+    average = np.full(values.shape[0], np.nan)
+
+    for column in values.T:
+        started = ~np.isnan(average)
+        present = ~np.isnan(column)
+        average = np.where(
+            started & present, (1 - alpha) * average + alpha * column, average
+        )
+        average = np.where(~started & present, column, average)
+
+    return average
+
+
+def average_true_range(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, lengths: np.ndarray, window: int
+) -> np.ndarray:
+    """Return the last average true range of each row, seeded with the mean of the first
+    'window' true ranges and smoothed recursively afterwards (matches ta's AverageTrueRange)."""
+    rows, width = close.shape
+    starts = width - lengths
+
+    # true range of each bar (the first bar of a row has no previous close)
+    prev_close = np.concatenate([np.full((rows, 1), np.nan), close[:, :-1]], axis=1)
+    true_range = np.fmax(
+        high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    )
+
+    # seed: mean of each row's first 'window' true ranges
+    cumulative = np.cumsum(np.nan_to_num(true_range), axis=1)
+    seed_columns = np.clip(starts + window - 1, 0, max(width - 1, 0))
+    seed_sums = np.take_along_axis(cumulative, seed_columns[:, None], axis=1)[:, 0]
+    before_start = np.where(
+        starts > 0,
+        np.take_along_axis(cumulative, np.clip(starts - 1, 0, None)[:, None], axis=1)[:, 0],
+        0.0,
+    )
+    atr = (seed_sums - before_start) / window
+
+    for column in range(width):
+        update = column > seed_columns
+        atr = np.where(
+            update, (atr * (window - 1) + true_range[:, column]) / window, atr
+        )
+
+    return np.where(lengths >= window, atr, np.nan)
+
+
+def indicator_columns(
+    panel: Dict[str, np.ndarray],
+    lengths: np.ndarray,
+    rsi_window: int = 14,
+    bbands_window: int = 20,
+    atr_window: int = 14,
+    volume_avg_days: int = 10,
+    breakout_days: int = 20,
+    volume_surge_factor: float = 2,
+) -> Dict[str, np.ndarray]:
+    """Compute the short-term momentum indicators of every row of a right-aligned price panel
+    (see build_price_panel). Returns one array per indicator."""
+    close = panel["Close"]
+    volume = panel["Volume"]
+    price = close[:, -1]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # RSI (Wilder smoothing of gains and losses; a row's first bar counts as no change)
+        diff = np.diff(close, axis=1, prepend=np.nan)
+        present = ~np.isnan(close)
+        gains = np.where(present, np.where(diff > 0, diff, 0.0), np.nan)
+        losses = np.where(present, np.where(diff < 0, -diff, 0.0), np.nan)
+        avg_gain = wilder_average(gains, rsi_window)
+        avg_loss = wilder_average(losses, rsi_window)
+        rsi = np.where(avg_loss == 0, 100, 100 - (100 / (1 + avg_gain / avg_loss)))
+
+        # volume surge (current volume vs. average excluding the current bar)
+        avg_volume = np.nanmean(volume[:, -volume_avg_days:-1], axis=1)
+        volume_surge = (avg_volume > 0) & (volume[:, -1] > volume_surge_factor * avg_volume)
+
+        # breakout above the previous high closes
+        breakout = price > np.nanmax(close[:, -breakout_days:-1], axis=1)
+
+        # Bollinger band width relative to the middle band
+        window_closes = close[:, -bbands_window:]
+        bb_mavg = window_closes.mean(axis=1)
+        bb_std = window_closes.std(axis=1, ddof=0)
+        bb_width = ((bb_mavg + 2 * bb_std) - (bb_mavg - 2 * bb_std)) / bb_mavg
+        bb_squeeze = bb_width < BB_SQUEEZE_WIDTH
+
+        # average true range as a percentage of price
+        atr = average_true_range(panel["High"], panel["Low"], close, lengths, atr_window)
+        atr_percent = np.where(price > 0, atr / price * 100, 0)
+
+        # catalyst proxy (large move over the last few bars)
+        price_then = close[:, -(CATALYST_DAYS + 1)]
+        catalyst_change = (price - price_then) / price_then * 100
+        catalyst_flag = (price_then > 0) & (np.abs(catalyst_change) > CATALYST_MOVE_PERCENT)
+
+        # 6-month momentum and annualized Sharpe ratio of daily returns
+        returns = close[:, 1:] / close[:, :-1] - 1
+        return_counts = np.sum(~np.isnan(returns), axis=1)
+        momentum = np.prod(1 + np.nan_to_num(returns[:, -MOMENTUM_DAYS:]), axis=1) - 1
+        mean_return = np.nanmean(returns, axis=1)
+        std_return = np.nanstd(returns, axis=1, ddof=1)
+        sharpe = np.sqrt(TRADING_DAYS) * mean_return / std_return
+
+    return {
+        "current_price": price,
+        "rsi": rsi,
+        "volume_surge": volume_surge,
+        "breakout": breakout,
+        "bb_squeeze": bb_squeeze,
+        "bb_width": bb_width,
+        "atr_percent": atr_percent,
+        "catalyst_proxy_flag": catalyst_flag,
+        "catalyst_proxy_pct_change": np.where(catalyst_flag, catalyst_change, np.nan),
+        "momentum_6m": np.where(return_counts >= MOMENTUM_DAYS, momentum * 100, np.nan),
+        "sharpe_ratio": np.where((return_counts > 1) & (std_return != 0), sharpe, np.nan),
+    }
+
+
+def compute_indicator_table(
+    histories: Dict[str, pd.DataFrame],
+    rsi_window: int = 14,
+    bbands_window: int = 20,
+    atr_window: int = 14,
+    volume_avg_days: int = 10,
+    breakout_days: int = 20,
+    volume_surge_factor: float = 2,
+    min_length: int = 21,
+) -> pd.DataFrame:
+    """Compute the short-term momentum indicators for many tickers at once.
+
+    Produces the same values as short_term_momentum.calculate_indicators (without the
+    Ticker.info fields), one row per ticker with at least 'min_length' bars."""
+    histories = {
+        ticker: data
+        for ticker, data in histories.items()
+        if (data is not None) and (len(data) >= min_length)
+    }
+    tickers, lengths, panel = build_price_panel(histories)
+
+    if len(tickers) == 0:
+        return pd.DataFrame()
+
+    columns = indicator_columns(
+        panel,
+        lengths,
+        rsi_window=rsi_window,
+        bbands_window=bbands_window,
+        atr_window=atr_window,
+        volume_avg_days=volume_avg_days,
+        breakout_days=breakout_days,
+        volume_surge_factor=volume_surge_factor,
+    )
+    return pd.DataFrame(columns, index=pd.Index(tickers, name="ticker"))
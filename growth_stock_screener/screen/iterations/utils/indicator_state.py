@@ -0,0 +1,414 @@
+import math
+import os
+import pickle
+import time
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .indicator_engine import (
+    BB_SQUEEZE_WIDTH,
+    CATALYST_DAYS,
+    CATALYST_MOVE_PERCENT,
+    MOMENTUM_DAYS,
+    TRADING_DAYS,
+)
+
+# columns of the per-bar state rows
+ROW_CLOSE, ROW_AVG_GAIN, ROW_AVG_LOSS, ROW_ATR, ROW_RANGE_SUM, ROW_RETURN_SUM, ROW_RETURN_SQUARE_SUM = range(7)
+
+
+def next_rows(
+    previous: Optional[List[float]],
+    highs: List[float],
+    lows: List[float],
+    closes: List[float],
+    rsi_alpha: float,
+    atr_alpha: float,
+) -> List[List[float]]:
+    """Advance a per-bar state row through some bars and return the row after each bar.
+
+    Rows hold the close, Wilder averages of gains and losses, an average true range, and running
+    sums of true ranges, returns and squared returns. All averages are seeded at the ticker's first
+    bar, so they follow the same recursion as the averages of any window of bars."""
+    rows = []
+    for high, low, close in zip(highs, lows, closes):
+        if previous is None:
+            # the first bar has no previous close: no price change, true range is high - low
+            true_range = high - low
+            row = [close, 0.0, 0.0, true_range, true_range, 0.0, 0.0]
+        else:
+            last_close, avg_gain, avg_loss, atr, range_sum, return_sum, return_square_sum = previous
+            diff = close - last_close
+            true_range = max(high - low, abs(high - last_close), abs(low - last_close))
+            daily_return = close / last_close - 1
+            row = [
+                close,
+                (1 - rsi_alpha) * avg_gain + rsi_alpha * max(diff, 0.0),
+                (1 - rsi_alpha) * avg_loss + rsi_alpha * max(-diff, 0.0),
+                (1 - atr_alpha) * atr + atr_alpha * true_range,
+                range_sum + true_range,
+                return_sum + daily_return,
+                return_square_sum + daily_return * daily_return,
+            ]
+        rows.append(row)
+        previous = row
+    return rows
+
+
+def panel_rows(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, rsi_alpha: float, atr_alpha: float
+) -> np.ndarray:
+    """Return the state rows (see next_rows) after every bar of right-aligned, NaN-padded price panels
+    (see build_price_panel) as a (tickers x bars x columns) array, advancing all tickers at once."""
+    tickers, width = close.shape
+    rows = np.full((tickers, width, 7), np.nan)
+    previous = np.full((tickers, 7), np.nan)
+    zeros = np.zeros(tickers)
+
+    with np.errstate(invalid="ignore"):
+        for column in range(width):
+            high_now, low_now, close_now = high[:, column], low[:, column], close[:, column]
+            last_close = previous[:, ROW_CLOSE]
+            diff = close_now - last_close
+            true_range = np.maximum(
+                np.maximum(high_now - low_now, np.abs(high_now - last_close)), np.abs(low_now - last_close)
+            )
+            daily_return = close_now / last_close - 1
+            advanced = np.stack(
+                [
+                    close_now,
+                    (1 - rsi_alpha) * previous[:, ROW_AVG_GAIN] + rsi_alpha * np.maximum(diff, 0.0),
+                    (1 - rsi_alpha) * previous[:, ROW_AVG_LOSS] + rsi_alpha * np.maximum(-diff, 0.0),
+                    (1 - atr_alpha) * previous[:, ROW_ATR] + atr_alpha * true_range,
+                    previous[:, ROW_RANGE_SUM] + true_range,
+                    previous[:, ROW_RETURN_SUM] + daily_return,
+                    previous[:, ROW_RETURN_SQUARE_SUM] + daily_return * daily_return,
+                ],
+                axis=1,
+            )
+
+            # a ticker's first bar has no previous close: no price change, true range is high - low
+            first_range = high_now - low_now
+            first = np.stack([close_now, zeros, zeros, first_range, first_range, zeros, zeros], axis=1)
+
+            previous = np.where(np.isnan(last_close)[:, None], first, advanced)
+            rows[:, column] = previous
+
+    return rows
+
+
+def _bar_arrays(data: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Return the dates (as int64 nanoseconds of the tz-naive session date), highs, lows, closes and
+    volumes of a history."""
+    # one array conversion (selecting each column would cost more than the indicators)
+    bars = data.to_numpy(dtype=float)
+    columns = data.columns
+    high, low, close, volume = (bars[:, columns.get_loc(field)] for field in ["High", "Low", "Close", "Volume"])
+
+    # fresh downloads are tz-aware and fallback providers may use another unit, unlike the stored bars
+    index = data.index
+    if (getattr(index, "tz", None) is not None) or (index.dtype != "datetime64[ns]"):
+        index = pd.DatetimeIndex(index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        index = index.as_unit("ns")
+    return index.asi8, high, low, close, volume
+
+
+class TickerState:
+    """Streaming indicator state of one ticker: the dates and state rows (see next_rows) of its recent
+    committed bars."""
+
+    def __init__(self, config: Dict[str, float], dates: np.ndarray, rows: np.ndarray):
+        self.config = config
+        self.dates = dates
+        self.rows = rows
+        self.used_at = time.time()
+
+    def advance(self, dates: np.ndarray, highs: np.ndarray, lows: np.ndarray, closes: np.ndarray, keep: int) -> None:
+        """Commit some new bars, keeping the rows of the last 'keep' bars."""
+        if len(dates) == 0:
+            return
+
+        rows = next_rows(
+            self.rows[-1].tolist(),
+            highs.tolist(),
+            lows.tolist(),
+            closes.tolist(),
+            1 / self.config["rsi_window"],
+            1 / self.config["atr_window"],
+        )
+        self.dates = np.concatenate([self.dates, dates])[-keep:]
+        self.rows = np.concatenate([self.rows, np.array(rows)])[-keep:]
+
+    def indicators(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray) -> Dict[str, float]:
+        """Return the indicators of a history whose bars except the last are the state's last committed bars
+        (same keys and values as compute_indicator_table)."""
+        config = self.config
+        length = len(close)
+        price = float(close[-1])
+        rsi_decay = 1 - 1 / config["rsi_window"]
+        atr_window = config["atr_window"]
+
+        # rows of the window's first bar and of the latest bar
+        first = self.rows[-(length - 1)].tolist()
+        latest = next_rows(
+            self.rows[-1].tolist(), [float(high[-1])], [float(low[-1])], [price], 1 - rsi_decay, 1 / atr_window
+        )[0]
+
+        # RSI: remove the part of the running averages carried over from before the window
+        decay = rsi_decay ** (length - 1)
+        avg_gain = latest[ROW_AVG_GAIN] - decay * first[ROW_AVG_GAIN]
+        avg_loss = latest[ROW_AVG_LOSS] - decay * first[ROW_AVG_LOSS]
+        rsi = 100.0 if avg_loss == 0 else 100 - (100 / (1 + avg_gain / avg_loss))
+
+        # ATR seeded with the mean of the window's first 'atr_window' true ranges
+        atr = math.nan
+        if length >= atr_window:
+            seed = latest if length == atr_window else self.rows[atr_window - length].tolist()
+            seed_atr = (float(high[0] - low[0]) + seed[ROW_RANGE_SUM] - first[ROW_RANGE_SUM]) / atr_window
+            atr = latest[ROW_ATR] + (1 - 1 / atr_window) ** (length - atr_window) * (seed_atr - seed[ROW_ATR])
+
+        volumes = volume[-config["volume_avg_days"] :].tolist()
+        prior_volumes = volumes[:-1]
+        avg_volume = sum(prior_volumes) / len(prior_volumes)
+        volume_surge = avg_volume > 0 and volumes[-1] > config["volume_surge_factor"] * avg_volume
+
+        closes = close[-max(config["breakout_days"], config["bbands_window"], CATALYST_DAYS + 1) :].tolist()
+        breakout = price > max(closes[-config["breakout_days"] : -1])
+
+        window_closes = closes[-config["bbands_window"] :]
+        bb_mavg = sum(window_closes) / len(window_closes)
+        bb_std = math.sqrt(sum((value - bb_mavg) ** 2 for value in window_closes) / len(window_closes))
+        bb_width = ((bb_mavg + 2 * bb_std) - (bb_mavg - 2 * bb_std)) / bb_mavg
+
+        atr_percent = (atr / price * 100) if price > 0 else 0
+
+        price_then = closes[-(CATALYST_DAYS + 1)]
+        catalyst_change = (price - price_then) / price_then * 100 if price_then > 0 else math.nan
+        catalyst_flag = price_then > 0 and abs(catalyst_change) > CATALYST_MOVE_PERCENT
+
+        momentum = math.nan
+        if length - 1 >= MOMENTUM_DAYS:
+            momentum = (price / float(close[-(MOMENTUM_DAYS + 1)]) - 1) * 100
+
+        # Sharpe ratio of the window's returns
+        sharpe = math.nan
+        count = length - 1
+        if count > 1:
+            mean = (latest[ROW_RETURN_SUM] - first[ROW_RETURN_SUM]) / count
+            square_sum = latest[ROW_RETURN_SQUARE_SUM] - first[ROW_RETURN_SQUARE_SUM]
+            variance = max(square_sum - count * mean * mean, 0.0) / (count - 1)
+            if variance > 0:
+                sharpe = math.sqrt(TRADING_DAYS) * mean / math.sqrt(variance)
+
+        return {
+            "current_price": price,
+            "rsi": rsi,
+            "volume_surge": volume_surge,
+            "breakout": breakout,
+            "bb_squeeze": bb_width < BB_SQUEEZE_WIDTH,
+            "bb_width": bb_width,
+            "atr_percent": atr_percent,
+            "catalyst_proxy_flag": catalyst_flag,
+            "catalyst_proxy_pct_change": catalyst_change if catalyst_flag else math.nan,
+            "momentum_6m": momentum,
+            "sharpe_ratio": sharpe,
+        }
+
+
+class IndicatorStateStore:
+    """Persisted streaming indicator states for many tickers.
+
+    Each state is committed through a ticker's second-to-last bar; the latest bar (which may be
+    a partial intraday bar) is only applied when indicators are requested. New bars advance the
+    committed state in constant work per bar, and the indicators of the history passed (a window
+    which slides as bars are added) are derived from the rows at its first and last bars. If the
+    stored bars were revised (e.g. by a split or dividend adjustment), or the history reaches back
+    further than the kept rows, the state is rebuilt from the full history. States which haven't
+    been used for 'max_idle_days' are dropped when saving."""
+
+    def __init__(
+        self,
+        path: str,
+        rsi_window: int = 14,
+        bbands_window: int = 20,
+        atr_window: int = 14,
+        volume_avg_days: int = 10,
+        breakout_days: int = 20,
+        volume_surge_factor: float = 2,
+        min_length: int = 21,
+        window_bars: int = 130,
+        max_idle_days: float = 7,
+    ):
+        self.path = path
+        self.min_length = min_length
+        self.window_bars = window_bars
+        self.max_idle_days = max_idle_days
+        self.config = {
+            "rsi_window": rsi_window,
+            "bbands_window": bbands_window,
+            "atr_window": atr_window,
+            "volume_avg_days": volume_avg_days,
+            "breakout_days": breakout_days,
+            "volume_surge_factor": volume_surge_factor,
+        }
+        self._states: Dict[str, TickerState] = {}
+        self._loaded = False
+
+    def load(self) -> None:
+        """Read the persisted states (only the first call touches the disk)."""
+        if self._loaded:
+            return
+
+        self._loaded = True
+
+        if not os.path.exists(self.path):
+            return
+
+        try:
+            with open(self.path, "rb") as f:
+                states = pickle.load(f)
+        except Exception as e:
+            print(f"Error reading indicator state {self.path}: {e}. Rebuilding.")
+            return
+
+        # states computed with different indicator windows (or by an older layout) can't be advanced
+        self._states = {
+            ticker: state
+            for ticker, state in states.items()
+            if getattr(state, "config", None) == self.config and hasattr(state, "rows")
+        }
+
+    def tickers(self) -> List[str]:
+        """Return the tickers which have a committed state."""
+        self.load()
+        return list(self._states)
+
+    def save(self) -> None:
+        """Atomically write the states used within the last 'max_idle_days' to disk."""
+        self.load()
+        oldest = time.time() - self.max_idle_days * 24 * 60 * 60
+        self._states = {
+            ticker: state for ticker, state in self._states.items() if state.used_at >= oldest
+        }
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(self._states, f)
+        os.replace(tmp_path, self.path)
+
+    def _committed_position(self, state: TickerState, dates: np.ndarray, close: np.ndarray) -> int:
+        """Return the position in a history of a state's last committed bar, or -1 if the state isn't
+        consistent with the history or doesn't keep the rows of all its bars."""
+        position = int(np.searchsorted(dates, state.dates[-1]))
+        if (position >= len(dates) - 1) or (dates[position] != state.dates[-1]):
+            return -1
+
+        # the window must start at a kept bar
+        if (position >= len(state.dates)) or (state.dates[-(position + 1)] != dates[0]):
+            return -1
+
+        if not math.isclose(close[position], state.rows[-1, ROW_CLOSE], rel_tol=1e-9):
+            return -1
+
+        return position
+
+    def _position(self, ticker: str, dates: np.ndarray, close: np.ndarray) -> int:
+        """Return the position in a history of a ticker's last committed bar, or -1 if it needs a full recompute."""
+        state = self._states.get(ticker)
+        return -1 if state is None else self._committed_position(state, dates, close)
+
+    def stale_histories(self, histories: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """Return the histories (of at least 'min_length' bars) whose ticker has no committed state which
+        can be advanced to them, i.e. which need a full recompute."""
+        self.load()
+        stale = {}
+        for ticker, data in histories.items():
+            if (data is None) or (len(data) < self.min_length):
+                continue
+
+            dates, _, _, close, _ = _bar_arrays(data)
+            if self._position(ticker, dates, close) < 0:
+                stale[ticker] = data
+
+        return stale
+
+    def seed(self, histories: Dict[str, pd.DataFrame]) -> None:
+        """Rebuild the committed states of many tickers from their full histories in one pass over a
+        price panel."""
+        self.load()
+        self._seed_bars(
+            {
+                ticker: _bar_arrays(data)
+                for ticker, data in histories.items()
+                if (data is not None) and (len(data) >= self.min_length)
+            }
+        )
+
+    def _seed_bars(self, bars: Dict[str, Tuple[np.ndarray, ...]]) -> None:
+        """seed() for histories already converted by _bar_arrays."""
+        if len(bars) == 0:
+            return
+
+        # right-aligned panels of every bar but the latest (which is never committed)
+        width = max(len(dates) for dates, *_ in bars.values()) - 1
+        panel = np.full((3, len(bars), width), np.nan)
+        for row, (_, high, low, close, _) in enumerate(bars.values()):
+            length = len(close) - 1
+            panel[:, row, width - length :] = high[:-1], low[:-1], close[:-1]
+
+        rows = panel_rows(*panel, 1 / self.config["rsi_window"], 1 / self.config["atr_window"])
+
+        for (ticker, (dates, *_)), ticker_rows in zip(bars.items(), rows):
+            keep = max(self.window_bars, len(dates) - 1)
+            committed = ticker_rows[width - (len(dates) - 1) :]
+            self._states[ticker] = TickerState(self.config, dates[:-1][-keep:], committed[-keep:].copy())
+
+    def indicators(self, ticker: str, data: pd.DataFrame) -> Dict[str, float]:
+        """Return the indicators of a ticker's history, updating its committed state
+        incrementally (or rebuilding it if the history was revised)."""
+        self.load()
+
+        if (data is None) or (len(data) < self.min_length):
+            return None
+
+        return self._indicators(ticker, _bar_arrays(data))
+
+    def _indicators(self, ticker: str, bars: Tuple[np.ndarray, ...]) -> Dict[str, float]:
+        """indicators() for a history already converted by _bar_arrays."""
+        dates, high, low, close, volume = bars
+        last = len(dates) - 1
+
+        position = self._position(ticker, dates, close)
+        if position < 0:
+            self._seed_bars({ticker: bars})
+            position = last - 1
+
+        state = self._states[ticker]
+        new = slice(position + 1, last)
+        state.advance(dates[new], high[new], low[new], close[new], max(self.window_bars, last))
+        state.used_at = time.time()
+        return state.indicators(high, low, close, volume)
+
+    def indicator_table(self, histories: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+        """Return the indicators of many tickers as a DataFrame (one row per ticker, like compute_indicator_table)."""
+        self.load()
+        bars = {
+            ticker: _bar_arrays(data)
+            for ticker, data in histories.items()
+            if (data is not None) and (len(data) >= self.min_length)
+        }
+
+        # rebuild every state which can't be advanced in one pass
+        self._seed_bars(
+            {ticker: arrays for ticker, arrays in bars.items() if self._position(ticker, arrays[0], arrays[3]) < 0}
+        )
+
+        rows = {ticker: self._indicators(ticker, arrays) for ticker, arrays in bars.items()}
+        if len(rows) == 0:
+            return pd.DataFrame()
+
+        table = pd.DataFrame.from_dict(rows, orient="index")
+        table.index.name = "ticker"
+        return table
@@ -0,0 +1,132 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Tuple
+import numpy as np
+import pandas as pd
+from .indicator_engine import PANEL_FIELDS, build_price_panel, indicator_columns
+
+
+def parallel_compute_available() -> bool:
+    """Return whether worker processes can be forked (spawned workers would re-run the calling script)."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def start_indicator_pool(processes: int) -> ProcessPoolExecutor:
+    """Fork a pool of indicator worker processes right away.
+
+    Forking copies only the calling thread, so a lock held by any other thread at that moment
+    (e.g. inside a download thread pool) stays locked forever in the workers. Callers start the
+    pool before their download threads, and pass it to compute_indicator_table_parallel."""
+    # forked workers share the parent's resource tracker, which must exist before they are forked
+    resource_tracker.ensure_running()
+    executor = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("fork"))
+    # fork workers are all started with the first task
+    executor.submit(int).result()
+    return executor
+
+
+def _write_panel(
+    block: shared_memory.SharedMemory, shape: Tuple[int, int, int], panel: Dict[str, np.ndarray]
+) -> None:
+    """Copy a price panel into a shared (fields x tickers x bars) block."""
+    prices = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    for i, field in enumerate(PANEL_FIELDS):
+        prices[i] = panel[field]
+
+
+def _slice_indicators(
+    block: shared_memory.SharedMemory,
+    shape: Tuple[int, int, int],
+    start: int,
+    stop: int,
+    lengths: np.ndarray,
+    config: Dict,
+) -> Dict[str, np.ndarray]:
+    """Compute the indicators of a slice of rows of a shared price panel."""
+    prices = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    panel = {field: prices[i, start:stop] for i, field in enumerate(PANEL_FIELDS)}
+    columns = indicator_columns(panel, lengths, **config)
+    # results are compact copies (one value per ticker), never views of the shared block
+    return {column: np.array(values) for column, values in columns.items()}
+
+
+def _indicator_worker(
+    name: str, shape: Tuple[int, int, int], start: int, stop: int, lengths: np.ndarray, config: Dict
+) -> Dict[str, np.ndarray]:
+    """Compute the indicators of rows [start, stop) of a shared (fields x tickers x bars) price panel."""
+    # forked workers share the parent's resource tracker, so attaching doesn't take ownership of the block
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        return _slice_indicators(block, shape, start, stop, lengths, config)
+    finally:
+        block.close()
+
+
+def compute_indicator_table_parallel(
+    histories: Dict[str, pd.DataFrame],
+    processes: int,
+    rsi_window: int = 14,
+    bbands_window: int = 20,
+    atr_window: int = 14,
+    volume_avg_days: int = 10,
+    breakout_days: int = 20,
+    volume_surge_factor: float = 2,
+    min_length: int = 21,
+    executor: ProcessPoolExecutor = None,
+) -> pd.DataFrame:
+    """Compute the same table as compute_indicator_table with a pool of worker processes.
+
+    The price panel is written once into shared memory; each worker maps it without copying,
+    computes the indicators of a slice of tickers and returns one value per ticker and indicator.
+    Pass a pool from start_indicator_pool if the calling process runs other threads; otherwise
+    a pool is forked for this call."""
+    histories = {
+        ticker: data
+        for ticker, data in histories.items()
+        if (data is not None) and (len(data) >= min_length)
+    }
+    tickers, lengths, panel = build_price_panel(histories)
+
+    if len(tickers) == 0:
+        return pd.DataFrame()
+
+    config = {
+        "rsi_window": rsi_window,
+        "bbands_window": bbands_window,
+        "atr_window": atr_window,
+        "volume_avg_days": volume_avg_days,
+        "breakout_days": breakout_days,
+        "volume_surge_factor": volume_surge_factor,
+    }
+    shape = (len(PANEL_FIELDS), *panel["Close"].shape)
+    block = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+
+    try:
+        _write_panel(block, shape, panel)
+        del panel
+
+        processes = max(1, min(processes, len(tickers)))
+        bounds = np.linspace(0, len(tickers), processes + 1, dtype=int)
+        own_executor = executor is None
+        if own_executor:
+            executor = start_indicator_pool(processes)
+
+        try:
+            futures = [
+                executor.submit(
+                    _indicator_worker, block.name, shape, start, stop, lengths[start:stop], config
+                )
+                for start, stop in zip(bounds[:-1], bounds[1:])
+                if stop > start
+            ]
+            parts = [future.result() for future in futures]
+        finally:
+            if own_executor:
+                executor.shutdown()
+    finally:
+        block.close()
+        block.unlink()
+
+    columns = {column: np.concatenate([part[column] for part in parts]) for column in parts[0]}
+    return pd.DataFrame(columns, index=pd.Index(tickers, name="ticker"))
@@ -0,0 +1,102 @@
+import os
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+from .price_store import PRICE_FIELDS, PriceStore, merge_delta
+from .scraping import yf_download_batches
+from ...settings import PRICE_PANEL_BATCH_SIZE, PRICE_PANEL_MAX_AGE_DAYS
+
+# constants
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+PRICE_PANEL_DIR = os.path.abspath(os.path.join(UTILS_DIR, "..", "..", "..", "cache"))
+PANEL_PERIOD = "2y"  # bars kept for the relative strength ranking
+PANEL_INTERVAL = "1d"
+PANEL_PARTITION = f"panel_{PANEL_INTERVAL}"  # kept apart from the momentum screen's prices_1d cache in the same directory
+BAR_FIELDS = PRICE_FIELDS + ["Dividends", "Stock Splits"]  # splits and dividends reveal revised histories
+
+
+def download_bars(symbols: List[str], timeout: int, **download_args) -> Dict[str, pd.DataFrame]:
+    """Download the daily bars (OHLCV with dividends and splits) of many symbols in concurrent yf.download batches.
+    Returns a dict of symbol -> DataFrame (empty if the symbol had no bars); symbols of failed batches are left out."""
+    if len(symbols) == 0:
+        return {}
+
+    # bars are stored with full precision, since delta merges compare stored and newly downloaded closes
+    panel = yf_download_batches(
+        PRICE_PANEL_BATCH_SIZE,
+        symbols,
+        timeout,
+        fields=BAR_FIELDS,
+        dtype=np.float64,
+        interval=PANEL_INTERVAL,
+        auto_adjust=True,
+        actions=True,
+        **download_args,
+    )
+
+    bars = {}
+    for symbol in panel["Close"].columns:
+        data = pd.DataFrame({field: panel[field][symbol] for field in BAR_FIELDS})
+        bars[symbol] = data.dropna(how="all", subset=PRICE_FIELDS)
+
+    return bars
+
+
+def update_price_panel(
+    store: PriceStore,
+    symbols: List[str],
+    timeout: int,
+    period: str = PANEL_PERIOD,
+    max_age_days: float = PRICE_PANEL_MAX_AGE_DAYS,
+) -> None:
+    """Bring the stored bars of symbols up to date and write them to disk.
+
+    Stale symbols are extended with the sessions since their last stored bar. Symbols which aren't
+    stored yet (new listings), or whose history was revised by a split or dividend, are backfilled
+    with a full download, and stored symbols which are no longer listed are removed (only those stored
+    with this period, so bars other stages keep in the same store are left alone)."""
+    max_age_seconds = max_age_days * 24 * 60 * 60
+    listed = set(symbols)
+    stale = []
+    missing = []
+
+    for symbol in symbols:
+        if store.covers(symbol, period):
+            if (time.time() - store.fetched_at(symbol)) >= max_age_seconds:
+                stale.append(symbol)
+        else:
+            missing.append(symbol)
+
+    # delisted symbols
+    store.remove(
+        [
+            symbol
+            for symbol in store.symbols()
+            if (symbol not in listed) and (store.period_of(symbol) == period)
+        ]
+    )
+
+    # stale symbols: download only the sessions since the oldest overlap session
+    usable = {symbol: data for symbol, data in store.get_many(stale).items() if len(data) >= 2}
+    missing.extend(symbol for symbol in stale if symbol not in usable)
+
+    if len(usable) > 0:
+        start = min(data.index[-2] for data in usable.values()).strftime("%Y-%m-%d")
+        bars = download_bars(list(usable), timeout, start=start)
+
+        for symbol, data in usable.items():
+            merged = merge_delta(data, bars.get(symbol), period)
+
+            if merged is None:
+                missing.append(symbol)
+                continue
+
+            store.put(symbol, merged, period)
+
+    # new listings and revised histories: full download
+    bars = download_bars(missing, timeout, period=period)
+    for symbol, data in bars.items():
+        store.put(symbol, data, period)
+
+    store.flush()
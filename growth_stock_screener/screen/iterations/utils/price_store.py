@@ -0,0 +1,444 @@
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+# constants
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+AUTOFLUSH_SIZE = 500  # number of newly staged symbols which are appended to disk as a segment at a time
+SEGMENT_PATTERN = re.compile(r"segment_(\d+)\.npz")
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+
+def period_start(period: str, now: pd.Timestamp = None) -> pd.Timestamp:
+    """Return the first date covered by a yfinance-style period string (None for "max" or unknown periods)."""
+    now = pd.Timestamp.now().normalize() if now is None else now
+
+    if period == "ytd":
+        return pd.Timestamp(year=now.year, month=1, day=1)
+
+    if period not in PERIOD_OFFSETS:
+        return None
+
+    return now - PERIOD_OFFSETS[period]
+
+
+def slice_period(data: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Return the bars of a DataFrame which fall within the trailing window of a period."""
+    start = None if (period is None) else period_start(period)
+
+    if start is None:
+        return data
+
+    # compare in the index's own timezone (yfinance returns tz-aware bars)
+    if getattr(data.index, "tz", None) is not None:
+        start = start.tz_localize(data.index.tz)
+
+    return data[data.index >= start]
+
+
+def merge_delta(cached: pd.DataFrame, new_data: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Merge newly downloaded bars onto cached bars, starting at the cached second-to-last session.
+    Returns None if the new bars can't be appended (missing data, or splits/dividends revised history)."""
+    overlap_date = cached.index[-2]
+    if (
+        new_data is None
+        or new_data.empty
+        or not all(column in new_data.columns for column in PRICE_FIELDS)
+    ):
+        return None
+    if new_data.index.tz is not None:
+        new_data = new_data.copy()
+        new_data.index = new_data.index.tz_localize(None)
+    new_data = new_data[new_data.index >= overlap_date]
+
+    # splits or dividends rewrite the whole adjusted series, so the stored bars can't be reused
+    for action_column in ["Dividends", "Stock Splits"]:
+        if (action_column in new_data.columns) and (new_data[action_column].fillna(0) != 0).any():
+            return None
+    if overlap_date not in new_data.index:
+        return None
+    if not np.isclose(new_data.at[overlap_date, "Close"], cached.at[overlap_date, "Close"], rtol=1e-4):
+        return None
+
+    # keep cached bars before the overlap and take everything from the overlap onward from the new bars
+    merged = pd.concat([cached[cached.index < overlap_date], new_data[PRICE_FIELDS]])
+    # trim to the stored period so the window stays the same length as a full fetch
+    return slice_period(merged, period)
+
+
+class PriceStore:
+    """Columnar on-disk store of OHLCV bars for many symbols.
+
+    Each partition is a directory holding one memory-mappable .npy array per price field
+    (shape: symbols x dates), the shared date axis, and a JSON index of symbols, fetch times
+    and the period each symbol's bars cover. A symbol stored with a long period can serve
+    requests for any shorter period. A store may be shared by several fetcher threads.
+
+    Staged bars are appended to small segment files as they accumulate, and the partition itself
+    is only rewritten by flush (segments left by an interrupted run are merged by the next flush).
+    """
+
+    def __init__(self, root: str, partition: str):
+        self.path = os.path.join(root, f"prices_{partition}")
+        self._loaded = False
+        self._symbols: Dict[str, int] = {}
+        self._fetched: Dict[str, float] = {}
+        self._periods: Dict[str, str] = {}
+        self._dates = np.array([], dtype="datetime64[ns]")
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._pending: Dict[str, pd.DataFrame] = {}
+        self._unsaved: List[str] = []  # staged symbols not yet written to a segment
+        self._next_segment = 0
+        self._removed = set()
+        self._lock = threading.RLock()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def _reset(self) -> None:
+        self._symbols = {}
+        self._fetched = {}
+        self._periods = {}
+        self._dates = np.array([], dtype="datetime64[ns]")
+        self._arrays = {field: np.empty((0, 0)) for field in PRICE_FIELDS}
+
+    def load(self) -> None:
+        """Memory-map every array in the partition (only the first call touches the disk)."""
+        with self._lock:
+            if self._loaded:
+                return
+
+            self._loaded = True
+            self._reset()
+            self._load_arrays()
+            self._load_segments()
+
+    def _load_arrays(self) -> None:
+        if not os.path.exists(self._file("index.json")):
+            return
+
+        try:
+            with open(self._file("index.json"), "r") as f:
+                index = json.load(f)
+
+            dates = np.load(self._file("dates.npy"), mmap_mode="r")
+            arrays = {
+                field: np.load(self._file(f"{field.lower()}.npy"), mmap_mode="r")
+                for field in PRICE_FIELDS
+            }
+
+            # discard partitions left inconsistent by an interrupted write
+            shape = (len(index["symbols"]), len(dates))
+            if any(array.shape != shape for array in arrays.values()):
+                raise ValueError("array shapes do not match the index")
+        except Exception as e:
+            print(f"Error reading price store {self.path}: {e}. Rebuilding.")
+            return
+
+        self._symbols = {symbol: i for i, symbol in enumerate(index["symbols"])}
+        self._fetched = index["fetched"]
+        self._periods = index["periods"]
+        self._dates = dates
+        self._arrays = arrays
+
+    def _segment_files(self) -> List[str]:
+        try:
+            names = os.listdir(self.path)
+        except OSError:
+            return []
+
+        segments = [name for name in names if SEGMENT_PATTERN.fullmatch(name)]
+        return sorted(segments, key=lambda name: int(SEGMENT_PATTERN.fullmatch(name).group(1)))
+
+    def _load_segments(self) -> None:
+        """Stage the bars of segments which weren't merged into the partition yet (later segments win)."""
+        for name in self._segment_files():
+            self._next_segment = max(self._next_segment, int(SEGMENT_PATTERN.fullmatch(name).group(1)) + 1)
+
+            try:
+                with np.load(self._file(name)) as segment:
+                    meta = json.loads(str(segment["meta"]))
+                    dates = segment["dates"]
+                    values = np.stack([segment[field.lower()] for field in PRICE_FIELDS], axis=-1)
+            except Exception as e:
+                print(f"Error reading price store segment {name}: {e}. Skipping.")
+                continue
+
+            present = ~np.isnan(values).all(axis=2)
+            for row, symbol in enumerate(meta["symbols"]):
+                self._pending[symbol] = pd.DataFrame(
+                    values[row, present[row]],
+                    index=pd.DatetimeIndex(dates[present[row]], name="Date"),
+                    columns=PRICE_FIELDS,
+                )
+                self._fetched[symbol] = meta["fetched"][row]
+                self._periods[symbol] = meta["periods"][row]
+
+    def symbols(self) -> List[str]:
+        """Return every symbol with stored (or staged) bars."""
+        self.load()
+        return list(self._symbols) + [s for s in self._pending if s not in self._symbols]
+
+    def fetched_at(self, symbol: str) -> float:
+        """Return the UNIX time at which a symbol's bars were stored, or None if the symbol is unknown."""
+        self.load()
+        return self._fetched.get(symbol)
+
+    def period_of(self, symbol: str) -> str:
+        """Return the period covered by a symbol's stored bars, or None if the symbol is unknown."""
+        self.load()
+        return self._periods.get(symbol)
+
+    def covers(self, symbol: str, period: str) -> bool:
+        """Return whether a symbol's stored bars span at least the given period."""
+        stored_period = self.period_of(symbol)
+
+        if stored_period is None:
+            return False
+
+        stored_start = period_start(stored_period)
+        if stored_start is None:
+            return True  # "max" covers everything
+
+        requested_start = period_start(period)
+        return (requested_start is not None) and (stored_start <= requested_start)
+
+    def get(self, symbol: str, period: str = None) -> pd.DataFrame:
+        """Return the stored bars of a symbol as an OHLCV DataFrame, or None if the symbol is unknown.
+        Passing a period slices the bars down to that trailing window."""
+        with self._lock:
+            self.load()
+
+            if symbol in self._pending:
+                return slice_period(self._pending[symbol].copy(), period)
+
+            if symbol not in self._symbols:
+                return None
+
+            row = self._symbols[symbol]
+            values = np.column_stack([self._arrays[field][row] for field in PRICE_FIELDS])
+            present = ~np.isnan(values).all(axis=1)
+
+            data = pd.DataFrame(
+                values[present],
+                index=pd.DatetimeIndex(self._dates[present], name="Date"),
+                columns=PRICE_FIELDS,
+            )
+            return slice_period(data, period)
+
+    def get_many(self, symbols: List[str], period: str = None) -> Dict[str, pd.DataFrame]:
+        """Return the stored bars of many symbols (as get would), reading each price field of all of them
+        from the memory-mapped arrays at once. Unknown symbols are left out."""
+        with self._lock:
+            self.load()
+
+            stored = [s for s in symbols if (s in self._symbols) and (s not in self._pending)]
+            bars = {}
+
+            if stored:
+                dates = np.asarray(self._dates)
+                start = None if (period is None) else period_start(period)
+                first = 0 if (start is None) else np.searchsorted(dates, start.to_datetime64())
+                rows = [self._symbols[s] for s in stored]
+
+                # (symbols x dates x fields), only copying the columns within the period
+                values = np.stack(
+                    [np.asarray(self._arrays[field])[:, first:][rows] for field in PRICE_FIELDS], axis=-1
+                )
+                present = ~np.isnan(values).all(axis=2)
+                # symbols with a bar on every date share one index (frames are views of the block)
+                index = pd.DatetimeIndex(dates[first:], name="Date")
+                columns = pd.Index(PRICE_FIELDS)
+
+                for row, symbol in enumerate(stored):
+                    if present[row].all():
+                        bars[symbol] = pd.DataFrame(values[row], index=index, columns=columns, copy=False)
+                    else:
+                        bars[symbol] = pd.DataFrame(
+                            values[row, present[row]], index=index[present[row]], columns=columns
+                        )
+
+            for symbol in symbols:
+                if symbol in self._pending:
+                    bars[symbol] = slice_period(self._pending[symbol].copy(), period)
+
+            return {symbol: bars[symbol] for symbol in symbols if symbol in bars}
+
+    def panel(self, symbols: List[str], field: str = "Close", period: str = None) -> pd.DataFrame:
+        """Return one price field of many symbols as a (dates x symbols) DataFrame read straight from the
+        memory-mapped arrays. Unknown symbols get all-NaN columns; dates without any bar are dropped."""
+        with self._lock:
+            self.load()
+
+            stored = [s for s in symbols if (s in self._symbols) and (s not in self._pending)]
+            rows = [self._symbols[s] for s in stored]
+            values = np.asarray(self._arrays[field])[rows] if rows else np.empty((0, len(self._dates)))
+
+            data = pd.DataFrame(
+                values.T, index=pd.DatetimeIndex(self._dates, name="Date"), columns=stored
+            )
+            for symbol in symbols:
+                if symbol in self._pending:
+                    data = data.join(self._pending[symbol][field].rename(symbol), how="outer")
+
+            data = data.reindex(columns=list(dict.fromkeys(symbols)))
+            data = data[~data.isna().all(axis=1)].sort_index()
+            return slice_period(data, period)
+
+    def remove(self, symbols: List[str]) -> None:
+        """Stage the removal of symbols (e.g. delisted stocks) from the partition."""
+        with self._lock:
+            self.load()
+
+            for symbol in symbols:
+                self._pending.pop(symbol, None)
+                self._fetched.pop(symbol, None)
+                self._periods.pop(symbol, None)
+                if symbol in self._symbols:
+                    self._removed.add(symbol)
+
+    def put(self, symbol: str, data: pd.DataFrame, period: str) -> None:
+        """Stage the bars of a symbol (covering the given period) for writing, replacing any stored bars."""
+        with self._lock:
+            self.load()
+
+            if data is None:
+                data = pd.DataFrame(columns=PRICE_FIELDS)
+
+            data = data.reindex(columns=PRICE_FIELDS).astype(float)
+            index = pd.DatetimeIndex(data.index)
+            if index.tz is not None:
+                index = index.tz_localize(None)
+            data.index = index.as_unit("ns").rename("Date")
+
+            self._pending[symbol] = data[~data.index.duplicated(keep="last")].sort_index()
+            self._removed.discard(symbol)
+            self._fetched[symbol] = time.time()
+            self._periods[symbol] = period
+            self._unsaved.append(symbol)
+
+            if len(self._unsaved) >= AUTOFLUSH_SIZE:
+                self._save_segment()
+
+    def _save_segment(self) -> None:
+        """Append the symbols staged since the last segment to the partition as a segment file, so an
+        interrupted stage keeps its progress without rewriting the whole partition."""
+        symbols = [symbol for symbol in dict.fromkeys(self._unsaved) if symbol in self._pending]
+        self._unsaved = []
+
+        if not symbols:
+            return
+
+        frames = [self._pending[symbol] for symbol in symbols]
+        dates = np.unique(np.concatenate([data.index.values for data in frames])).astype("datetime64[ns]")
+        arrays = {field.lower(): np.full((len(symbols), len(dates)), np.nan) for field in PRICE_FIELDS}
+
+        for row, data in enumerate(frames):
+            columns = np.searchsorted(dates, data.index.values)
+            for field in PRICE_FIELDS:
+                arrays[field.lower()][row, columns] = data[field].values
+
+        meta = {
+            "symbols": symbols,
+            "fetched": [self._fetched[symbol] for symbol in symbols],
+            "periods": [self._periods[symbol] for symbol in symbols],
+        }
+
+        os.makedirs(self.path, exist_ok=True)
+        name = f"segment_{self._next_segment}.npz"
+        self._next_segment += 1
+        tmp_path = self._file(f"{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.savez(f, meta=np.array(json.dumps(meta)), dates=dates, **arrays)
+        os.replace(tmp_path, self._file(name))
+
+    def flush(self) -> None:
+        """Merge staged bars, segments and removals into the partition and rewrite its files."""
+        with self._lock:
+            if not self._pending and not self._removed and not self._segment_files():
+                return
+
+            # build the union date axis and the row of every symbol
+            pending_dates = [data.index.values for data in self._pending.values()]
+            dates = np.unique(np.concatenate([np.asarray(self._dates), *pending_dates]))
+            dates = dates.astype("datetime64[ns]")
+
+            kept = [symbol for symbol in self._symbols if symbol not in self._removed]
+            kept_rows = [self._symbols[symbol] for symbol in kept]
+            symbols = {symbol: i for i, symbol in enumerate(kept)}
+            for symbol in self._pending:
+                if symbol not in symbols:
+                    symbols[symbol] = len(symbols)
+
+            # copy existing bars onto the new date axis, then overwrite staged symbols
+            old_columns = np.searchsorted(dates, self._dates)
+            arrays = {}
+
+            for field in PRICE_FIELDS:
+                array = np.full((len(symbols), len(dates)), np.nan)
+                if len(kept_rows) > 0:
+                    array[: len(kept_rows), old_columns] = np.asarray(self._arrays[field])[kept_rows]
+
+                for symbol, data in self._pending.items():
+                    row = symbols[symbol]
+                    array[row] = np.nan
+                    array[row, np.searchsorted(dates, data.index.values)] = data[field].values
+
+                arrays[field] = array
+
+            # drop dates no symbol has a bar for (e.g. sessions that fell out of every stored period)
+            used = np.zeros(len(dates), dtype=bool)
+            for array in arrays.values():
+                used |= ~np.isnan(array).all(axis=0)
+            if not used.all():
+                dates = dates[used]
+                arrays = {field: array[:, used] for field, array in arrays.items()}
+
+            # release memory maps before replacing the files they point to
+            self._arrays = arrays
+            self._dates = dates
+            self._symbols = symbols
+            self._pending = {}
+            self._unsaved = []
+            self._removed = set()
+
+            os.makedirs(self.path, exist_ok=True)
+            for field in PRICE_FIELDS:
+                self._save_array(f"{field.lower()}.npy", arrays[field])
+            self._save_array("dates.npy", dates)
+
+            index = {
+                "symbols": list(symbols),
+                "fetched": self._fetched,
+                "periods": self._periods,
+            }
+            tmp_path = self._file("index.json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(index, f)
+            os.replace(tmp_path, self._file("index.json"))
+
+            # segments are merged into the partition now
+            for name in self._segment_files():
+                os.remove(self._file(name))
+
+    def _save_array(self, name: str, array: np.ndarray) -> None:
+        """Atomically write an array to the partition directory."""
+        tmp_path = self._file(f"{name}.tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, array)
+        os.replace(tmp_path, self._file(name))
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+from urllib.parse import urlparse
+from ...settings import rate_limits
+
+# constants
+DEFAULT_RETRY_AFTER = 5.0  # seconds to back off when a throttled response has no usable Retry-After header
+THROTTLE_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """Token bucket allowing 'rate' requests per second on average and bursts of up to 'burst' requests.
+
+    Callers reserve a token and wait until it becomes available, so concurrent callers (threads or
+    coroutines) are released one after another at the bucket's rate."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """Take a token and return the number of seconds to wait before using it."""
+        with self._lock:
+            now = time.monotonic()
+            # no tokens accrue while the bucket is blocked by a penalty (updated lies in the future)
+            elapsed = max(0.0, now - self._updated)
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = max(now, self._updated)
+            self._tokens -= 1
+
+            blocked = self._updated - now
+            deficit = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return blocked + deficit
+
+    def acquire(self) -> None:
+        """Block the calling thread until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Suspend the calling coroutine (without blocking the event loop) until a request may be sent."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def penalize(self, retry_after: float) -> None:
+        """Stop releasing tokens for 'retry_after' seconds (e.g. after a 429 response) and drop any burst allowance."""
+        with self._lock:
+            self._updated = max(self._updated, time.monotonic() + retry_after)
+            self._tokens = min(self._tokens, 0.0)
+
+
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+
+def host_of(url: str) -> str:
+    """Return the host of a URL (strings without a scheme are treated as host names)."""
+    if "://" in url:
+        return urlparse(url).hostname or url
+    return url
+
+
+def get_bucket(url: str) -> Optional[TokenBucket]:
+    """Return the shared token bucket of a URL's host, or None if the host has no configured rate limit."""
+    host = host_of(url)
+
+    with _buckets_lock:
+        if host not in _buckets:
+            if host not in rate_limits:
+                return None
+            limit = rate_limits[host]
+            _buckets[host] = TokenBucket(limit["rate"], limit["burst"])
+        return _buckets[host]
+
+
+def acquire(url: str) -> None:
+    """Wait (blocking) until a request to a URL or host is allowed by its rate limit."""
+    bucket = get_bucket(url)
+    if bucket is not None:
+        bucket.acquire()
+
+
+async def acquire_async(url: str) -> None:
+    """Wait (asynchronously) until a request to a URL or host is allowed by its rate limit."""
+    bucket = get_bucket(url)
+    if bucket is not None:
+        await bucket.acquire_async()
+
+
+def penalize(url: str, retry_after: float = DEFAULT_RETRY_AFTER) -> None:
+    """Pause every request to a URL's host for 'retry_after' seconds after the host throttled a request."""
+    bucket = get_bucket(url)
+    if bucket is not None:
+        bucket.penalize(retry_after)
+
+
+def retry_after_seconds(headers: Mapping[str, str], default: float = DEFAULT_RETRY_AFTER) -> float:
+    """Parse a Retry-After header (delay in seconds or an HTTP date) into a number of seconds."""
+    value = headers.get("Retry-After") if headers is not None else None
+
+    if value is None:
+        return default
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
@@ -0,0 +1,83 @@
+import operator
+from string import Formatter
+from typing import Dict, List, Set
+import numpy as np
+import pandas as pd
+
+# constants
+COMPARATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def condition_mask(table: pd.DataFrame, condition: Dict) -> pd.Series:
+    """Return a boolean mask of the rows in an indicator table which satisfy a condition of the form
+    {"indicator": ..., "op": ..., "value": ...}. Missing indicators and NaN values never satisfy a condition."""
+    if condition["op"] not in COMPARATORS:
+        raise ValueError(f"Unknown comparator '{condition['op']}'!")
+
+    if condition["indicator"] not in table:
+        return pd.Series(False, index=table.index)
+
+    values = table[condition["indicator"]]
+    threshold = condition["value"]
+
+    if isinstance(threshold, (bool, np.bool_)):
+        values = values.map(lambda value: bool(value) if pd.notna(value) else None)
+    else:
+        values = pd.to_numeric(values, errors="coerce")
+
+    mask = COMPARATORS[condition["op"]](values, threshold)
+    return mask.fillna(False).astype(bool) & values.notna()
+
+
+def label_fields(template: str) -> List[str]:
+    """Return the indicator names referenced by a label template such as "RSI ({rsi:.1f})"."""
+    return [field for _, field, _, _ in Formatter().parse(template) if field]
+
+
+def criterion_indicators(conditions: List[Dict]) -> Set[str]:
+    """Return every indicator a criterion reads (in its conditions or labels)."""
+    indicators = set()
+    for condition in conditions:
+        indicators.add(condition["indicator"])
+        indicators.update(label_fields(condition["label"]))
+    return indicators
+
+
+def score_table(
+    table: pd.DataFrame, criteria: Dict[str, List[Dict]], weights: Dict[str, float]
+) -> pd.DataFrame:
+    """Score every row of an indicator table against weighted criteria.
+
+    Each criterion is a list of alternative conditions; the first satisfied condition awards the
+    criterion's weight and contributes its formatted label. Returns a DataFrame with a 'score'
+    column and a 'criteria' column listing the passed labels in the order of 'weights'."""
+    score = pd.Series(0, index=table.index)
+    passed = pd.Series("", index=table.index, dtype=object)
+
+    for criterion, weight in weights.items():
+        if criterion not in criteria:
+            raise KeyError(f"Scoring criterion '{criterion}' is not defined!")
+
+        labels = pd.Series(np.nan, index=table.index, dtype=object)
+        matched = pd.Series(False, index=table.index)
+
+        for condition in criteria[criterion]:
+            mask = condition_mask(table, condition) & ~matched
+            if mask.any():
+                fields = label_fields(condition["label"])
+                rows = table.loc[mask, fields].to_dict("records") if fields else [{}] * mask.sum()
+                labels[mask] = [condition["label"].format(**row) for row in rows]
+            matched |= mask
+
+        score += np.where(matched, weight, 0)
+        separator = np.where(passed != "", ", ", "")
+        passed = passed.where(~matched, passed + separator + labels.fillna(""))
+
+    return pd.DataFrame({"score": score, "criteria": passed}, index=table.index)
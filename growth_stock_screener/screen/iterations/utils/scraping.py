@@ -2,24 +2,130 @@ from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.common.exceptions import StaleElementReferenceException
 from selenium.webdriver.common.by import By
-from typing import Callable, List
-from aiohttp.client import ClientSession
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from aiohttp.client import ClientResponse, ClientSession
+from multidict import CIMultiDict
 from lxml import html
+import logging
+import os
 import re
+import threading
 import yfinance as yf
+import numpy as np
 import pandas as pd
+from tqdm import tqdm
+from .rate_limit import THROTTLE_STATUSES, acquire, acquire_async, penalize, retry_after_seconds
+from ...settings import max_throttle_retries, yf_download_max_inflight, yf_download_max_threads
 
+try:
+    from yfinance.exceptions import YFRateLimitError
+except ImportError:  # older yfinance versions don't report throttling separately
+    YFRateLimitError = None
 
-async def get(url: str, session: ClientSession, headers=None, json=False) -> str:
-    """Send a GET request for the given url and return the response as a string. Setting 'json' to 'True' will return a json object."""
+# constants
+YFINANCE_HOST = "query2.finance.yahoo.com"
+YFINANCE_THROTTLE_MESSAGES = ("YFRateLimitError", "Rate limited", "Too Many Requests")
+
+
+class _ThrottleLogHandler(logging.Handler):
+    """Notes whether yfinance logged a rate limit error (yf.download and Ticker.history log failed
+    symbols instead of raising)."""
+
+    def __init__(self):
+        super().__init__(level=logging.ERROR)
+        self.throttled = False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        message = record.getMessage()
+        if any(throttle_message in message for throttle_message in YFINANCE_THROTTLE_MESSAGES):
+            self.throttled = True
+
+
+_yf_log_lock = threading.Lock()
+_yf_log_watchers = 0
+_yf_log_silenced = None  # (level, propagate) of a silenced yfinance logger while it is watched
+
+
+@contextmanager
+def _watch_yfinance_log(handler: logging.Handler):
+    """Attach a handler to the yfinance logger while a call runs.
+
+    Stages silence yfinance by raising its logger's level above ERROR, which would also hide rate limit
+    errors from the handler. While any call is watched such a logger is lowered to ERROR with propagation
+    turned off, so the records reach the handler but still not the console."""
+    global _yf_log_watchers, _yf_log_silenced
+    logger = logging.getLogger("yfinance")
+
+    with _yf_log_lock:
+        if (_yf_log_watchers == 0) and not logger.isEnabledFor(logging.ERROR):
+            _yf_log_silenced = (logger.level, logger.propagate)
+            logger.setLevel(logging.ERROR)
+            logger.propagate = False
+        _yf_log_watchers += 1
+        logger.addHandler(handler)
+
+    try:
+        yield
+    finally:
+        with _yf_log_lock:
+            logger.removeHandler(handler)
+            _yf_log_watchers -= 1
+            if (_yf_log_watchers == 0) and (_yf_log_silenced is not None):
+                logger.setLevel(_yf_log_silenced[0])
+                logger.propagate = _yf_log_silenced[1]
+                _yf_log_silenced = None
+
+
+def yf_call(func: Callable, *args, **kwargs) -> Any:
+    """Call a yfinance function once the Yahoo Finance rate limit allows it, and pause every Yahoo
+    request if Yahoo throttled the call (whether yfinance raised or only logged the rate limit error)."""
+    acquire(YFINANCE_HOST)
+
+    handler = _ThrottleLogHandler()
     try:
-        async with session.get(url, headers=headers) as response:
-            if json:
-                return await response.json()
-            else:
-                return await response.text()
+        with _watch_yfinance_log(handler):
+            return func(*args, **kwargs)
+    except Exception as e:
+        if YFRateLimitError is not None and isinstance(e, YFRateLimitError):
+            handler.throttled = True
+        raise
+    finally:
+        if handler.throttled:
+            penalize(YFINANCE_HOST)
+
+
+async def get_response(
+    url: str, session: ClientSession, headers=None, json=False, read_body: Callable[[ClientResponse], Awaitable[Any]] = None
+) -> Tuple[int, Mapping[str, str], Any]:
+    """Send a GET request for the given url and return its status, (case-insensitive) headers and body (a string, or a json object if 'json' is 'True').
+    Passing 'read_body' (a coroutine function of the response) replaces reading the whole body, e.g. to scan a large body in chunks; the body is then its result.
+    Requests wait for the rate limit of the url's host, and throttled requests are retried after the host's Retry-After delay.
+    Bodyless responses (304 Not Modified) have a body of None; failed requests return (None, {}, None)."""
+    try:
+        for attempt in range(max_throttle_retries + 1):
+            await acquire_async(url)
+            async with session.get(url, headers=headers) as response:
+                if (response.status in THROTTLE_STATUSES) and (attempt < max_throttle_retries):
+                    penalize(url, retry_after_seconds(response.headers))
+                    continue
+
+                body = None
+                if response.status != 304:
+                    if read_body is not None:
+                        body = await read_body(response)
+                    else:
+                        body = await response.json() if json else await response.text()
+                return response.status, CIMultiDict(response.headers), body
     except Exception:
-        return None
+        return None, {}, None
+
+
+async def get(url: str, session: ClientSession, headers=None, json=False) -> str:
+    """Send a GET request for the given url and return the response as a string. Setting 'json' to 'True' will return a json object."""
+    _, _, body = await get_response(url, session, headers=headers, json=json)
+    return body
 
 
 def extract_element(xpath: str, response: str) -> WebElement:
@@ -104,38 +210,111 @@ class WaitForAll:
             return False
 
 
-def yf_download_batches(
-    batch_size: int, symbol_list: List[str], timeout: int
-) -> pd.DataFrame:
-    """Download historical stock price data in batches using yfinance."""
-
-    def download_batch(start: int, end: int) -> pd.DataFrame:
-        """Download a batch of historical stock price data from start to end - 1."""
-        print(
-            f"Batch {batch_number}: Symbols {start + 1} to {end} ({symbol_list[start]} — {symbol_list[end - 1]})"
-        )
-        batch = yf.download(
-            [symbol_list[i] for i in range(start, end)], period="2y", timeout=timeout
+def _download_projected_batch(
+    symbols: List[str], timeout: int, fields: Sequence[str], dtype: np.dtype, **download_args
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Download a batch of symbols with yf.download and project it to the requested fields.
+    Returns the batch's dates and a (dates x symbols) array per field; the full download is released on return."""
+    data = yf_call(yf.download, symbols, timeout=timeout, **download_args)
+
+    if (data is None) or data.empty:
+        raise ValueError("no price data returned")
+
+    index = pd.DatetimeIndex(data.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+
+    columns = data.columns.get_level_values(0)
+    projections = {
+        field: (
+            data[field].reindex(columns=symbols).to_numpy(dtype=dtype)
+            if field in columns
+            else np.full((len(index), len(symbols)), np.nan, dtype=dtype)
         )
-        print()
-        return batch
+        for field in fields
+    }
 
-    dfs = []
-    start = 0
-    end = min(batch_size, len(symbol_list))
-    batch_number = 1
+    return index.values.astype("datetime64[ns]"), projections
 
-    # loop-and-a-half
-    while end < len(symbol_list):
-        dfs.append(download_batch(start, end))
 
-        # increment counters
-        start += batch_size
-        end = min(end + batch_size, len(symbol_list))
-        batch_number += 1
+def yf_download_batches(
+    batch_size: int,
+    symbol_list: List[str],
+    timeout: int,
+    fields: Sequence[str] = ("Close",),
+    dtype: np.dtype = np.float32,
+    max_inflight: int = yf_download_max_inflight,
+    **download_args,
+) -> Dict[str, pd.DataFrame]:
+    """Download historical stock price data in concurrent batches using yfinance.
+
+    At most 'max_inflight' batches are downloaded at once. Each batch is projected to the requested
+    fields (as 'dtype') as soon as it arrives and copied into a preallocated (dates x symbols) panel,
+    so only the batches in flight are ever held in full. Returns a DataFrame per field; the symbols
+    of batches which failed to download are left out.
 
-    dfs.append(download_batch(start, end))
+    yf.download starts a thread for every symbol of a batch, so batches (and the batches in flight)
+    are capped to keep at most yf_download_max_threads of them alive at once, which macOS would refuse
+    to create otherwise. The threads downloading at a time are shared out between the batches in flight."""
+    batch_size = max(1, min(batch_size, yf_download_max_threads))
+    max_inflight = max(1, min(max_inflight, yf_download_max_threads // batch_size))
 
-    # concatenate the 'Close' columns in each DataFrame
-    price_dfs = map(lambda df: df["Close"], dfs)
-    return pd.concat(price_dfs, axis=1)
+    if "start" not in download_args:
+        download_args.setdefault("period", "2y")
+    download_args.setdefault("progress", False)
+    download_args.setdefault("threads", max(1, min(batch_size, (os.cpu_count() or 1) * 2 // max_inflight)))
+
+    batches = [symbol_list[i : i + batch_size] for i in range(0, len(symbol_list), batch_size)]
+    offsets = np.cumsum([0] + [len(batch) for batch in batches])
+
+    dates = None
+    panel = {}
+    downloaded = np.zeros(len(symbol_list), dtype=bool)
+
+    with ThreadPoolExecutor(max_workers=max_inflight) as executor:
+        futures = {
+            executor.submit(_download_projected_batch, batch, timeout, fields, dtype, **download_args): i
+            for i, batch in enumerate(batches)
+        }
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Price Batches"):
+            i = futures[future]
+
+            try:
+                batch_dates, projections = future.result()
+            except Exception as e:
+                print(f"Error downloading batch of {len(batches[i])} symbols ({batches[i][0]} — {batches[i][-1]}): {e}")
+                continue
+
+            # the first batch sets the date axis; the panel only grows if a later batch has extra sessions
+            if dates is None:
+                dates = batch_dates
+                panel = {
+                    field: np.full((len(dates), len(symbol_list)), np.nan, dtype=dtype)
+                    for field in fields
+                }
+            elif not np.isin(batch_dates, dates).all():
+                new_dates = np.union1d(dates, batch_dates)
+                rows = np.searchsorted(new_dates, dates)
+                for field in fields:
+                    grown = np.full((len(new_dates), len(symbol_list)), np.nan, dtype=dtype)
+                    grown[rows] = panel[field]
+                    panel[field] = grown
+                dates = new_dates
+
+            rows = np.searchsorted(dates, batch_dates)
+            for field in fields:
+                panel[field][rows, offsets[i] : offsets[i + 1]] = projections[field]
+            downloaded[offsets[i] : offsets[i + 1]] = True
+
+    symbols = [symbol for symbol, ok in zip(symbol_list, downloaded) if ok]
+    index = pd.DatetimeIndex([] if dates is None else dates, name="Date")
+
+    return {
+        field: pd.DataFrame(
+            panel[field][:, downloaded] if (dates is not None) else np.empty((0, 0), dtype=dtype),
+            index=index,
+            columns=symbols,
+        )
+        for field in fields
+    }
@@ -1,59 +1,310 @@
 import requests
 from requests.exceptions import JSONDecodeError
+import codecs
+import io
+import json
+import os
+import re
+import threading
+import time
+import zipfile
+import numpy as np
 import pandas as pd
-from typing import List, Dict
+from typing import List, Dict, Mapping
 from tqdm import tqdm
 from datetime import datetime
 import asyncio
 import aiohttp
 from aiohttp.client import ClientSession
-import time
-from .scraping import get
+from .rate_limit import acquire
+from .scraping import get_response
+from ...settings import cik_map_max_age_days, sec_max_inflight
 
 # constants
 header = {"User-Agent": "name@domain.com"}
-
-# get table to convert from stock tickers to cik's
-response = requests.get(
-    "https://www.sec.gov/files/company_tickers.json", headers=header
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+COMPANY_FACTS_URL = "https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+COMPANY_FACTS_CACHE_DIR = os.path.abspath(
+    os.path.join(UTILS_DIR, "..", "..", "..", "cache", "companyfacts")
 )
-conversions_df = pd.DataFrame.from_dict(response.json(), orient="index").set_index(
-    "ticker"
+REVENUE_INDEX_PATH = os.path.abspath(
+    os.path.join(UTILS_DIR, "..", "..", "..", "cache", "revenue_index.json")
 )
+COMPANY_TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+CIK_MAP_CACHE_PATH = os.path.abspath(
+    os.path.join(UTILS_DIR, "..", "..", "..", "cache", "company_tickers.json")
+)
+REVENUE_INDEX_FIELDS = ["frame", "end", "val"]  # the columns of a revenue series kept in the index
+ARCHIVE_MEMBER_PATTERN = re.compile(r"CIK(\d{10})\.json$")
+COMPANY_FACTS_CHUNK_SIZE = 64 * 1024  # bytes (or characters) of a companyfacts document read at a time
+SCAN_OVERLAP = 4096  # characters kept between chunks, so a key split across two chunks is still found
+
+# different companies file revenue with varying concepts (only these are kept from companyfacts documents)
+revenue_concepts = [
+    "Revenues",
+    "RevenueFromContractWithCustomerExcludingAssessedTax",
+    "RevenueFromContractWithCustomerIncludingAssessedTax",
+    "RevenuesNetOfInterestExpense",
+    "RevenuesExcludingInterestAndDividends",
+    "RegulatedAndUnregulatedOperatingRevenue",
+    "InterestAndDividendIncomeOperating",
+]
+
+# patterns locating objects in a raw companyfacts document (a taxonomy's first concept object starts with "label")
+US_GAAP_PATTERN = re.compile(r'"us-gaap"\s*:\s*\{')
+TAXONOMY_PATTERN = re.compile(r'"[^"]+"\s*:\s*\{\s*"[^"]+"\s*:\s*\{\s*"label"')
+REVENUE_CONCEPT_PATTERN = re.compile(
+    r'"(%s)"\s*:\s*(?=\{)' % "|".join(map(re.escape, revenue_concepts))
+)
+json_decoder = json.JSONDecoder()
+
+# ticker -> cik map (loaded on first use)
+_cik_map: Dict[str, str] = None
+_cik_map_lock = threading.Lock()
+
+
+def load_cached_cik_map(max_age_days: float = None) -> Dict[str, str]:
+    """Return the cached ticker -> cik map, or None if there is none (or it is older than 'max_age_days')."""
+    try:
+        if (max_age_days is not None) and (
+            time.time() - os.path.getmtime(CIK_MAP_CACHE_PATH) > max_age_days * 86400
+        ):
+            return None
+
+        with open(CIK_MAP_CACHE_PATH, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def download_cik_map() -> Dict[str, str]:
+    """Download SEC.gov's table of company tickers as a ticker -> (zero-padded) cik map and cache it on disk."""
+    acquire(COMPANY_TICKERS_URL)
+    response = requests.get(COMPANY_TICKERS_URL, headers=header)
+
+    cik_map = {}
+    for company in response.json().values():
+        cik_map.setdefault(company["ticker"], str(company["cik_str"]).zfill(10))
+
+    try:
+        os.makedirs(os.path.dirname(CIK_MAP_CACHE_PATH), exist_ok=True)
+        tmp_path = f"{CIK_MAP_CACHE_PATH}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(cik_map, f)
+        os.replace(tmp_path, CIK_MAP_CACHE_PATH)
+    except OSError as e:
+        print(f"Error writing cik cache: {e}")
+
+    return cik_map
+
+
+def load_cik_map() -> Dict[str, str]:
+    """Return the ticker -> cik map, loading it on first use from the disk cache or (when the cache is stale) SEC.gov."""
+    global _cik_map
+
+    with _cik_map_lock:
+        if _cik_map is None:
+            _cik_map = load_cached_cik_map(cik_map_max_age_days)
+
+        if _cik_map is None:
+            try:
+                _cik_map = download_cik_map()
+            except (requests.exceptions.RequestException, JSONDecodeError, KeyError, AttributeError) as e:
+                # fall back to a stale cache (or no ciks at all) rather than failing the screen
+                print(f"Error downloading SEC company tickers: {e}")
+                _cik_map = load_cached_cik_map() or {}
+
+        return _cik_map
 
 
 def get_cik(symbol: str) -> str:
     """Convert a stock symbol into a cik used by the SEC for corporate filings."""
+    return load_cik_map().get(symbol)
+
+
+def revenue_facts(company_facts: dict) -> dict:
+    """Return the revenue-relevant subset of a companyfacts document's facts."""
+    if "us-gaap" not in company_facts:
+        return {"Foreign Stock": True}
+
+    us_gaap = company_facts["us-gaap"]
+    return {concept: us_gaap[concept] for concept in revenue_concepts if concept in us_gaap}
+
+
+class RevenueFactsScanner:
+    """Extract the revenue-relevant subset of a companyfacts JSON document from its text as it arrives
+    in chunks, while keeping only a short tail of the text plus the revenue concept object being decoded.
+
+    The us-gaap taxonomy and the revenue concepts are located with targeted patterns and only the
+    revenue concept objects are decoded; scanning stops where the us-gaap section ends."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._facts_seen = False
+        self._us_gaap_seen = False
+        self._pending_concept = None  # the buffer starts with this revenue concept's object
+        self._found = {}
+        self.done = False
+
+    def feed(self, text: str) -> bool:
+        """Scan the next chunk of the document. Returns True once the rest of the document is irrelevant."""
+        if self.done:
+            return True
+
+        self._buffer += text
+        if not self._facts_seen:
+            self._facts_seen = '"facts"' in self._buffer
+
+        self._scan(final=False)
+        return self.done
+
+    def _scan(self, final: bool) -> None:
+        while not self.done:
+            if self._pending_concept is not None:
+                try:
+                    value, end = json_decoder.raw_decode(self._buffer)
+                except ValueError:
+                    if final:
+                        raise
+                    return  # the object continues in the next chunk
+
+                # the first object of a concept wins
+                self._found.setdefault(self._pending_concept, value)
+                self._pending_concept = None
+                self._buffer = self._buffer[end:]
+                continue
+
+            if not self._us_gaap_seen:
+                us_gaap = US_GAAP_PATTERN.search(self._buffer)
+                if us_gaap is None:
+                    break
+
+                self._us_gaap_seen = True
+                self._buffer = self._buffer[us_gaap.end() :]
+                continue
+
+            # the us-gaap section ends where the next taxonomy (if any) starts
+            concept = REVENUE_CONCEPT_PATTERN.search(self._buffer)
+            next_taxonomy = TAXONOMY_PATTERN.search(self._buffer)
+            if (next_taxonomy is not None) and ((concept is None) or (next_taxonomy.start() < concept.start())):
+                self.done = True
+                self._buffer = ""
+                return
+
+            if concept is None:
+                break
+
+            self._pending_concept = concept.group(1)
+            self._buffer = self._buffer[concept.end() :]
+
+        if not final:
+            self._buffer = self._buffer[-SCAN_OVERLAP:]
+
+    def result(self) -> dict:
+        """Return the revenue facts of the document fed so far (the same result as
+        revenue_facts(json.loads(document)["facts"])), or None if it isn't a companyfacts document.
+        Raises ValueError if the document ended inside a revenue concept object."""
+        if not self.done:
+            self._scan(final=True)
+
+        if not self._facts_seen:
+            return None
+
+        if not self._us_gaap_seen:
+            return {"Foreign Stock": True}
+
+        return {concept: self._found[concept] for concept in revenue_concepts if concept in self._found}
+
+
+def extract_revenue_facts(document: str) -> dict:
+    """Return the revenue-relevant subset of a raw companyfacts JSON document (the same result as
+    revenue_facts(json.loads(document)["facts"])) while decoding only the revenue concept objects."""
+    scanner = RevenueFactsScanner()
+    scanner.feed(document)
+    return scanner.result()
+
+
+async def read_revenue_facts(response: aiohttp.ClientResponse) -> dict:
+    """Read a companyfacts response body in chunks and return its revenue facts (see RevenueFactsScanner).
+    The rest of the body is not downloaded once the us-gaap section has been scanned."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    scanner = RevenueFactsScanner()
+
+    async for chunk in response.content.iter_chunked(COMPANY_FACTS_CHUNK_SIZE):
+        if scanner.feed(decoder.decode(chunk)):
+            break
+    else:
+        scanner.feed(decoder.decode(b"", final=True))
+
+    return scanner.result()
+
+
+def load_cached_facts(cik: str) -> dict:
+    """Return the cached revenue facts of a cik with the validators of the response they came from, or None."""
+    path = os.path.join(COMPANY_FACTS_CACHE_DIR, f"CIK{cik}.json")
+
     try:
-        cik = conversions_df.loc[symbol]["cik_str"]
-        cik_padded = str(cik).zfill(10)
-        return cik_padded
-    except KeyError:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
         return None
 
 
+def save_cached_facts(cik: str, facts: dict, response_headers: Mapping[str, str]) -> None:
+    """Atomically cache the revenue facts of a cik with the response's ETag and Last-Modified validators."""
+    entry = {
+        "etag": response_headers.get("ETag"),
+        "last_modified": response_headers.get("Last-Modified"),
+        "facts": facts,
+    }
+
+    if (entry["etag"] is None) and (entry["last_modified"] is None):
+        return  # the response can't be revalidated
+
+    try:
+        os.makedirs(COMPANY_FACTS_CACHE_DIR, exist_ok=True)
+        path = os.path.join(COMPANY_FACTS_CACHE_DIR, f"CIK{cik}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Error writing companyfacts cache for CIK{cik}: {e}")
+
+
 async def get_company_facts(symbol: str, session: ClientSession) -> dict:
-    """Request all available concept data for a stock symbol from SEC.gov"""
+    """Request the revenue concept data of a stock symbol from SEC.gov.
+    Cached facts are revalidated with a conditional request, so unchanged filers cost a 304 response."""
     # construct url for request to SEC's API
     cik = get_cik(symbol)
 
     if cik is None:
         return None
 
-    url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
+    url = COMPANY_FACTS_URL.format(cik=cik)
 
-    # attempt GET request and return company facts
-    try:
-        response = await get(url, session, headers=header, json=True)
-        company_facts = response["facts"]
+    cached = load_cached_facts(cik)
+    request_headers = dict(header)
+    if cached is not None:
+        if cached.get("etag"):
+            request_headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            request_headers["If-Modified-Since"] = cached["last_modified"]
 
-        if "us-gaap" not in company_facts:
-            return {"Foreign Stock": True}
+    # attempt GET request and extract the revenue facts while the document streams in
+    status, response_headers, facts = await get_response(
+        url, session, headers=request_headers, read_body=read_revenue_facts
+    )
+
+    if (status == 304) and (cached is not None):
+        return cached["facts"]
 
-        return company_facts["us-gaap"]
-    except Exception:
+    if (status != 200) or (facts is None):
         return None
 
+    save_cached_facts(cik, facts, response_headers)
+    return facts
+
 
 async def fetch_revenues(symbol: str, session: ClientSession) -> pd.DataFrame:
     """Fetch quarterly revenue data for a stock symbol from SEC filings."""
@@ -63,19 +314,15 @@ async def fetch_revenues(symbol: str, session: ClientSession) -> pd.DataFrame:
     if data is None:
         return None
 
+    return select_revenues(data)
+
+
+def select_revenues(data: dict) -> pd.DataFrame:
+    """Return the revenue listings of the most up-to-date revenue concept in a company's revenue facts."""
     if "Foreign Stock" in data:
         return pd.DataFrame.from_dict([data])
 
-    # different companies file revenue with varying concepts, and we must check which concept has the most up-to-date data
-    revenue_concepts = [
-        "Revenues",
-        "RevenueFromContractWithCustomerExcludingAssessedTax",
-        "RevenueFromContractWithCustomerIncludingAssessedTax",
-        "RevenuesNetOfInterestExpense",
-        "RevenuesExcludingInterestAndDividends",
-        "RegulatedAndUnregulatedOperatingRevenue",
-        "InterestAndDividendIncomeOperating",
-    ]
+    # we must check which revenue concept has the most up-to-date data
     revenue_concept_data = []
 
     # add available revenue concept dictionaries to list
@@ -135,40 +382,36 @@ def find_most_updated(dicts: List[List[Dict]]) -> List[Dict]:
 def fetch_all_revenues(symbols: List[str]) -> Dict[str, pd.DataFrame]:
     """Fetch quarterly revenue data for multiple stock symbols from SEC filings."""
 
+    # load the cik map before the event loop starts (it may have to be downloaded)
+    load_cik_map()
+
     async def helper(symbols: List[str]) -> Dict[str, pd.DataFrame]:
         ret = {}
-        remaining_symbols = len(symbols)
-        index = 0
+        # sliding window: a new request starts as soon as any in-flight request finishes
+        window = asyncio.Semaphore(sec_max_inflight)
 
         print("Fetching revenue data . . .\n")
 
         # create a progress bar and aiohttp session
-        with tqdm(total=remaining_symbols) as progress_bar:
+        with tqdm(total=len(symbols)) as progress_bar:
             async with aiohttp.ClientSession() as session:
-                # launch batches of requests until all revenue data has been fetched
-                while remaining_symbols > 0:
-                    # record start time
-                    start = time.perf_counter()
-                    # launch up to 10 concurrent requests to fetch revenue
-                    async with asyncio.TaskGroup() as tg:
-                        iterations = min(10, remaining_symbols)
-                        for i in range(iterations):
-                            # add a fetch revenue task to the task group
-                            tg.create_task(
-                                add_revenue_to_dict(symbols[index], ret, session)
-                            )
-                            # update counters
-                            index += 1
-                            remaining_symbols -= 1
-                            progress_bar.update()
-
-                    # record end time
-                    end = time.perf_counter()
-                    # wait to ensure that the average request rate doesn't exceed 10 requests/second
-                    elapsed_time = end - start
-                    time.sleep(max(0, 1 - elapsed_time))
-
-        return ret
+
+                async def fetch(symbol: str) -> None:
+                    # requests are paced by the SEC hosts' rate limit (asyncio.sleep, never blocking the loop)
+                    async with window:
+                        try:
+                            await add_revenue_to_dict(symbol, ret, session)
+                        except Exception:
+                            # an error would cancel every other request in the task group
+                            ret[symbol] = None
+                    progress_bar.update()
+
+                async with asyncio.TaskGroup() as tg:
+                    for symbol in symbols:
+                        tg.create_task(fetch(symbol))
+
+        # return results in the order of the requested symbols
+        return {symbol: ret[symbol] for symbol in symbols if symbol in ret}
 
     return asyncio.run(helper(symbols))
 
@@ -178,48 +421,180 @@ async def add_revenue_to_dict(symbol: str, dict: dict, session: ClientSession) -
     dict[symbol] = await fetch_revenues(symbol, session)
 
 
-def subtract_prev_quarters(timeframe: str, df: pd.DataFrame) -> float:
-    """Convert annual revenue to quarterly revenue by subtracting revenue from the previous three 10-Q SEC filings."""
-    # determine the index of the row with revenue for the inputted timeframe
+def read_archive_member(archive: zipfile.ZipFile, name: str) -> dict:
+    """Return the revenue facts of a companyfacts document in a zip archive, decompressing it in chunks."""
+    scanner = RevenueFactsScanner()
+
+    with io.TextIOWrapper(archive.open(name), encoding="utf-8") as member:
+        while not scanner.done:
+            chunk = member.read(COMPANY_FACTS_CHUNK_SIZE)
+            if chunk == "":
+                break
+            scanner.feed(chunk)
+
+    return scanner.result()
+
+
+def build_revenue_index(archive_path: str, index_path: str = REVENUE_INDEX_PATH) -> int:
+    """Build a local revenue index (cik -> revenue series) from the SEC's bulk companyfacts.zip archive.
+    Returns the number of companies indexed."""
+    companies = {}
+
+    with zipfile.ZipFile(archive_path) as archive:
+        members = [name for name in archive.namelist() if ARCHIVE_MEMBER_PATTERN.search(name)]
+
+        print("Indexing revenue data . . .\n")
+        for name in tqdm(members):
+            cik = ARCHIVE_MEMBER_PATTERN.search(name).group(1)
+
+            try:
+                facts = read_archive_member(archive, name)
+                revenue_df = None if (facts is None) else select_revenues(facts)
+            except Exception:
+                continue
+
+            if facts is None:
+                continue
+
+            # companies without any revenue concept get an empty entry, so they aren't fetched from SEC.gov
+            if revenue_df is None:
+                companies[cik] = {}
+            elif "Foreign Stock" in revenue_df:
+                companies[cik] = {"Foreign Stock": True}
+            else:
+                # store each series column-wise, which keeps the index compact
+                companies[cik] = {
+                    field: revenue_df[field].tolist() for field in REVENUE_INDEX_FIELDS
+                }
+
+    index = {
+        "archive": os.path.basename(archive_path),
+        "archive_modified": os.path.getmtime(archive_path),
+        "created": time.time(),
+        "companies": companies,
+    }
+
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(tmp_path, index_path)
+
+    return len(companies)
+
+
+def load_revenue_index(index_path: str = REVENUE_INDEX_PATH, max_age_days: float = None) -> dict:
+    """Return a revenue index built by build_revenue_index, or None if there is no readable index
+    (or its archive is older than 'max_age_days')."""
     try:
-        index = df.index.get_loc(df.index[df["frame"] == timeframe][0])
-    except IndexError:
+        with open(index_path, "r") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
         return None
 
-    quarter_indices = [index - 3, index - 2, index - 1, index]
-    revenues = []
+    if max_age_days is not None:
+        age_days = (time.time() - index.get("archive_modified", 0)) / 86400
+        if age_days > max_age_days:
+            print(f"Revenue index archive is {age_days:.0f} days old (over {max_age_days:g}). Fetching revenue from SEC.gov instead.")
+            return None
 
-    # ensure that there are enough filings to perform subtraction
-    if quarter_indices[0] < 0:
-        return None
+    return index
 
-    # extract revenues for each index
-    for i in quarter_indices:
-        row = df.iloc[i]
 
-        if (i < index) and ("Q" not in row["frame"]):
-            return None
+def indexed_revenues(symbols: List[str], index: dict) -> Dict[str, pd.DataFrame]:
+    """Look up the revenue data of stock symbols in a revenue index.
+    Symbols without a cik (or whose company reports no revenue concept) map to None;
+    symbols whose cik isn't indexed are left out."""
+    companies = index["companies"]
+    ret = {}
+
+    for symbol in symbols:
+        cik = get_cik(symbol)
+
+        if cik is None:
+            ret[symbol] = None
+        elif cik in companies:
+            series = companies[cik]
+            if not series:
+                ret[symbol] = None
+            elif "Foreign Stock" in series:
+                ret[symbol] = pd.DataFrame.from_dict([{"Foreign Stock": True}])
+            else:
+                ret[symbol] = pd.DataFrame(series, columns=REVENUE_INDEX_FIELDS)
+
+    return ret
+
+
+def quarterly_revenues(df: pd.DataFrame) -> Dict[str, float]:
+    """Normalize an SEC revenue DataFrame into a mapping of timeframe -> quarterly revenue.
 
-        revenues.append(float(row["val"]))
+    Quarterly listings are used as reported. An annual listing is converted into the revenue of
+    its final quarter by subtracting the three preceding listings, which must be quarterly.
+    The first listing of a timeframe determines its revenue."""
+    frames = df["frame"].tolist()
+    values = [float(value) for value in df["val"]]
+    quarterly = ["Q" in frame for frame in frames]
 
-    # subtract quarterly revenues from annual revenue
-    revenue = revenues[3] - (revenues[0] + revenues[1] + revenues[2])
-    return revenue
+    revenues = {}
+    seen = set()
+
+    for i, frame in enumerate(frames):
+        if frame in seen:
+            continue
+        seen.add(frame)
+
+        if quarterly[i]:
+            revenues[frame] = values[i]
+        elif (i >= 3) and all(quarterly[i - 3 : i]):
+            # subtract quarterly revenues from annual revenue
+            revenues[frame] = values[i] - (values[i - 3] + values[i - 2] + values[i - 1])
+
+    return revenues
 
 
 def extract_revenue(timeframe: str, df: pd.DataFrame) -> float:
     """Return the revenue for a given timeframe from an SEC revenue DataFrame."""
-    if "Q" in timeframe:
-        # search DataFrame for quarterly timeframe
-        try:
-            row = df[df["frame"] == timeframe].iloc[0]
-            value = row["val"]
-            return float(value)
-        except IndexError:
-            return None
-    else:
-        # convert annual revenue into quarterly revenue
-        return subtract_prev_quarters(timeframe, df)
+    return quarterly_revenues(df).get(timeframe)
+
+
+def revenue_growth_table(revenue_data: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Calculate the revenue growth of every symbol's two most recent timeframes ("Q1" and "Q2")
+    compared to the same timeframes one year earlier.
+
+    Returns a table indexed by (symbol, quarter) with the columns Timeframe, Current, Previous
+    and Growth; Growth is NaN where revenue is unavailable or growth is incalculable."""
+    records = []
+
+    for symbol, df in revenue_data.items():
+        if (df is None) or ("Foreign Stock" in df) or (len(df) == 0):
+            continue
+
+        revenues = quarterly_revenues(df)
+        frames = df["frame"].tolist()[-2:]
+        quarters = ["Q1", "Q2"][-len(frames) :]
+
+        for quarter, timeframe in zip(quarters, frames):
+            records.append(
+                (
+                    symbol,
+                    quarter,
+                    timeframe,
+                    revenues.get(timeframe, np.nan),
+                    revenues.get(previous_timeframe(timeframe), np.nan),
+                )
+            )
+
+    table = pd.DataFrame.from_records(
+        records, columns=["Symbol", "Quarter", "Timeframe", "Current", "Previous"]
+    ).set_index(["Symbol", "Quarter"])
+    table["Current"] = table["Current"].astype(float)
+    table["Previous"] = table["Previous"].astype(float)
+
+    # growth is only defined against positive previous revenue
+    previous = table["Previous"].where(table["Previous"] > 0)
+    table["Growth"] = 100 * (table["Current"] - previous) / previous
+
+    return table
 
 
 def previous_timeframe(timeframe: str) -> str:
@@ -1,7 +1,7 @@
 import multiprocessing
 
 # TIMEFRAME SELECTION (for short-term skyrocket screening)
-# Options: "24_hours", "3_days", "7_days", "2_weeks", "1_month"
+# Options: any key of SCORING_WEIGHTS in screen/iterations/short_term_momentum.py ("24_hours", "3_days", "7_days", "2_weeks", "1_month")
 TIMEFRAME = "24_hours"
 
 # ITERATIONS (modify these values as desired)
@@ -18,6 +18,12 @@ price_range_presets = {
 }
 active_price_preset = "skyrocket_under_4" # Default preset key
 
+# Universe Pre-filter (Used by short_term_momentum)
+# Drops symbols using the last sale price and volume from the NASDAQ listing before any history is fetched
+prefilter_enabled: bool = True
+prefilter_price_tolerance: float = 0.25 # Widen the price range by this fraction on both sides (last sale can be stale)
+prefilter_min_volume: int = 0 # Minimum listing volume (shares traded in the last session) to keep a symbol
+
 # Iteration 1: Relative Strength
 min_rs: int = 90  # minimum RS rating to pass (integer from 0-100)
 
@@ -25,6 +31,7 @@ min_rs: int = 90  # minimum RS rating to pass (integer from 0-100)
 min_market_cap: float = 1000000000  # minimum market cap (USD)
 min_price: float = 10               # minimum price (USD)
 min_volume: int = 100000            # minimum 50-day average volume
+volume_fallback: bool = True        # scrape barchart.com for symbols whose average volume can't be computed from stored prices
 
 # Iteration 3: Trend
 trend_settings = {
@@ -38,6 +45,7 @@ trend_settings = {
 # Iteration 4: Revenue Growth
 min_growth_percent: float = 25  # minimum revenue growth for a quarter compared to the same quarter 1 year ago (percentage)
 protected_rs: int = 97          # minimum RS rating to bypass revenue screen iteration (see README)
+revenue_index_max_age_days: float = 7.0  # days after which a local revenue index's companyfacts.zip is too old to use (revenue is fetched from SEC.gov instead)
 
 # Iteration 5: Institutional Accumulation
 # (no parameters to modify)
@@ -48,8 +56,30 @@ protected_rs: int = 97          # minimum RS rating to bypass revenue screen ite
 # Thread Pool Size
 threads: int = min(int(multiprocessing.cpu_count() * 0.75), 10)  # number of concurrent browser instances to fetch dynamic data (positive integer)
 
+# RATE LIMITS
+# Average requests/second ("rate") and burst size ("burst") allowed by each external data provider, keyed by host.
+# Every request to a listed host waits for a token; throttled responses (HTTP 429/503) pause the host for its Retry-After delay.
+rate_limits: dict = {
+    "data.sec.gov": {"rate": 10, "burst": 10},  # SEC fair access policy: 10 requests/second
+    "www.sec.gov": {"rate": 10, "burst": 10},
+    "www.barchart.com": {"rate": 5, "burst": 10},
+    "www.marketbeat.com": {"rate": 5, "burst": 10},
+    "www.cnbc.com": {"rate": 5, "burst": 10},
+    "api.nasdaq.com": {"rate": 2, "burst": 2},
+    "query2.finance.yahoo.com": {"rate": 5, "burst": 10},  # yfinance (Ticker.history, Ticker.info, yf.download batches)
+    "api.twelvedata.com": {"rate": 8 / 60, "burst": 8},  # Twelve Data free plan: 8 requests/minute
+}
+max_throttle_retries: int = 3  # times a throttled request is retried after waiting for Retry-After
+yf_download_max_inflight: int = 4  # concurrent yf.download batches when downloading price panels
+yf_download_max_threads: int = 1000  # yfinance download threads alive at once (yf.download starts one per symbol; macOS caps threads per process)
+sec_max_inflight: int = 20  # concurrent SEC requests while fetching revenue (the request rate is capped by rate_limits)
+cik_map_max_age_days: float = 7.0  # days before the cached SEC ticker -> cik table is downloaded again
+
 # CACHING
 MAX_CACHE_AGE_DAYS: float = 1.0 # Maximum age of cached stock data in days. Set to 0 to disable caching.
+INCREMENTAL_FETCH: bool = True # Refresh stale cached histories by downloading only the bars added since the last run.
+PRICE_PANEL_MAX_AGE_DAYS: float = 0.5 # Age at which the relative strength stage's stored 2-year bars are extended with the latest sessions.
+STREAMING_INDICATORS: bool = True # Persist RSI/ATR/rolling-window state per ticker and update it with new bars only (requires caching).
 
 # THIRD-PARTY APIs (Store securely - e.g., environment variables or .env file)
 # --- Replace placeholder with your actual key ONLY for local testing --- 
@@ -57,3 +87,9 @@ TWELVEDATA_API_KEY: str = "6d39651259df48f6a4bb6f3c3755792f" # <<< YOUR KEY HERE
 
 # PERFORMANCE
 QUICK_MODE_FRACTION: float = 1.0 # Fraction of tickers to process (e.g., 0.25 for 25%). Set > 1.0 to disable.
+HISTORY_BATCH_SIZE: int = 500 # Number of tickers per yf.download call when prefetching price histories.
+PRICE_PANEL_BATCH_SIZE: int = 500 # Number of tickers per yf.download call when updating the relative strength price panel (up to yf_download_max_inflight calls run at once).
+YFINANCE_MAX_INFLIGHT: int = 8 # Concurrent per-ticker yfinance requests (histories missing from the batch download and Ticker.info).
+TWELVEDATA_MAX_INFLIGHT: int = 1 # Concurrent Twelve Data fallback requests (the free plan allows 8 requests/minute).
+INDICATOR_PROCESSES: int = multiprocessing.cpu_count() # Worker processes for full indicator recomputes (1 disables the process pool).
+PARALLEL_INDICATOR_MIN_TICKERS: int = 2000 # Smallest number of tickers worth spreading across worker processes.
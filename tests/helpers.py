@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+
+
+def random_history(seed: int, length: int) -> pd.DataFrame:
+    """Return a random daily OHLCV history whose last session may have a volume surge."""
+    rng = np.random.default_rng(seed)
+    close = 2 * np.exp(np.cumsum(rng.normal(0, 0.05, length)))
+    high = close * (1 + rng.uniform(0, 0.08, length))
+    low = close * (1 - rng.uniform(0, 0.08, length))
+    volume = rng.integers(10000, 1000000, length).astype(float)
+    volume[-1] *= rng.choice([1, 5])
+    index = pd.bdate_range("2024-01-01", periods=length)
+    return pd.DataFrame(
+        {"Open": close, "High": high, "Low": low, "Close": close, "Volume": volume},
+        index=index,
+    )
@@ -1,5 +1,7 @@
 import unittest
 import math
+import numpy as np
+import pandas as pd
 from growth_stock_screener.screen.iterations.utils import *
 
 
@@ -63,3 +65,35 @@ class TestRelativeStrength(unittest.TestCase):
         result = relative_strength(100, 50, 25, 30, 15, 20, 5, 0)
         expected = -39.33333333
         self.assertAlmostEqual(result, expected, places=3)
+
+
+class TestRelativeStrengthTable(unittest.TestCase):
+    def test_matches_scalar_relative_strength(self):
+        days = np.arange(300, dtype=float)
+        close = pd.DataFrame(
+            {
+                "AAA": days + 1,
+                "BBB": np.where(days < 100, np.nan, days + 1),  # listed for 200 days
+                "CCC": np.where(days == 299 - 126, np.nan, days + 1),  # missing Q2 end
+            }
+        )
+        table = relative_strength_table(close)
+
+        self.assertEqual(table["Status"].tolist(), ["ok", "too young", "insufficient data"])
+        prices = [close["AAA"].iloc[299 - offset] for offset in RS_QUARTER_OFFSETS]
+        self.assertEqual(table.loc["AAA", RS_QUARTER_COLUMNS].tolist(), prices)
+        self.assertEqual(table.loc["AAA", "RS (raw)"], relative_strength(*prices))
+        self.assertTrue(table.loc[["BBB", "CCC"], "RS (raw)"].isna().all())
+
+    def test_short_panel(self):
+        table = relative_strength_table(pd.DataFrame({"AAA": [1.0, 2.0]}))
+        self.assertEqual(table.loc["AAA", "Status"], "too young")
+
+
+class TestTrailingAverage(unittest.TestCase):
+    def test_trailing_average(self):
+        panel = pd.DataFrame({"AAA": [100.0, 1.0, 2.0, 3.0], "BBB": [1.0, np.nan, 2.0, 3.0]})
+        averages = trailing_average(panel, 3)
+        self.assertEqual(averages["AAA"], 2.0)
+        self.assertTrue(np.isnan(averages["BBB"]))
+        self.assertTrue(trailing_average(panel, 5).isna().all())
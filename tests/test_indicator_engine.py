@@ -0,0 +1,76 @@
+import os
+import sys
+import unittest
+import numpy as np
+import pandas as pd
+from growth_stock_screener.screen.iterations.utils import *
+
+# short_term_momentum imports its settings as a top-level 'screen' package (as run_screen.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "growth_stock_screener"))
+from screen.iterations.short_term_momentum import calculate_indicators
+from helpers import random_history
+
+
+class TestIndicatorEngine(unittest.TestCase):
+    def setUp(self):
+        lengths = [21, 22, 40, 63, 127, 130, 250]
+        self.histories = {
+            f"T{i}": random_history(i, lengths[i % len(lengths)]) for i in range(30)
+        }
+        # a flat history exercises the zero-loss RSI and zero-volatility Sharpe branches
+        flat = random_history(99, 30)
+        flat[["Open", "High", "Low", "Close"]] = 1.0
+        self.histories["FLAT"] = flat
+
+    def test_matches_per_ticker_indicators(self):
+        table = compute_indicator_table(self.histories)
+
+        for ticker, data in self.histories.items():
+            expected = calculate_indicators(ticker, data, include_info=False)
+            row = table.loc[ticker]
+
+            for key, value in expected.items():
+                with self.subTest(ticker=ticker, indicator=key):
+                    if value is None or (isinstance(value, float) and np.isnan(value)):
+                        self.assertTrue(pd.isna(row[key]))
+                    elif isinstance(value, (bool, np.bool_)):
+                        self.assertEqual(bool(row[key]), bool(value))
+                    else:
+                        self.assertAlmostEqual(row[key], value, places=6)
+
+            if not expected["catalyst_proxy_flag"]:
+                self.assertTrue(pd.isna(row["catalyst_proxy_pct_change"]))
+
+    def test_short_histories_are_dropped(self):
+        histories = {"SHORT": random_history(1, 20), "LONG": random_history(2, 21)}
+        table = compute_indicator_table(histories)
+        self.assertEqual(list(table.index), ["LONG"])
+
+    def test_empty_input(self):
+        self.assertTrue(compute_indicator_table({}).empty)
+
+    def test_price_panel_alignment(self):
+        tickers, lengths, panel = build_price_panel(
+            {"A": random_history(1, 3), "B": random_history(2, 5)}
+        )
+        self.assertEqual(tickers, ["A", "B"])
+        self.assertEqual(list(lengths), [3, 5])
+        self.assertEqual(panel["Close"].shape, (2, 5))
+        self.assertTrue(np.isnan(panel["Close"][0, :2]).all())
+        self.assertFalse(np.isnan(panel["Close"][0, 2:]).any())
+
+    @unittest.skipUnless(parallel_compute_available(), "worker processes can't be forked")
+    def test_parallel_matches_serial(self):
+        serial = compute_indicator_table(self.histories)
+        parallel = compute_indicator_table_parallel(self.histories, processes=3)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+    @unittest.skipUnless(parallel_compute_available(), "worker processes can't be forked")
+    def test_parallel_with_started_pool(self):
+        serial = compute_indicator_table(self.histories)
+        executor = start_indicator_pool(2)
+        try:
+            parallel = compute_indicator_table_parallel(self.histories, processes=2, executor=executor)
+        finally:
+            executor.shutdown()
+        pd.testing.assert_frame_equal(serial, parallel)
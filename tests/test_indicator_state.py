@@ -0,0 +1,135 @@
+import os
+import sys
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from growth_stock_screener.screen.iterations.utils import *
+
+# short_term_momentum imports its settings as a top-level 'screen' package (as run_screen.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "growth_stock_screener"))
+from screen.iterations.short_term_momentum import calculate_indicators
+from helpers import random_history
+
+
+class TestIndicatorStateStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "state.pkl")
+
+    def assertIndicatorsEqual(self, actual, expected, keys=None):
+        for key in keys or expected:
+            value = expected[key]
+            with self.subTest(indicator=key):
+                if value is None or (isinstance(value, float) and np.isnan(value)):
+                    self.assertTrue(pd.isna(actual[key]))
+                elif isinstance(value, (bool, np.bool_)):
+                    self.assertEqual(bool(actual[key]), bool(value))
+                else:
+                    self.assertAlmostEqual(actual[key], value, places=6)
+
+    def test_first_run_matches_reference(self):
+        store = IndicatorStateStore(self.path)
+        for seed, length in enumerate([21, 63, 130, 250]):
+            data = random_history(seed, length)
+            expected = calculate_indicators("T", data, include_info=False)
+            self.assertIndicatorsEqual(store.indicators(f"T{seed}", data), expected)
+
+    def test_incremental_update(self):
+        data = random_history(7, 80)
+        store = IndicatorStateStore(self.path)
+        store.indicators("T", data.iloc[:50])
+        store.save()
+
+        # a reloaded store only advances through the new bars
+        reloaded = IndicatorStateStore(self.path)
+        actual = reloaded.indicators("T", data.iloc[:60])
+
+        expected = calculate_indicators("T", data.iloc[:60], include_info=False)
+        self.assertIndicatorsEqual(actual, expected)
+
+    def test_sliding_window(self):
+        data = random_history(11, 300)
+        store = IndicatorStateStore(self.path)
+
+        # seeded with a short history, then fed a window which slides (and changes length) as bars are added
+        for start, end in [(0, 30), (0, 63), (5, 70), (9, 72), (20, 84), (30, 90), (30, 240)]:
+            with self.subTest(start=start, end=end):
+                window = data.iloc[start:end]
+                expected = calculate_indicators("T", window, include_info=False)
+                self.assertIndicatorsEqual(store.indicators("T", window), expected)
+
+    def test_window_before_kept_bars_is_recomputed(self):
+        data = random_history(13, 120)
+        store = IndicatorStateStore(self.path, window_bars=40)
+        store.indicators("T", data.iloc[60:100])
+
+        window = data.iloc[:110]
+        expected = calculate_indicators("T", window, include_info=False)
+        self.assertIndicatorsEqual(store.indicators("T", window), expected)
+
+    def test_idle_states_are_dropped(self):
+        store = IndicatorStateStore(self.path, max_idle_days=1)
+        store.indicators("OLD", random_history(1, 40))
+        store.indicators("NEW", random_history(2, 40))
+        store._states["OLD"].used_at -= 2 * 24 * 60 * 60
+        store.save()
+
+        reloaded = IndicatorStateStore(self.path)
+        reloaded.load()
+        self.assertEqual(list(reloaded._states), ["NEW"])
+
+    def test_table_matches_engine(self):
+        histories = {f"T{seed}": random_history(seed, length) for seed, length in enumerate([21, 40, 63, 130])}
+        expected = compute_indicator_table(histories)
+
+        # seeded together in one panel pass, then advanced by a new bar each
+        store = IndicatorStateStore(self.path)
+        store.indicator_table({ticker: data.iloc[:-1] for ticker, data in histories.items() if len(data) > 21})
+        self.assertEqual(sorted(store.stale_histories(histories)), ["T0"])
+
+        actual = store.indicator_table(histories)
+        self.assertEqual(list(actual.index), list(expected.index))
+        for ticker in expected.index:
+            with self.subTest(ticker=ticker):
+                self.assertIndicatorsEqual(actual.loc[ticker], expected.loc[ticker].to_dict())
+
+    def test_dates_match_across_timezones_and_units(self):
+        data = random_history(17, 60)
+        downloaded = data.tz_localize("America/New_York")  # fresh yfinance bars are tz-aware
+        store = IndicatorStateStore(self.path)
+        store.indicator_table({"T": downloaded.iloc[:-1]})
+
+        # the same sessions read back from the price store (tz-naive) or from a fallback provider (another unit)
+        fallback = data.set_axis(data.index.as_unit("s"))
+        for history in [data, downloaded, fallback]:
+            with self.subTest(tz=history.index.tz, unit=history.index.unit):
+                self.assertEqual(store.stale_histories({"T": history}), {})
+
+    def test_partial_bar_is_not_committed(self):
+        data = random_history(3, 40)
+        store = IndicatorStateStore(self.path)
+
+        partial = data.copy()
+        partial.iloc[-1, partial.columns.get_loc("Close")] *= 1.5
+        store.indicators("T", partial)
+
+        expected = calculate_indicators("T", data, include_info=False)
+        self.assertIndicatorsEqual(store.indicators("T", data), expected)
+
+    def test_revised_history_is_recomputed(self):
+        data = random_history(5, 40)
+        store = IndicatorStateStore(self.path)
+        store.indicators("T", data)
+
+        # a split-adjusted history changes past closes
+        revised = data.copy()
+        revised[["Open", "High", "Low", "Close"]] /= 2
+        expected = calculate_indicators("T", revised, include_info=False)
+        self.assertIndicatorsEqual(store.indicators("T", revised), expected)
+
+    def test_short_history(self):
+        store = IndicatorStateStore(self.path)
+        self.assertIsNone(store.indicators("T", random_history(1, 20)))
+        self.assertTrue(store.indicator_table({"T": random_history(1, 20)}).empty)
@@ -0,0 +1,100 @@
+import runpy
+import tempfile
+import types
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from growth_stock_screener.screen import settings
+from growth_stock_screener.screen.iterations import utils
+from growth_stock_screener.screen.iterations.utils import *
+
+
+def volume_bars(volume: float, days: int) -> pd.DataFrame:
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=days)
+    values = np.full(days, 20.0)
+    return pd.DataFrame(
+        {"Open": values, "High": values, "Low": values, "Close": values, "Volume": np.full(days, volume)},
+        index=index,
+    )
+
+
+class TestLiquidityStage(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+
+        # bars stored by the relative strength stage (SHORT's history is too short for a 50-day average)
+        store = PriceStore(tmp_dir.name, PANEL_PARTITION)
+        for symbol, volume, days in [
+            ("LIQ", 200000, 60),
+            ("THIN", 50000, 60),
+            ("SMALL", 200000, 60),
+            ("CHEAP", 200000, 60),
+            ("SHORT", 200000, 30),
+            ("NOCAP", 200000, 60),
+        ]:
+            store.put(symbol, volume_bars(volume, days), PANEL_PERIOD)
+        store.flush()
+
+        self.relative_strengths = pd.DataFrame(
+            {
+                "Symbol": ["LIQ", "THIN", "SMALL", "CHEAP", "SHORT", "NEW", "NOCAP"],
+                "Company Name": "Company",
+                "Market Cap": [2e9, 2e9, 5e8, 2e9, 2e9, 2e9, None],
+                "Industry": "Industry",
+                "Price": [20.0, 20.0, 20.0, 5.0, 20.0, 20.0, 20.0],
+                "RS": 90,
+            }
+        )
+        self.barchart_volumes = {"SHORT": 300000}  # NEW can't be scraped either
+
+        for patcher in [
+            mock.patch.object(utils, "PRICE_PANEL_DIR", tmp_dir.name),
+            mock.patch.object(utils, "open_outfile", return_value=self.relative_strengths),
+            mock.patch.object(utils, "create_outfile", side_effect=self.save_outfile),
+            mock.patch.object(utils, "get", side_effect=self.barchart),
+            mock.patch.object(utils, "extract_element", side_effect=self.extract_volume),
+            mock.patch.object(settings, "min_market_cap", 1e9),
+            mock.patch.object(settings, "min_price", 10),
+            mock.patch.object(settings, "min_volume", 100000),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def save_outfile(self, data, filename):
+        self.outfiles[filename] = data
+
+    async def barchart(self, url, session):
+        symbol = url.split("/")[-2]
+        self.scraped.append(symbol)
+        return symbol
+
+    def extract_volume(self, xpath, symbol):
+        if symbol not in self.barchart_volumes:
+            return None
+        return types.SimpleNamespace(text=f"{self.barchart_volumes[symbol]:,}")
+
+    def run_stage(self, volume_fallback):
+        self.outfiles = {}
+        self.scraped = []
+        with mock.patch.object(settings, "volume_fallback", volume_fallback):
+            return runpy.run_module("growth_stock_screener.screen.iterations.liquidity")
+
+    def test_fallback_and_thresholds(self):
+        stage = self.run_stage(True)
+
+        # only symbols without a stored 50-day average are scraped
+        self.assertEqual(sorted(self.scraped), ["NEW", "SHORT"])
+
+        screened = self.outfiles["liquidity"]
+        self.assertEqual(screened["Symbol"].tolist(), ["LIQ", "SHORT"])
+        self.assertEqual(screened["50-day Average Volume"].tolist(), [200000, 300000])
+        self.assertEqual(stage["failed_symbols"], ["NEW", "NOCAP"])
+
+    def test_without_fallback(self):
+        stage = self.run_stage(False)
+
+        self.assertEqual(self.scraped, [])
+        self.assertEqual(self.outfiles["liquidity"]["Symbol"].tolist(), ["LIQ"])
+        self.assertEqual(stage["failed_symbols"], ["SHORT", "NEW", "NOCAP"])
@@ -0,0 +1,217 @@
+import os
+import unittest
+import tempfile
+from unittest import mock
+import numpy as np
+import pandas as pd
+from growth_stock_screener.screen.iterations.utils import price_panel
+from growth_stock_screener.screen.iterations.utils import *
+
+
+def make_bars(start: str, periods: int, base: float = 1.0) -> pd.DataFrame:
+    index = pd.date_range(start, periods=periods, freq="B", tz="America/New_York")
+    values = base + np.arange(periods, dtype=float)
+    return pd.DataFrame(
+        {
+            "Open": values,
+            "High": values + 0.5,
+            "Low": values - 0.5,
+            "Close": values + 0.25,
+            "Volume": values * 1000,
+            "Dividends": 0.0,
+        },
+        index=index,
+    )
+
+
+class TestPriceStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+
+    def test_round_trip(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        store.put("AAA", make_bars("2024-01-01", 30), "3mo")
+        store.put("BBB", make_bars("2024-01-15", 10, base=5), "3mo")
+        store.flush()
+
+        reopened = PriceStore(self.tmp_dir.name, "1d")
+        aaa = reopened.get("AAA")
+        bbb = reopened.get("BBB")
+
+        self.assertEqual(list(aaa.columns), PRICE_FIELDS)
+        self.assertEqual(len(aaa), 30)
+        self.assertEqual(len(bbb), 10)
+        self.assertAlmostEqual(bbb["Close"].iloc[-1], 14.25)
+        self.assertEqual(bbb.index[0], pd.Timestamp("2024-01-15"))
+        self.assertIsNotNone(reopened.fetched_at("AAA"))
+
+    def test_unknown_symbol(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        self.assertIsNone(store.get("ZZZ"))
+        self.assertIsNone(store.fetched_at("ZZZ"))
+
+    def test_empty_history_is_cached(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        store.put("EMPTY", pd.DataFrame(), "3mo")
+        store.flush()
+
+        reopened = PriceStore(self.tmp_dir.name, "1d")
+        self.assertTrue(reopened.get("EMPTY").empty)
+        self.assertIsNotNone(reopened.fetched_at("EMPTY"))
+
+    def test_replace_symbol(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        store.put("AAA", make_bars("2024-01-01", 30), "3mo")
+        store.put("BBB", make_bars("2024-01-01", 5), "3mo")
+        store.flush()
+
+        store.put("AAA", make_bars("2024-03-01", 3, base=100), "3mo")
+        store.flush()
+
+        reopened = PriceStore(self.tmp_dir.name, "1d")
+        self.assertEqual(len(reopened.get("AAA")), 3)
+        self.assertAlmostEqual(reopened.get("AAA")["Open"].iloc[0], 100)
+        self.assertEqual(len(reopened.get("BBB")), 5)
+        self.assertEqual(sorted(reopened.symbols()), ["AAA", "BBB"])
+
+    def test_longer_period_serves_shorter(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        end = pd.Timestamp.now().normalize()
+        store.put("AAA", make_bars(str((end - pd.DateOffset(years=1)).date()), 300), "1y")
+
+        self.assertTrue(store.covers("AAA", "1y"))
+        self.assertTrue(store.covers("AAA", "3mo"))
+        self.assertFalse(store.covers("AAA", "2y"))
+        self.assertFalse(store.covers("AAA", "max"))
+        self.assertFalse(store.covers("ZZZ", "3mo"))
+
+        sliced = store.get("AAA", "3mo")
+        self.assertLess(len(sliced), 300)
+        self.assertGreaterEqual(sliced.index[0], period_start("3mo"))
+        self.assertEqual(sliced.index[-1], store.get("AAA").index[-1])
+
+    def test_panel(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        store.put("AAA", make_bars("2024-01-01", 10), "3mo")
+        store.flush()
+        store.put("BBB", make_bars("2024-01-08", 10, base=5), "3mo")  # staged only
+
+        panel = store.panel(["BBB", "AAA", "ZZZ"], "Close")
+        self.assertEqual(list(panel.columns), ["BBB", "AAA", "ZZZ"])
+        self.assertEqual(len(panel), 15)
+        self.assertTrue(panel["ZZZ"].isna().all())
+        self.assertEqual(panel["AAA"].dropna().tolist(), store.get("AAA")["Close"].tolist())
+        self.assertEqual(panel["BBB"].dropna().tolist(), store.get("BBB")["Close"].tolist())
+
+    def test_get_many(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        end = pd.Timestamp.now().normalize()
+        store.put("AAA", make_bars(str((end - pd.DateOffset(years=1)).date()), 300), "1y")
+        store.put("BBB", make_bars("2024-01-08", 10, base=5), "1y")
+        store.flush()
+        store.put("CCC", make_bars("2024-01-01", 10), "1y")  # staged only
+
+        for period in [None, "3mo"]:
+            bars = store.get_many(["CCC", "AAA", "ZZZ", "BBB"], period)
+            self.assertEqual(list(bars), ["CCC", "AAA", "BBB"])
+            for symbol, data in bars.items():
+                pd.testing.assert_frame_equal(data, store.get(symbol, period))
+
+    def test_autoflush_appends_segments(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        symbols = [f"S{i}" for i in range(AUTOFLUSH_SIZE + 10)]
+        for i, symbol in enumerate(symbols):
+            store.put(symbol, make_bars("2024-01-01", 5, base=i), "3mo")
+
+        # the staged bars reached disk as a segment without rewriting the partition
+        self.assertFalse(os.path.exists(os.path.join(store.path, "index.json")))
+        self.assertEqual(store._segment_files(), ["segment_0.npz"])
+
+        # an interrupted run keeps the segment's bars
+        recovered = PriceStore(self.tmp_dir.name, "1d")
+        self.assertEqual(recovered.symbols(), symbols[:AUTOFLUSH_SIZE])
+        pd.testing.assert_frame_equal(recovered.get("S7"), store.get("S7"))
+        self.assertEqual(recovered.fetched_at("S7"), store.fetched_at("S7"))
+
+        store.flush()
+        self.assertEqual(store._segment_files(), [])
+        reopened = PriceStore(self.tmp_dir.name, "1d")
+        self.assertEqual(sorted(reopened.symbols()), sorted(symbols))
+        self.assertAlmostEqual(reopened.get(symbols[-1])["Open"].iloc[0], len(symbols) - 1)
+
+    def test_remove(self):
+        store = PriceStore(self.tmp_dir.name, "1d")
+        store.put("AAA", make_bars("2024-01-01", 10), "3mo")
+        store.put("BBB", make_bars("2024-02-01", 10), "3mo")
+        store.flush()
+        store.remove(["AAA"])
+        store.flush()
+
+        reopened = PriceStore(self.tmp_dir.name, "1d")
+        self.assertEqual(reopened.symbols(), ["BBB"])
+        self.assertIsNone(reopened.get("AAA"))
+        self.assertEqual(len(reopened.get("BBB")), 10)
+        # sessions only the removed symbol traded are dropped from the date axis
+        self.assertEqual(len(reopened.panel(["AAA", "BBB"])), 10)
+
+    def test_period_start(self):
+        now = pd.Timestamp("2024-05-15")
+        self.assertEqual(period_start("3mo", now), pd.Timestamp("2024-02-15"))
+        self.assertEqual(period_start("1y", now), pd.Timestamp("2023-05-15"))
+        self.assertEqual(period_start("ytd", now), pd.Timestamp("2024-01-01"))
+        self.assertIsNone(period_start("max", now))
+
+
+class TestUpdatePricePanel(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.store = PriceStore(self.tmp_dir.name, "1d")
+        self.start = str((pd.Timestamp.now().normalize() - pd.DateOffset(months=23)).date())
+
+    def download(self, bars):
+        def fake_download(symbols, timeout, **download_args):
+            self.calls.append((list(symbols), download_args))
+            return {symbol: bars[symbol] for symbol in symbols}
+
+        self.calls = []
+        return mock.patch.object(price_panel, "download_bars", side_effect=fake_download)
+
+    def test_append_backfill_and_delist(self):
+        history = make_bars(self.start, 480)
+        with self.download({"AAA": history[:-1], "OLD": history}):
+            update_price_panel(self.store, ["AAA", "OLD"], timeout=1)
+
+        # the next run only downloads sessions since AAA's last stored bar, and backfills the new listing
+        with self.download({"AAA": history[-3:], "NEW": history}):
+            update_price_panel(self.store, ["AAA", "NEW"], timeout=1, max_age_days=0)
+
+        self.assertEqual(self.calls[0], (["AAA"], {"start": str(history.index[-3].date())}))
+        self.assertEqual(self.calls[1], (["NEW"], {"period": "2y"}))
+        self.assertEqual(sorted(self.store.symbols()), ["AAA", "NEW"])
+        self.assertEqual(self.store.get("AAA")["Close"].tolist(), history["Close"].tolist())
+
+    def test_other_periods_are_kept(self):
+        history = make_bars(self.start, 480)
+        self.store.put("MOM", history[-60:], "3mo")
+        self.store.flush()
+
+        with self.download({"AAA": history}):
+            update_price_panel(self.store, ["AAA"], timeout=1)
+
+        self.assertEqual(sorted(self.store.symbols()), ["AAA", "MOM"])
+        self.assertEqual(self.store.period_of("MOM"), "3mo")
+
+    def test_revised_history_is_refetched(self):
+        history = make_bars(self.start, 480)
+        with self.download({"AAA": history[:-1]}):
+            update_price_panel(self.store, ["AAA"], timeout=1)
+
+        split = history.copy()
+        split["Dividends"] = 1.0
+        with self.download({"AAA": split}):
+            update_price_panel(self.store, ["AAA"], timeout=1, max_age_days=0)
+
+        self.assertEqual([call[1] for call in self.calls], [{"start": str(history.index[-3].date())}, {"period": "2y"}])
+        self.assertEqual(len(self.store.get("AAA")), 480)
@@ -0,0 +1,46 @@
+import asyncio
+import time
+import unittest
+from email.utils import formatdate
+from growth_stock_screener.screen.iterations.utils import *
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=50, burst=5)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        self.assertLess(time.monotonic() - start, 0.05)
+
+        for _ in range(5):
+            bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 5 / 50 * 0.9)
+
+    def test_penalize_blocks(self):
+        bucket = TokenBucket(rate=1000, burst=10)
+        bucket.penalize(0.1)
+        start = time.monotonic()
+        bucket.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    def test_async_acquire_paces_coroutines(self):
+        bucket = TokenBucket(rate=100, burst=1)
+
+        async def run():
+            start = time.monotonic()
+            await asyncio.gather(*[bucket.acquire_async() for _ in range(6)])
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(run()), 5 / 100 * 0.9)
+
+    def test_unlimited_host(self):
+        self.assertIsNone(get_bucket("https://example.invalid/path"))
+        self.assertIs(get_bucket("https://data.sec.gov/a"), get_bucket("data.sec.gov"))
+
+    def test_retry_after(self):
+        self.assertEqual(retry_after_seconds({"Retry-After": "7"}), 7)
+        self.assertEqual(retry_after_seconds({}, default=3), 3)
+        self.assertEqual(retry_after_seconds({"Retry-After": "soon"}, default=3), 3)
+        date = formatdate(time.time() + 30, usegmt=True)
+        self.assertAlmostEqual(retry_after_seconds({"Retry-After": date}), 30, delta=2)
@@ -0,0 +1,55 @@
+import unittest
+import numpy as np
+import pandas as pd
+from growth_stock_screener.screen.iterations.utils import *
+
+CRITERIA = {
+    "Surge": [{"indicator": "volume_surge", "op": "==", "value": True, "label": "VolumeSurge"}],
+    "RSI Extreme": [
+        {"indicator": "rsi", "op": "<", "value": 30, "label": "RSI Oversold ({rsi:.1f})"},
+        {"indicator": "rsi", "op": ">", "value": 70, "label": "RSI Overbought ({rsi:.1f})"},
+    ],
+    "Short Interest": [
+        {"indicator": "short_interest_pct", "op": ">", "value": 15, "label": "SI ({short_interest_pct:.1f}%)"}
+    ],
+}
+
+
+class TestScoring(unittest.TestCase):
+    def setUp(self):
+        self.table = pd.DataFrame(
+            {
+                "volume_surge": [True, False, True, False],
+                "rsi": [25.0, 75.0, np.nan, 50.0],
+                "short_interest_pct": [20.0, None, 10.0, None],
+            },
+            index=pd.Index(["AAA", "BBB", "CCC", "DDD"], name="ticker"),
+        )
+
+    def test_score_table(self):
+        weights = {"Surge": 40, "RSI Extreme": 30, "Short Interest": 30}
+        scores = score_table(self.table, CRITERIA, weights)
+
+        self.assertEqual(scores["score"].tolist(), [100, 30, 40, 0])
+        self.assertEqual(
+            scores["criteria"].tolist(),
+            ["VolumeSurge, RSI Oversold (25.0), SI (20.0%)", "RSI Overbought (75.0)", "VolumeSurge", ""],
+        )
+
+    def test_weights_order_criteria(self):
+        weights = {"Short Interest": 10, "Surge": 5}
+        scores = score_table(self.table, CRITERIA, weights)
+        self.assertEqual(scores.loc["AAA", "criteria"], "SI (20.0%), VolumeSurge")
+
+    def test_missing_indicator_never_passes(self):
+        mask = condition_mask(self.table, {"indicator": "inst_own_pct", "op": ">", "value": 5})
+        self.assertFalse(mask.any())
+
+    def test_unknown_criterion(self):
+        with self.assertRaises(KeyError):
+            score_table(self.table, CRITERIA, {"Unknown": 10})
+
+    def test_criterion_indicators(self):
+        self.assertEqual(criterion_indicators(CRITERIA["RSI Extreme"]), {"rsi"})
+        conditions = [{"indicator": "bb_squeeze", "op": "==", "value": True, "label": "W:{bb_width:.3f}"}]
+        self.assertEqual(criterion_indicators(conditions), {"bb_squeeze", "bb_width"})
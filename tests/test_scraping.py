@@ -0,0 +1,121 @@
+import logging
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from growth_stock_screener.screen.iterations.utils import scraping
+from growth_stock_screener.screen.iterations.utils import *
+
+
+def fake_download(symbols, timeout, **download_args):
+    """Imitate yf.download: (field, ticker) columns, with one batch missing a session and one failing."""
+    if "BAD" in symbols:
+        raise RuntimeError("batch failed")
+
+    dates = pd.date_range("2024-01-01", periods=5, freq="B")
+    if "CCC" in symbols:
+        dates = dates[1:]
+
+    columns = pd.MultiIndex.from_product([["Close", "Volume"], sorted(symbols)], names=["Price", "Ticker"])
+    values = np.arange(len(dates) * len(columns), dtype=float).reshape(len(dates), len(columns))
+    return pd.DataFrame(values, index=dates, columns=columns)
+
+
+class TestDownloadBatches(unittest.TestCase):
+    def test_panel(self):
+        symbols = ["BBB", "AAA", "CCC", "DDD", "BAD"]
+        with mock.patch.object(scraping.yf, "download", side_effect=fake_download) as download:
+            panel = yf_download_batches(2, symbols, 1, fields=["Close", "Volume"], max_inflight=2)
+
+        self.assertEqual(download.call_count, 3)
+        self.assertEqual(list(panel["Close"].columns), ["BBB", "AAA", "CCC", "DDD"])
+        self.assertEqual(len(panel["Close"]), 5)
+        self.assertEqual(panel["Close"].dtypes.unique().tolist(), [np.float32])
+
+        first_batch = fake_download(["BBB", "AAA"], 1)
+        self.assertEqual(panel["Volume"]["AAA"].tolist(), first_batch["Volume"]["AAA"].tolist())
+        self.assertTrue(np.isnan(panel["Close"]["CCC"].iloc[0]))
+        self.assertEqual(panel["Close"]["CCC"].iloc[1:].tolist(), fake_download(["CCC", "DDD"], 1)["Close"]["CCC"].tolist())
+
+    def test_threads_are_bounded(self):
+        symbols = [f"S{i}" for i in range(12)]
+        threads = []
+
+        def download(batch, timeout, **download_args):
+            threads.append(download_args["threads"])
+            return fake_download(batch, timeout)
+
+        with mock.patch.object(scraping, "yf_download_max_threads", 8), mock.patch.object(
+            scraping.os, "cpu_count", return_value=4
+        ), mock.patch.object(scraping.yf, "download", side_effect=download) as download_mock:
+            panel = yf_download_batches(20, symbols, 1, max_inflight=4)
+
+        # batches shrink to the thread budget (one thread per symbol), leaving room for a single batch in flight
+        self.assertEqual([len(call.args[0]) for call in download_mock.call_args_list], [8, 4])
+        self.assertEqual(threads, [8, 8])
+        self.assertEqual(list(panel["Close"].columns), symbols)
+
+        with mock.patch.object(scraping.os, "cpu_count", return_value=4), mock.patch.object(
+            scraping.yf, "download", side_effect=download
+        ):
+            threads.clear()
+            yf_download_batches(2, symbols, 1, max_inflight=4)
+        self.assertEqual(set(threads), {2})
+
+
+class TestYfCall(unittest.TestCase):
+    def test_logged_rate_limit_penalizes(self):
+        def download():
+            # yf.download logs failed symbols instead of raising
+            logging.getLogger("yfinance").error("['AAA']: YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')")
+            return "data"
+
+        with mock.patch.object(scraping, "penalize") as penalize:
+            self.assertEqual(yf_call(download), "data")
+        penalize.assert_called_once_with(YFINANCE_HOST)
+        self.assertFalse(any(isinstance(h, scraping._ThrottleLogHandler) for h in logging.getLogger("yfinance").handlers))
+
+    def test_silenced_logger_still_penalizes(self):
+        # stages hide yfinance output by raising its logger's level (as the relative strength stage does)
+        logger = logging.getLogger("yfinance")
+        level, propagate = logger.level, logger.propagate
+        logger.setLevel(logging.CRITICAL)
+        self.addCleanup(logger.setLevel, level)
+
+        console = []
+        root_handler = logging.Handler()
+        root_handler.emit = console.append
+        logging.getLogger().addHandler(root_handler)
+        self.addCleanup(logging.getLogger().removeHandler, root_handler)
+
+        def download():
+            logger.error("['AAA']: YFRateLimitError('Too Many Requests. Rate limited. Try after a while.')")
+            return "data"
+
+        with mock.patch.object(scraping, "penalize") as penalize:
+            self.assertEqual(yf_call(download), "data")
+        penalize.assert_called_once_with(YFINANCE_HOST)
+
+        # the records stay off the console, and the logger is silenced again afterwards
+        self.assertEqual(console, [])
+        self.assertEqual((logger.level, logger.propagate), (logging.CRITICAL, propagate))
+
+    @unittest.skipIf(scraping.YFRateLimitError is None, "yfinance doesn't report throttling")
+    def test_raised_rate_limit_penalizes(self):
+        def history():
+            raise scraping.YFRateLimitError()
+
+        with mock.patch.object(scraping, "penalize") as penalize:
+            with self.assertRaises(scraping.YFRateLimitError):
+                yf_call(history)
+        penalize.assert_called_once_with(YFINANCE_HOST)
+
+    def test_other_errors_do_not_penalize(self):
+        def history():
+            logging.getLogger("yfinance").error("$AAA: possibly delisted; no price data found")
+            raise RuntimeError("failed")
+
+        with mock.patch.object(scraping, "penalize") as penalize:
+            with self.assertRaises(RuntimeError):
+                yf_call(history)
+        penalize.assert_not_called()
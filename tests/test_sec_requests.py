@@ -0,0 +1,271 @@
+import asyncio
+import json
+import math
+import tempfile
+import unittest
+import zipfile
+from unittest import mock
+import pandas as pd
+from growth_stock_screener.screen.iterations.utils import sec_requests
+from growth_stock_screener.screen.iterations.utils import *
+
+
+class TestCompanyFactsCache(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        patcher = mock.patch.object(sec_requests, "COMPANY_FACTS_CACHE_DIR", tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_revenue_facts(self):
+        facts = {"us-gaap": {"Revenues": {"units": {}}, "Assets": {"units": {}}}}
+        self.assertEqual(revenue_facts(facts), {"Revenues": {"units": {}}})
+        self.assertEqual(revenue_facts({"ifrs-full": {}}), {"Foreign Stock": True})
+
+    def test_round_trip(self):
+        facts = {"Revenues": {"units": {"USD": [{"val": 1}]}}}
+        save_cached_facts("0000000001", facts, {"ETag": '"abc"'})
+
+        cached = load_cached_facts("0000000001")
+        self.assertEqual(cached["facts"], facts)
+        self.assertEqual(cached["etag"], '"abc"')
+        self.assertIsNone(cached["last_modified"])
+
+    def test_unvalidated_responses_are_not_cached(self):
+        save_cached_facts("0000000002", {"Revenues": {}}, {})
+        self.assertIsNone(load_cached_facts("0000000002"))
+
+    def test_conditional_requests(self):
+        facts = {"Revenues": {"units": {"USD": [{"val": 1}]}}}
+        updated = {"Revenues": {"units": {"USD": [{"val": 1}, {"val": 2}]}}}
+        responses = [
+            (200, {"ETag": '"v1"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}, facts),
+            (304, {}, None),
+            (200, {"ETag": '"v2"'}, updated),
+        ]
+        requests = []
+
+        async def fake_get_response(url, session, headers=None, read_body=None):
+            requests.append(headers)
+            return responses[len(requests) - 1]
+
+        with mock.patch.object(sec_requests, "get_cik", return_value="0000000003"), mock.patch.object(
+            sec_requests, "get_response", side_effect=fake_get_response
+        ):
+            first = asyncio.run(get_company_facts("AAA", None))
+            not_modified = asyncio.run(get_company_facts("AAA", None))
+            changed = asyncio.run(get_company_facts("AAA", None))
+
+        # the first request is unconditional; later ones send the cached validators
+        self.assertNotIn("If-None-Match", requests[0])
+        self.assertEqual(requests[1]["If-None-Match"], '"v1"')
+        self.assertEqual(requests[1]["If-Modified-Since"], "Mon, 01 Jan 2024 00:00:00 GMT")
+        self.assertEqual(requests[2]["If-None-Match"], '"v1"')
+
+        # a 304 returns the cached facts; a 200 replaces them
+        self.assertEqual(first, facts)
+        self.assertEqual(not_modified, facts)
+        self.assertEqual(changed, updated)
+        cached = load_cached_facts("0000000003")
+        self.assertEqual((cached["etag"], cached["facts"]), ('"v2"', updated))
+
+
+class TestExtractRevenueFacts(unittest.TestCase):
+    def test_matches_full_parse(self):
+        def concept(label: str) -> dict:
+            rows = [{"end": "2024-03-31", "val": 1, "form": "10-Q", "frame": "CY2024Q1"}]
+            return {"label": label, "description": 'a "quoted" {"label": 1}', "units": {"USD": rows}}
+
+        facts = {
+            "dei": {"EntityCommonStockSharesOutstanding": concept("Shares")},
+            "us-gaap": {
+                "Assets": concept("Assets"),
+                "RevenueFromContractWithCustomerExcludingAssessedTax": concept("Revenue"),
+                "Revenues": concept("Revenues"),
+            },
+            "srt": {"Revenues": concept("Other taxonomy")},
+        }
+        expected = revenue_facts(facts)
+
+        for indent in [None, 2]:
+            document = json.dumps({"cik": 1, "facts": facts}, indent=indent)
+            extracted = extract_revenue_facts(document)
+            self.assertEqual(extracted, expected)
+            self.assertEqual(list(extracted), list(expected))
+
+            for chunk_size in [1, 7, 100]:
+                scanner = RevenueFactsScanner()
+                for i in range(0, len(document), chunk_size):
+                    if scanner.feed(document[i : i + chunk_size]):
+                        break
+                self.assertEqual(scanner.result(), expected)
+
+            # scanning stops once the us-gaap section ends, before the rest of the document arrives
+            scanner = RevenueFactsScanner()
+            self.assertTrue(scanner.feed(document[: document.index('"srt"') + 100]))
+            self.assertEqual(scanner.result(), expected)
+
+    def test_read_revenue_facts(self):
+        facts = {"us-gaap": {"Revenues": {"label": "Revenue – net", "units": {"USD": []}}}}
+        body = json.dumps({"facts": facts}, ensure_ascii=False).encode("utf-8")
+
+        class Content:
+            async def iter_chunked(self, size):
+                for i in range(0, len(body), 3):  # splits the multi-byte dash across chunks
+                    yield body[i : i + 3]
+
+        response = mock.Mock(content=Content())
+        self.assertEqual(asyncio.run(read_revenue_facts(response)), revenue_facts(facts))
+
+    def test_truncated_document(self):
+        scanner = RevenueFactsScanner()
+        scanner.feed('{"facts": {"us-gaap": {"Revenues": {"label": "Rev')
+        with self.assertRaises(ValueError):
+            scanner.result()
+
+    def test_foreign_and_invalid_documents(self):
+        document = json.dumps({"facts": {"ifrs-full": {"Revenue": {"label": "Revenue"}}}})
+        self.assertEqual(extract_revenue_facts(document), {"Foreign Stock": True})
+        self.assertIsNone(extract_revenue_facts('{"message": "Not Found"}'))
+
+
+class TestRevenueIndex(unittest.TestCase):
+    def test_build_and_query(self):
+        def concept(rows: list) -> dict:
+            return {"label": "Revenue", "units": {"USD": rows}}
+
+        older = [{"end": "2023-03-31", "val": 5, "form": "10-Q", "frame": "CY2023Q1"}]
+        newer = [
+            {"end": "2023-12-31", "val": 40, "form": "10-K", "frame": None},
+            {"end": "2024-03-31", "val": 12, "form": "10-Q", "frame": "CY2024Q1"},
+        ]
+        documents = {
+            "CIK0000000001.json": {"facts": {"us-gaap": {"Revenues": concept(older), "RevenueFromContractWithCustomerExcludingAssessedTax": concept(newer)}}},
+            "CIK0000000002.json": {"facts": {"ifrs-full": {}}},
+            "CIK0000000004.json": {"facts": {"us-gaap": {"Assets": concept(older)}}},
+        }
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = f"{tmp_dir}/companyfacts.zip"
+            index_path = f"{tmp_dir}/revenue_index.json"
+            with zipfile.ZipFile(archive_path, "w") as archive:
+                for name, document in documents.items():
+                    archive.writestr(name, json.dumps(document))
+
+            self.assertEqual(build_revenue_index(archive_path, index_path), 3)
+            index = load_revenue_index(index_path)
+
+            # an index built from an old archive is ignored
+            self.assertIsNotNone(load_revenue_index(index_path, max_age_days=1))
+            with mock.patch.object(sec_requests.time, "time", return_value=index["archive_modified"] + 2 * 86400):
+                self.assertIsNone(load_revenue_index(index_path, max_age_days=1))
+
+        ciks = {"AAA": "0000000001", "BBB": "0000000002", "CCC": "0000000003", "DDD": None, "EEE": "0000000004"}
+        with mock.patch.object(sec_requests, "get_cik", side_effect=ciks.get):
+            revenues = indexed_revenues(list(ciks), index)
+
+        # CCC isn't indexed (fetched from SEC.gov); EEE reports no revenue concept (skipped like a symbol without cik)
+        self.assertEqual(list(revenues), ["AAA", "BBB", "DDD", "EEE"])
+        self.assertEqual(revenues["AAA"].to_dict("records"), [{"frame": "CY2024Q1", "end": "2024-03-31", "val": 12}])
+        self.assertIn("Foreign Stock", revenues["BBB"])
+        self.assertIsNone(revenues["DDD"])
+        self.assertIsNone(revenues["EEE"])
+
+
+class TestRevenueGrowth(unittest.TestCase):
+    def setUp(self):
+        frames = ["CY2022Q1", "CY2022Q2", "CY2022Q3", "CY2022", "CY2023Q1", "CY2023Q2", "CY2023Q3", "CY2023"]
+        values = [10, 10, 10, 50, 12, 12, 12, 66]
+        self.df = pd.DataFrame({"frame": frames, "val": values})
+
+    def test_quarterly_revenues(self):
+        revenues = quarterly_revenues(self.df)
+        self.assertEqual(revenues["CY2022"], 20)
+        self.assertEqual(revenues["CY2023"], 30)
+        self.assertEqual(revenues["CY2023Q2"], 12)
+
+        # annual revenue can't be converted without the three preceding quarters
+        self.assertNotIn("CY2022", quarterly_revenues(self.df.iloc[1:].reset_index(drop=True)))
+        self.assertIsNone(extract_revenue("CY2021Q1", self.df))
+
+    def test_revenue_growth_table(self):
+        data = {
+            "AAA": self.df,
+            "BBB": pd.DataFrame({"frame": ["CY2023Q1"], "val": [5]}),
+            "CCC": pd.DataFrame.from_dict([{"Foreign Stock": True}]),
+            "DDD": None,
+        }
+        table = revenue_growth_table(data)
+
+        self.assertEqual(list(table.index), [("AAA", "Q1"), ("AAA", "Q2"), ("BBB", "Q2")])
+        self.assertEqual(table.loc[("AAA", "Q2"), "Growth"], 50)
+        self.assertAlmostEqual(table.loc[("AAA", "Q1"), "Growth"], 20)
+        self.assertTrue(math.isnan(table.loc[("BBB", "Q2"), "Growth"]))
+
+
+class TestCikMap(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        for patcher in [
+            mock.patch.object(sec_requests, "CIK_MAP_CACHE_PATH", f"{tmp_dir.name}/company_tickers.json"),
+            mock.patch.object(sec_requests, "_cik_map", None),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        response = mock.Mock()
+        response.json.return_value = {
+            "0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."},
+            "1": {"cik_str": 789019, "ticker": "MSFT", "title": "Microsoft Corp"},
+        }
+        self.get = mock.patch.object(sec_requests.requests, "get", return_value=response).start()
+        self.addCleanup(mock.patch.stopall)
+
+    def test_lazy_download_and_disk_cache(self):
+        self.get.assert_not_called()
+        self.assertEqual(get_cik("AAPL"), "0000320193")
+        self.assertIsNone(get_cik("UNKNOWN"))
+        self.assertEqual(self.get.call_count, 1)
+
+        # a new process reads the fresh disk cache instead of downloading the table again
+        sec_requests._cik_map = None
+        self.assertEqual(get_cik("MSFT"), "0000789019")
+        self.assertEqual(self.get.call_count, 1)
+
+    def test_stale_cache_is_refreshed(self):
+        load_cik_map()
+        sec_requests._cik_map = None
+
+        with mock.patch.object(sec_requests, "cik_map_max_age_days", 0):
+            load_cik_map()
+        self.assertEqual(self.get.call_count, 2)
+
+
+class TestFetchAllRevenues(unittest.TestCase):
+    def test_sliding_window(self):
+        inflight = 0
+        peak = 0
+
+        async def fake_fetch_revenues(symbol, session):
+            nonlocal inflight, peak
+            inflight += 1
+            peak = max(peak, inflight)
+            await asyncio.sleep(0.01)
+            inflight -= 1
+            if symbol == "BAD":
+                raise KeyError("frame")
+            return pd.DataFrame({"frame": [symbol]})
+
+        symbols = [f"S{i}" for i in range(10)] + ["BAD"] + [f"S{i}" for i in range(10, 20)]
+        with mock.patch.object(sec_requests, "sec_max_inflight", 4), mock.patch.object(
+            sec_requests, "load_cik_map"
+        ), mock.patch.object(sec_requests, "fetch_revenues", side_effect=fake_fetch_revenues):
+            revenues = fetch_all_revenues(symbols)
+
+        self.assertEqual(peak, 4)
+        # the failing symbol doesn't cancel the requests around it
+        self.assertEqual(list(revenues), symbols)
+        self.assertIsNone(revenues["BAD"])
+        self.assertEqual(revenues["S15"]["frame"].tolist(), ["S15"])
@@ -0,0 +1,315 @@
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+
+# short_term_momentum imports its settings as a top-level 'screen' package (as run_screen.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "growth_stock_screener"))
+from screen.iterations import short_term_momentum as stm
+
+PRICE_FIELDS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def recent_history(seed: int, length: int = 300) -> pd.DataFrame:
+    """Return random daily bars ending today, with tz-aware dates and an action column as yf.download returns them."""
+    rng = np.random.default_rng(seed)
+    close = 2 * np.exp(np.cumsum(rng.normal(0, 0.02, length)))
+    index = pd.bdate_range(end=pd.Timestamp.now().normalize(), periods=length, tz="America/New_York")
+    return pd.DataFrame(
+        {
+            "Open": close,
+            "High": close * 1.02,
+            "Low": close * 0.98,
+            "Close": close,
+            "Volume": rng.integers(10000, 1000000, length).astype(float),
+            "Dividends": 0.0,
+        },
+        index=index,
+    )
+
+
+class TestPrefetchStockData(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        for patcher in [
+            mock.patch.object(stm, "CACHE_DIR", tmp_dir.name),
+            mock.patch.object(stm, "_price_stores", {}),
+            mock.patch.object(stm.settings, "MAX_CACHE_AGE_DAYS", 1.0),
+            mock.patch.object(stm.settings, "INCREMENTAL_FETCH", True),
+            # per-ticker requests must not be needed when the batch download succeeds
+            mock.patch.object(stm.yf, "Ticker", side_effect=AssertionError("per-ticker fetch")),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.histories = {"AAA": recent_history(1), "BBB": recent_history(2)}
+
+    def download(self, responses):
+        """Patch yf.download to answer each call with the next dict of ticker -> bars (a delta when 'start' is passed)."""
+        self.calls = []
+        responses = iter(responses)
+
+        def fake_download(tickers, **download_args):
+            self.calls.append((list(tickers), {k: v for k, v in download_args.items() if k in ["start", "period"]}))
+            bars = next(responses)
+            frames = {}
+            for ticker in tickers:
+                data = bars[ticker]
+                if "start" in download_args:
+                    data = data[data.index.tz_localize(None) >= pd.Timestamp(download_args["start"])]
+                frames[ticker] = data
+            return pd.concat(frames, axis=1)
+
+        return mock.patch.object(stm.yf, "download", side_effect=fake_download)
+
+    def assertHistoryEqual(self, actual, expected, period="3mo"):
+        """Compare the bars of a history (fresh downloads are tz-aware, stored bars aren't) over a period."""
+        actual = actual if actual.index.tz is None else actual.tz_localize(None)
+        expected = stm.slice_period(expected[PRICE_FIELDS].tz_localize(None), period)
+        self.assertEqual(list(actual.index), list(expected.index))
+        np.testing.assert_allclose(actual[PRICE_FIELDS].to_numpy(), expected.to_numpy())
+
+    def age_store(self, days):
+        store = stm.get_price_store("1d")
+        for ticker in self.histories:
+            store._fetched[ticker] -= days * 24 * 60 * 60
+
+    def test_batch_hit_skips_per_ticker_fetch(self):
+        with self.download([self.histories]):
+            histories = stm.prefetch_stock_data(list(self.histories))
+
+        # one batch for every missing ticker, widened to the cache period
+        self.assertEqual(self.calls, [(["AAA", "BBB"], {"period": stm.CACHE_FETCH_PERIOD})])
+        for ticker, data in self.histories.items():
+            self.assertHistoryEqual(histories[ticker], data)
+
+        # a fresh cache is served without any request
+        with self.download([]):
+            cached = stm.prefetch_stock_data(list(self.histories))
+        self.assertEqual(self.calls, [])
+        for ticker, data in self.histories.items():
+            self.assertHistoryEqual(cached[ticker], data)
+
+    def test_stale_cache_downloads_delta(self):
+        stored = {ticker: data.iloc[:-2] for ticker, data in self.histories.items()}
+        with self.download([stored]):
+            stm.prefetch_stock_data(list(self.histories))
+        self.age_store(2)
+
+        with self.download([self.histories]):
+            histories = stm.prefetch_stock_data(list(self.histories))
+
+        # only the bars from the stored second-to-last session onward are requested
+        overlap = stored["AAA"].index[-2].strftime("%Y-%m-%d")
+        self.assertEqual(self.calls, [(["AAA", "BBB"], {"start": overlap})])
+        for ticker, data in self.histories.items():
+            self.assertHistoryEqual(histories[ticker], data)
+            self.assertHistoryEqual(stm.get_price_store("1d").get(ticker), data, stm.CACHE_FETCH_PERIOD)
+
+    def test_dividend_in_delta_forces_full_refetch(self):
+        stored = {ticker: data.iloc[:-2] for ticker, data in self.histories.items()}
+        with self.download([stored]):
+            stm.prefetch_stock_data(list(self.histories))
+        self.age_store(2)
+
+        # AAA paid a dividend, so its whole adjusted history changed
+        delta = dict(self.histories)
+        delta["AAA"] = self.histories["AAA"].copy()
+        delta["AAA"].iloc[-1, delta["AAA"].columns.get_loc("Dividends")] = 0.5
+        adjusted = {"AAA": self.histories["AAA"].assign(Close=self.histories["AAA"]["Close"] * 0.99)}
+
+        with self.download([delta, adjusted]):
+            histories = stm.prefetch_stock_data(list(self.histories))
+
+        overlap = stored["AAA"].index[-2].strftime("%Y-%m-%d")
+        self.assertEqual(
+            self.calls,
+            [(["AAA", "BBB"], {"start": overlap}), (["AAA"], {"period": stm.CACHE_FETCH_PERIOD})],
+        )
+        self.assertHistoryEqual(histories["AAA"], adjusted["AAA"])
+        self.assertHistoryEqual(histories["BBB"], self.histories["BBB"])
+
+
+class TestPrefilterUniverse(unittest.TestCase):
+    def setUp(self):
+        for patcher in [
+            mock.patch.object(stm.settings, "prefilter_price_tolerance", 0.1),
+            mock.patch.object(stm.settings, "prefilter_min_volume", 1000),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_tolerance_band_and_volume(self):
+        listings = pd.DataFrame(
+            {
+                "Symbol": ["IN", "LOW", "EDGE", "HIGH", "NOSALE", "THIN", "NOVOL"],
+                "Last Sale": [3.0, 0.85, 5.4, 5.6, np.nan, 3.0, 3.0],
+                "Volume": [5000, 5000, 5000, 5000, 5000, 999, np.nan],
+            }
+        )
+
+        # the $1 - $5 range widens to $0.90 - $5.50; symbols without a quote are kept
+        kept = stm.prefilter_universe(listings, 1, 5)
+        self.assertEqual(kept, ["IN", "EDGE", "NOSALE", "NOVOL"])
+
+    def test_listing_without_quotes(self):
+        listings = pd.DataFrame({"Symbol": ["AAA", "BBB"]})
+        self.assertEqual(stm.prefilter_universe(listings, 1, 5), ["AAA", "BBB"])
+
+
+class TestRequiredSources(unittest.TestCase):
+    def setUp(self):
+        self.histories = {"AAA": recent_history(1, 60), "BBB": recent_history(2, 60), "CHEAP": recent_history(3, 60) / 100}
+        self.info = {"sharesShort": 20, "floatShares": 100, "shortRatio": 2.5, "heldPercentInstitutions": 0.4}
+
+    def test_required_sources(self):
+        self.assertEqual(stm.required_sources("24_hours"), {"history"})
+        self.assertEqual(stm.required_sources("3_days"), {"history"})
+        self.assertEqual(stm.required_sources("2_weeks"), {"history", "info"})
+
+    def test_info_is_loaded_only_when_needed(self):
+        with mock.patch.object(stm, "load_indicator_table", return_value=pd.DataFrame()) as load, mock.patch.object(
+            stm, "score_candidates"
+        ):
+            stm.screen_timeframes(["AAA"], ["24_hours", "3_days"])
+            stm.screen_timeframes(["AAA"], ["24_hours", "2_weeks"])
+
+        self.assertEqual([call.args[3] for call in load.call_args_list], [False, True])
+
+    def test_info_requests(self):
+        tickers = list(self.histories)
+        with mock.patch.object(stm, "fetch_ticker_info", return_value=self.info) as fetch_info:
+            _, info_rows = asyncio.run(stm._screen_tickers_async(tickers, self.histories, 0.5, 100, False))
+            self.assertEqual(info_rows, {"AAA": None, "BBB": None})
+            fetch_info.assert_not_called()
+
+            # fetched for the tickers which passed the price filter only
+            _, info_rows = asyncio.run(stm._screen_tickers_async(tickers, self.histories, 0.5, 100, True))
+        self.assertEqual(sorted(call.args[0] for call in fetch_info.call_args_list), ["AAA", "BBB"])
+        self.assertEqual(info_rows["AAA"], {"short_interest_pct": 20, "short_ratio": 2.5, "inst_own_pct": 40})
+
+
+class TestScreenSweeps(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        # results files are written to the working directory
+        cwd = os.getcwd()
+        os.chdir(tmp_dir.name)
+        self.addCleanup(os.chdir, cwd)
+
+        for patcher in [
+            mock.patch.object(stm, "_price_stores", {}),
+            mock.patch.object(stm.settings, "STREAMING_INDICATORS", False),
+            mock.patch.object(stm.settings, "INDICATOR_PROCESSES", 1),
+            mock.patch.object(stm.settings, "min_price_short_term", 0.5),
+            mock.patch.object(stm.settings, "max_price_short_term", 50),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.histories = {}
+        for seed, scale in enumerate([1, 0.8, 5, 8, 20]):
+            data = recent_history(seed, 80)
+            data[["Open", "High", "Low", "Close"]] *= scale
+            if seed % 2 == 0:
+                data.iloc[-1, data.columns.get_loc("Volume")] *= 50  # volume surge
+            self.histories[f"T{seed}"] = data
+        self.tickers = list(self.histories)
+        self.presets = {"low": {"min": 0.5, "max": 5}, "high": {"min": 5, "max": 50}}
+        self.timeframes = ["24_hours", "3_days"]
+
+    def sweep(self, screen, *args):
+        """Run a screen, counting the history loads and indicator computations."""
+        with mock.patch.object(stm, "prefetch_stock_data", return_value=self.histories) as prefetch, mock.patch.object(
+            stm, "compute_indicators", side_effect=stm.compute_indicators
+        ) as compute:
+            results = screen(self.tickers, *args)
+        return results, prefetch.call_count, compute.call_count
+
+    def test_screen_timeframes(self):
+        results, loads, computes = self.sweep(stm.screen_timeframes, self.timeframes)
+        self.assertEqual((loads, computes), (1, 1))
+        self.assertEqual(list(results), self.timeframes)
+
+        # each timeframe's table is the one screening it alone gives
+        for timeframe in self.timeframes:
+            expected, _, _ = self.sweep(stm.screen_stocks, timeframe)
+            self.assertFalse(expected.empty)
+            pd.testing.assert_frame_equal(results[timeframe], expected)
+
+    def test_screen_presets(self):
+        results, loads, computes = self.sweep(stm.screen_presets, self.presets, self.timeframes)
+        self.assertEqual((loads, computes), (1, 1))
+        self.assertEqual(list(results), [(name, timeframe) for name in self.presets for timeframe in self.timeframes])
+
+        for name, preset in self.presets.items():
+            with mock.patch.object(stm.settings, "min_price_short_term", preset["min"]), mock.patch.object(
+                stm.settings, "max_price_short_term", preset["max"]
+            ):
+                expected, _, _ = self.sweep(stm.screen_timeframes, self.timeframes)
+
+            for timeframe in self.timeframes:
+                with self.subTest(preset=name, timeframe=timeframe):
+                    self.assertFalse(expected[timeframe].empty)
+                    pd.testing.assert_frame_equal(
+                        results[(name, timeframe)].reset_index(drop=True), expected[timeframe].reset_index(drop=True)
+                    )
+                    self.assertTrue(os.path.exists(stm.candidates_filename(timeframe, name)))
+
+
+class TestScreenTickersAsync(unittest.TestCase):
+    def setUp(self):
+        for patcher in [
+            mock.patch.object(stm.settings, "YFINANCE_MAX_INFLIGHT", 3),
+            mock.patch.object(stm.settings, "TWELVEDATA_MAX_INFLIGHT", 1),
+            mock.patch.object(stm, "td_client", object()),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.lock = threading.Lock()
+        self.inflight = {"yfinance": 0, "twelvedata": 0}
+        self.peak = {"yfinance": 0, "twelvedata": 0}
+
+    def provider(self, name, result):
+        """Return a stub fetch which records how many calls of a provider run at once."""
+
+        def fetch(ticker, *args):
+            with self.lock:
+                self.inflight[name] += 1
+                self.peak[name] = max(self.peak[name], self.inflight[name])
+            time.sleep(0.02)
+            with self.lock:
+                self.inflight[name] -= 1
+            return result(ticker)
+
+        return fetch
+
+    def test_concurrency_cap_and_fallback(self):
+        tickers = [f"T{i}" for i in range(12)]
+        full = {ticker: recent_history(i, 60) for i, ticker in enumerate(tickers)}
+        # every third ticker has too short a yfinance history and falls back to Twelve Data
+        short = {ticker for i, ticker in enumerate(tickers) if i % 3 == 0}
+
+        def yfinance(ticker):
+            return full[ticker].iloc[-5:] if ticker in short else full[ticker]
+
+        with mock.patch.object(stm, "_fetch_yfinance_data", side_effect=self.provider("yfinance", yfinance)), mock.patch.object(
+            stm, "_fetch_twelvedata", side_effect=self.provider("twelvedata", lambda ticker: full[ticker] * 1.01)
+        ) as twelvedata:
+            histories, _ = asyncio.run(stm._screen_tickers_async(tickers, {}, 0, 1000, False))
+
+        self.assertEqual(self.peak, {"yfinance": 3, "twelvedata": 1})
+        self.assertEqual(sorted(call.args[0] for call in twelvedata.call_args_list), sorted(short))
+        self.assertEqual(list(histories), tickers)
+        for ticker in tickers:
+            expected = full[ticker] * 1.01 if ticker in short else full[ticker]
+            pd.testing.assert_frame_equal(histories[ticker], expected)